@@ -1,16 +1,281 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
 import mysql.connector
 from config import Config
 
-def get_db_connection():
-    """Establishes and returns a connection to the MySQL database."""
+def connect_mysql(**options):
+    """
+    Opens a new, unpooled connection to the MySQL database.
+    Extra keyword options are passed to mysql.connector.connect (e.g. allow_local_infile=True).
+    """
     try:
         connection = mysql.connector.connect(
             host=Config.DB_HOST,
             user=Config.DB_USER,
             password=Config.DB_PASSWORD,
-            database=Config.DB_NAME
+            database=Config.DB_NAME,
+            **options
         )
         return connection
     except mysql.connector.Error as err:
         print(f"Error connecting to database: {err}")
         raise err
+
+def connect_sqlite(**options):
+    """Opens a tuned SQLite connection to Config.SQLITE_PATH (see api/sqlite_backend.py)."""
+    from api import sqlite_backend
+    return sqlite_backend.connect(Config.SQLITE_PATH, **options)
+
+# Storage backends by Config.DB_BACKEND name: a factory for connections speaking the
+# mysql-connector interface (%s placeholders, cursor(dictionary=True), lastrowid)
+BACKENDS = {
+    "mysql": connect_mysql,
+    "sqlite": connect_sqlite,
+}
+
+def connect(**options):
+    """Opens a new, unpooled connection to the configured backend."""
+    try:
+        factory = BACKENDS[Config.DB_BACKEND]
+    except KeyError:
+        raise ValueError(f"Unknown DB_BACKEND {Config.DB_BACKEND!r}, expected one of {sorted(BACKENDS)}")
+    return factory(**options)
+
+def dialect(conn):
+    """'mysql' or 'sqlite' for a connection handed out by this module (or a plain sqlite3 one)."""
+    if isinstance(conn, sqlite3.Connection):
+        return "sqlite"
+    return getattr(conn, "dialect", "mysql")
+
+
+class PoolTimeout(mysql.connector.errors.PoolError):
+    """No pooled connection became free within the pool's timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of database connections.
+
+    At most max_size connections exist at once; acquire() hands out an idle one
+    (most recently used first) or opens a new one, and waits up to timeout seconds
+    when all are checked out. Health checks on checkout: connections older than
+    recycle seconds are replaced, and ones idle longer than ping_after seconds are
+    pinged (reconnecting if the server dropped them). release() rolls back any
+    open transaction so the next borrower starts clean.
+    Settings left as None are read from Config.DB_POOL_* when the pool is created.
+    """
+
+    def __init__(self, factory=connect, max_size=None, timeout=None, recycle=None, ping_after=None):
+        self.factory = factory
+        self.max_size = max(1, int(Config.DB_POOL_SIZE if max_size is None else max_size))
+        self.timeout = Config.DB_POOL_TIMEOUT if timeout is None else timeout
+        self.recycle = Config.DB_POOL_RECYCLE if recycle is None else recycle
+        self.ping_after = Config.DB_POOL_PING_AFTER if ping_after is None else ping_after
+        self.stats = {"opened": 0, "reused": 0, "pinged": 0, "discarded": 0, "waited": 0}
+        self._idle = []  # (connection, created, last_used), most recent last
+        self._size = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Returns a PooledConnection; close() on it hands the connection back."""
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(f"No free database connection after {self.timeout}s "
+                                      f"(pool size {self.max_size})")
+                self.stats["waited"] += 1
+                self._cond.wait(remaining)
+            if self._idle:
+                conn, created, last_used = self._idle.pop()
+            else:
+                conn = None
+                self._size += 1
+
+        try:
+            if conn is not None:
+                conn, created = self._check(conn, created, last_used)
+            if conn is None:
+                conn, created = self.factory(), time.monotonic()
+                self._count("opened")
+            else:
+                self._count("reused")
+        except BaseException:
+            self._forget()
+            raise
+        return PooledConnection(self, conn, created)
+
+    def _check(self, conn, created, last_used):
+        """Health check for an idle connection. Returns (conn, created), or (None, None) to open a new one."""
+        now = time.monotonic()
+        if now - created >= self.recycle:
+            self._close_quietly(conn)
+            return None, None
+        if now - last_used >= self.ping_after:
+            self._count("pinged")
+            try:
+                conn.ping(reconnect=True, attempts=1, delay=0)
+            except Exception:
+                self._close_quietly(conn)
+                return None, None
+        return conn, created
+
+    def release(self, conn, created):
+        try:
+            if getattr(conn, "in_transaction", True):
+                conn.rollback()
+        except Exception:
+            self._close_quietly(conn)
+            self._forget()
+            return
+        with self._cond:
+            self._idle.append((conn, created, time.monotonic()))
+            self._cond.notify()
+
+    def discard(self, conn):
+        """Closes a checked-out connection instead of returning it (e.g. after a connection error)."""
+        self._close_quietly(conn)
+        self._forget()
+
+    def _count(self, stat):
+        with self._cond:
+            self.stats[stat] += 1
+
+    def _forget(self):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _close_quietly(self, conn):
+        self._count("discarded")
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Closes the idle connections. Checked-out ones still return to the pool when released."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+        for conn, _, _ in idle:
+            self._close_quietly(conn)
+
+
+class PooledConnection:
+    """
+    Proxy for a pooled connection. Behaves like the underlying connection, except
+    that close() returns it to the pool; it can't be used after that.
+    """
+
+    def __init__(self, pool, conn, created):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_conn", conn)
+        object.__setattr__(self, "_created", created)
+
+    def __getattr__(self, name):
+        conn = object.__getattribute__(self, "_conn")
+        if conn is None:
+            raise mysql.connector.errors.OperationalError("Connection was returned to the pool")
+        return getattr(conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._conn, name, value)
+
+    def close(self):
+        conn = self._conn
+        if conn is not None:
+            object.__setattr__(self, "_conn", None)
+            self._pool.release(conn, self._created)
+
+    def discard(self):
+        conn = self._conn
+        if conn is not None:
+            object.__setattr__(self, "_conn", None)
+            self._pool.discard(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """The process-wide pool, created on first use (and again in a forked child)."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool, _pool_pid = ConnectionPool(), os.getpid()
+        return _pool
+
+def reset_pool():
+    """Closes the process-wide pool; the next call builds one for the current Config."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = None
+
+def sqlalchemy_engine():
+    """SQLAlchemy engine on the configured backend (for pandas), drawing from the shared pool."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import NullPool
+    if Config.DB_BACKEND == "sqlite":
+        # SQLAlchemy speaks SQLite natively, so it gets the raw (tuned) sqlite3 connections
+        from api import sqlite_backend
+        connect_sqlite().close()  # creates or upgrades the schema
+        return create_engine("sqlite://", creator=lambda: sqlite_backend.open_database(Config.SQLITE_PATH),
+                             poolclass=NullPool)
+    url = f"mysql+mysqlconnector://{Config.DB_USER}:{Config.DB_PASSWORD}@{Config.DB_HOST}/{Config.DB_NAME}"
+    # NullPool makes SQLAlchemy hand each connection back (close()) instead of keeping a second pool
+    return create_engine(url, creator=lambda: get_pool().acquire(), poolclass=NullPool)
+
+def get_db_connection(**options):
+    """
+    Returns a connection to the configured database from the process-wide pool; close()
+    hands it back. With extra keyword options (e.g. allow_local_infile=True), which
+    pooled connections don't carry, a dedicated connection is opened instead.
+    """
+    if options:
+        return connect(**options)
+    return get_pool().acquire()
+
+@contextmanager
+def db_connection():
+    """
+    with db_connection() as conn: ...
+    Borrows a pooled connection for the block. An uncommitted transaction is rolled
+    back when it goes back; a connection error discards it instead.
+    """
+    conn = get_pool().acquire()
+    try:
+        yield conn
+    except (mysql.connector.errors.InterfaceError, mysql.connector.errors.OperationalError):
+        conn.discard()
+        raise
+    finally:
+        conn.close()
+
+@contextmanager
+def db_cursor(commit=False, **cursor_options):
+    """
+    with db_cursor(dictionary=True) as cursor: ...
+    A cursor on a pooled connection, committed at the end of the block when commit is set.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor(**cursor_options)
+        try:
+            yield cursor
+            if commit:
+                conn.commit()
+        finally:
+            cursor.close()
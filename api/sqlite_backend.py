@@ -0,0 +1,295 @@
+import re
+import sqlite3
+import mysql.connector
+from datetime import datetime, date
+from log_schema import ALLOWED_COLUMNS
+
+# Tuned for one ingest writer plus concurrent readers (dashboard, API) on local disk:
+# WAL lets readers run while a batch is being written, and synchronous=NORMAL only
+# fsyncs at checkpoints (a power cut can lose the last commits, never corrupt the file)
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",      # 64 MiB page cache
+    "PRAGMA mmap_size = 268435456",    # 256 MiB memory-mapped reads
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA foreign_keys = OFF",
+)
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp DATETIME NOT NULL,
+    src_ip TEXT NOT NULL,
+    dst_ip TEXT NOT NULL,
+    src_port INTEGER,
+    dst_port INTEGER,
+    service TEXT,
+    device_type TEXT,
+    protocol TEXT,
+    action TEXT,
+    policyid INTEGER,
+    sentbyte INTEGER DEFAULT 0,
+    rcvdbyte INTEGER DEFAULT 0,
+    user TEXT DEFAULT 'N/A',
+    raw_log TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS alerts (
+    alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    severity TEXT NOT NULL,
+    detection_type TEXT NOT NULL,
+    src_ip TEXT NOT NULL,
+    device TEXT,
+    timestamp DATETIME NOT NULL,
+    raw_log_reference INTEGER,
+    mitre_tactic TEXT,
+    mitre_technique TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (raw_log_reference) REFERENCES logs(id)
+);
+
+CREATE TABLE IF NOT EXISTS devices (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    device_name TEXT,
+    mac_address TEXT,
+    ip_address TEXT,
+    known_type TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    role TEXT DEFAULT 'user',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    managed_by INTEGER,
+    FOREIGN KEY (managed_by) REFERENCES users(id) ON DELETE SET NULL
+);
+
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    file_path TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    byte_offset INTEGER NOT NULL,
+    records INTEGER NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Created after the column upgrade, so they also apply to older network_logs.db files
+SQLITE_INDEXES = (
+    # Upsert target of the alert rollup (uq_alert_rollup in schema.sql)
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_alert_rollup ON alerts (detection_type, src_ip, device, bucket_start)",
+    # Covering: newest-first log listing and time-window scans
+    "CREATE INDEX IF NOT EXISTS ix_logs_timestamp ON logs (timestamp)",
+    # Covering: per-source activity (who talked to what, allowed or not) without touching rows
+    "CREATE INDEX IF NOT EXISTS ix_logs_src ON logs (src_ip, timestamp, dst_ip, dst_port, action)",
+    # Covering: alert counts by time, severity and type
+    "CREATE INDEX IF NOT EXISTS ix_alerts_time ON alerts (timestamp, severity, detection_type, src_ip)",
+    "CREATE INDEX IF NOT EXISTS ix_alerts_log ON alerts (raw_log_reference)",
+)
+
+ALERT_EXTRA_COLUMNS = (
+    ("first_seen", "DATETIME"), ("last_seen", "DATETIME"),
+    ("event_count", "INTEGER DEFAULT 1"), ("bucket_start", "DATETIME"),
+)
+
+# MySQL dialect used by the writers -> SQLite, applied outside quoted literals only.
+# Upserts need SQLite 3.35+ (ON CONFLICT without a target)
+_LITERAL = re.compile(r"""('(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|`[^`]*`)""")
+_PLACEHOLDER = re.compile(r"%([s%])")
+_UPSERT = re.compile(r"\bON DUPLICATE KEY UPDATE\b")
+_TRANSLATIONS = (
+    (re.compile(r"\bLEAST\("), "MIN("),
+    (re.compile(r"\bGREATEST\("), "MAX("),
+    (re.compile(r"@@auto_increment_increment"), "1"),
+    (re.compile(r"\s+ON UPDATE CURRENT_TIMESTAMP"), ""),
+)
+# Only in the SET list of an upsert; elsewhere VALUES(...) is a row constructor
+_UPSERT_TRANSLATIONS = (
+    (re.compile(r"\bVALUES\((\w+)\)"), r"excluded.\1"),
+)
+_translated = {}
+
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(" "))
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+
+
+def as_mysql_error(e):
+    """Maps a sqlite3 error onto the mysql.connector class callers already catch."""
+    for sqlite_cls, mysql_cls in ((sqlite3.IntegrityError, mysql.connector.errors.IntegrityError),
+                                  (sqlite3.OperationalError, mysql.connector.errors.OperationalError),
+                                  (sqlite3.ProgrammingError, mysql.connector.errors.ProgrammingError)):
+        if isinstance(e, sqlite_cls):
+            return mysql_cls(msg=str(e))
+    return mysql.connector.errors.DatabaseError(msg=str(e))
+
+
+def _translate_code(code, upsert):
+    """Translates a stretch of SQL holding no quoted literals; `upsert` once past ON DUPLICATE KEY UPDATE."""
+    code = _PLACEHOLDER.sub(lambda m: "?" if m.group(1) == "s" else "%", code)
+    for pattern, repl in _TRANSLATIONS:
+        code = pattern.sub(repl, code)
+    if upsert:
+        for pattern, repl in _UPSERT_TRANSLATIONS:
+            code = pattern.sub(repl, code)
+    return code
+
+
+def translate(sql):
+    """Rewrites a MySQL-dialect statement (as used across the ingest code) for SQLite. Cached per SQL text."""
+    out = _translated.get(sql)
+    if out is None:
+        parts, upsert = [], False
+        # Even items are SQL, odd ones the quoted literals between them (kept verbatim)
+        for i, part in enumerate(_LITERAL.split(sql)):
+            if i % 2:
+                parts.append(part)
+                continue
+            match = None if upsert else _UPSERT.search(part)
+            if match:
+                parts.append(_translate_code(part[:match.start()], False) + "ON CONFLICT DO UPDATE SET")
+                part, upsert = part[match.end():], True
+            parts.append(_translate_code(part, upsert))
+        out = "".join(parts)
+        _translated[sql] = out
+    return out
+
+
+class SQLiteCursor:
+    """
+    DB-API cursor with the mysql-connector conventions the rest of the code relies on:
+    %s placeholders, dictionary=True rows, and lastrowid of a multi-row INSERT naming
+    its *first* row (SQLite reports the last one; rows of one statement get
+    consecutive ids since SQLite has a single writer).
+    """
+
+    def __init__(self, conn, dictionary=False):
+        self._cursor = conn.cursor()
+        self.dictionary = dictionary
+        # Placeholders per statement (compile-time limit, 999 on builds before 3.32)
+        self.max_params = conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER) if hasattr(conn, "getlimit") else 999
+        self.lastrowid = None
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, sql, params=()):
+        try:
+            self._cursor.execute(translate(sql), params or ())
+        except sqlite3.Error as e:
+            raise as_mysql_error(e) from e
+        self.lastrowid = self._cursor.lastrowid
+        if self._cursor.rowcount > 1 and self.lastrowid:
+            self.lastrowid -= self._cursor.rowcount - 1
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        try:
+            self._cursor.executemany(translate(sql), seq_of_params)
+        except sqlite3.Error as e:
+            raise as_mysql_error(e) from e
+        self.lastrowid = self._cursor.lastrowid
+        return self
+
+    def _row(self, row):
+        if row is None or not self.dictionary:
+            return row
+        return dict(zip((d[0] for d in self._cursor.description), row))
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return (self._row(row) for row in self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """sqlite3 connection behind the mysql-connector interface used by api.db callers."""
+
+    dialect = "sqlite"
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    @property
+    def in_transaction(self):
+        return self._conn.in_transaction
+
+    def cursor(self, dictionary=False, prepared=False, **_):
+        # prepared: sqlite3 already keeps compiled statements in a per-connection cache
+        return SQLiteCursor(self._conn, dictionary)
+
+    def commit(self):
+        try:
+            self._conn.commit()
+        except sqlite3.Error as e:
+            raise as_mysql_error(e) from e
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self._conn.execute("SELECT 1").fetchone()
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self._conn.close()
+
+
+def open_database(path):
+    """Opens a raw sqlite3 connection with the tuning pragmas applied."""
+    conn = sqlite3.connect(path, timeout=5, check_same_thread=False, cached_statements=256)
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def ensure_schema(conn):
+    """
+    Creates the tables and indexes if missing and adds columns that older databases
+    (like the network_logs.db shipped with the repo) lack.
+    """
+    conn.executescript(SQLITE_SCHEMA)
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(logs)")}
+    # Untyped (no affinity): values keep the type the normalizer produced
+    for col in sorted(ALLOWED_COLUMNS - existing):
+        conn.execute(f"ALTER TABLE logs ADD COLUMN {col}")
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(alerts)")}
+    for col, decl in ALERT_EXTRA_COLUMNS:
+        if col not in existing:
+            conn.execute(f"ALTER TABLE alerts ADD COLUMN {col} {decl}")
+    for sql in SQLITE_INDEXES:
+        conn.execute(sql)
+    conn.commit()
+
+
+def connect(path, **options):
+    """
+    Opens a tuned SQLite connection to `path`, creating or upgrading the schema
+    (cheap next to the connection's lifetime in the pool).
+    mysql-connector options (allow_local_infile, ...) don't apply and are ignored.
+    """
+    conn = open_database(path)
+    ensure_schema(conn)
+    return SQLiteConnection(conn)
@@ -1,18 +1,22 @@
 import random
+import itertools
 import ipaddress
 import string
 from dataset_loader import DatasetLoader
 import string
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 
 class AttackSimulator:
     """
     Generates specific attack traffic patterns based on configuration.
+    Randomness comes from `rng` (a random.Random), or the global random module if
+    none is given.
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], rng: Optional[random.Random] = None):
         self.config = config
+        self.rng = rng if rng is not None else random
         self.iot_config = config["attacks"]["iot_bruteforce"]
         self.dns_config = config["attacks"]["dns_tunneling"]
         self.beacon_config = config["attacks"]["beaconing"]
@@ -28,35 +32,62 @@ class AttackSimulator:
             self.loader = DatasetLoader(config["dataset"]["path"])
 
     def _get_random_external_ip(self) -> str:
-        subnet = random.choice(self.external_cidrs)
+        subnet = self.rng.choice(self.external_cidrs)
         # Generate a random host within the subnet
         # random.choice is slow for large networks, simpler to verify logic
         # For /24 or /16, we can pick a random offset
         network_int = int(subnet.network_address)
         max_hosts = subnet.num_addresses - 1
-        return str(ipaddress.IPv4Address(network_int + random.randint(1, max_hosts)))
+        return str(ipaddress.IPv4Address(network_int + self.rng.randint(1, max_hosts)))
 
     def _get_start_time(self, base_time: datetime, duration_hours: int) -> datetime:
         """Returns a random timestamp within the simulation window."""
-        offset_seconds = random.randint(0, duration_hours * 3600)
+        offset_seconds = self.rng.randint(0, duration_hours * 3600)
         return base_time + timedelta(seconds=offset_seconds)
 
-    def generate_iot_bruteforce(self, start_time: datetime, duration_hours: int, src_ip_override: str = None) -> List[Dict[str, Any]]:
+    def _spaced_times(self, start_time: datetime, duration_hours: float, step: float, jitter: float,
+                      total: Optional[int] = None, count: Optional[int] = None) -> Iterator[datetime]:
+        """
+        Increasing timestamps from start_time, step +/- jitter seconds apart: `total`
+        of them, or as many as fall inside the window if total is None.
+        With `count`, exactly that many instead, step and jitter stretched by the same
+        factor so they spread over the whole window.
+        """
+        if count is not None:
+            scale = duration_hours * 3600 / (count * step) if count else 1.0
+            step, jitter, total = step * scale, jitter * scale, count
+        end_time = start_time + timedelta(hours=duration_hours)
+        current_time = start_time
+        produced = 0
+        while total is None or produced < total:
+            # Never step backwards: consumers merge the profiles assuming time order
+            current_time += timedelta(seconds=max(0.0, step + self.rng.uniform(-jitter, jitter)))
+            if total is None and current_time > end_time:
+                return
+            produced += 1
+            yield current_time
+
+    def generate_iot_bruteforce(self, start_time: datetime, duration_hours: int, src_ip_override: str = None,
+                                count: Optional[int] = None) -> List[Dict[str, Any]]:
+        return list(self.iter_iot_bruteforce(start_time, duration_hours, src_ip_override, count))
+
+    def iter_iot_bruteforce(self, start_time: datetime, duration_hours: int, src_ip_override: str = None,
+                            count: Optional[int] = None) -> Iterator[Dict[str, Any]]:
         if not self.iot_config["enabled"]:
-            return []
+            return
             
         logs = []
         target_port = self.iot_config["target_port"]
-        attempts = self.iot_config["attempts_per_run"]
+        attempts = self.iot_config["attempts_per_run"] if count is None else count
         
         
         iot_count = self.config["devices"]["iot"]["count"]
-        victim_idx = random.randint(1, iot_count)
+        victim_idx = self.rng.randint(1, iot_count)
         
         if self.use_dataset:
             devices = self.loader.get_devices()
             if devices:
-                src_ip = random.choice(devices)
+                src_ip = self.rng.choice(devices)
                 dev_name = f"iot-{src_ip.split('.')[-1]}"
             else:
                  src_ip = f"192.168.1.{200 + victim_idx}"
@@ -71,10 +102,10 @@ class AttackSimulator:
         attack_start = self._get_start_time(start_time, duration_hours)
         
         for i in range(attempts):
-            timestamp = attack_start + timedelta(milliseconds=i * random.randint(50, 200)) # Fast interval
+            timestamp = attack_start + timedelta(milliseconds=i * self.rng.randint(50, 200)) # Fast interval
             
    
-            is_success = random.random() < self.iot_config["success_rate"]
+            is_success = self.rng.random() < self.iot_config["success_rate"]
             action = "accept" if is_success else "deny"
             
             
@@ -82,15 +113,15 @@ class AttackSimulator:
                 "timestamp": timestamp,
                 "srcip": src_ip,
                 "dstip": dst_ip,
-                "srcport": random.randint(10000, 65000),
+                "srcport": self.rng.randint(10000, 65000),
                 "dstport": target_port,
                 "proto": 6,
                 "service": "SSH",
                 "action": "accept", 
                 "policyid": 101,
-                "sentbyte": random.randint(100, 300), 
-                "rcvdbyte": random.randint(100, 300),
-                "duration": random.randint(1, 3),
+                "sentbyte": self.rng.randint(100, 300), 
+                "rcvdbyte": self.rng.randint(100, 300),
+                "duration": self.rng.randint(1, 3),
                 "user": "N/A",
                 "device_type": "iot_camera",
                 "level": "notice",
@@ -100,13 +131,18 @@ class AttackSimulator:
             }
             logs.append(log)
             
-        return logs
+        # Attempt i lands at i * (50-200ms), so the burst isn't generated in time order
+        yield from sorted(logs, key=lambda log: log["timestamp"])
 
-    def generate_dns_tunneling(self, start_time: datetime, duration_hours: int, src_ip_override: str = None) -> List[Dict[str, Any]]:
+    def generate_dns_tunneling(self, start_time: datetime, duration_hours: int, src_ip_override: str = None,
+                               count: Optional[int] = None) -> List[Dict[str, Any]]:
+        return list(self.iter_dns_tunneling(start_time, duration_hours, src_ip_override, count))
+
+    def iter_dns_tunneling(self, start_time: datetime, duration_hours: int, src_ip_override: str = None,
+                           count: Optional[int] = None) -> Iterator[Dict[str, Any]]:
         if not self.dns_config["enabled"]:
-            return []
+            return
             
-        logs = []
         domain_suffix = self.dns_config["domain_suffix"]
         
     
@@ -116,7 +152,7 @@ class AttackSimulator:
         elif self.use_dataset:
             devices = self.loader.get_devices()
             if devices:
-                src_ip = random.choice(devices) 
+                src_ip = self.rng.choice(devices) 
         dns_server = self.config["network"]["dns_servers"][0] # 8.8.8.8
         
    
@@ -124,27 +160,23 @@ class AttackSimulator:
         rate = self.dns_config["query_rate_per_minute"]
         total_queries = total_minutes * rate
         
-        current_time = start_time
-        
-        for i in range(total_queries):
-            current_time += timedelta(seconds=60/rate + random.uniform(-0.1, 0.1))
-            
-            subdomain_len = random.randint(30, 60) # Long subdomain
-            subdomain = ''.join(random.choices(string.ascii_lowercase + string.digits, k=subdomain_len))
+        for current_time in self._spaced_times(start_time, duration_hours, 60/rate, 0.1, total_queries, count):
+            subdomain_len = self.rng.randint(30, 60) # Long subdomain
+            subdomain = ''.join(self.rng.choices(string.ascii_lowercase + string.digits, k=subdomain_len))
             fqdn = f"{subdomain}.{domain_suffix}"
             
             log = {
                 "timestamp": current_time,
                 "srcip": src_ip,
                 "dstip": dns_server,
-                "srcport": random.randint(10000, 65000),
+                "srcport": self.rng.randint(10000, 65000),
                 "dstport": 53,
                 "proto": 17,
                 "service": "DNS",
                 "action": "accept",
                 "policyid": 1,
-                "sentbyte": random.randint(80, 150),
-                "rcvdbyte": random.randint(200, 500),
+                "sentbyte": self.rng.randint(80, 150),
+                "rcvdbyte": self.rng.randint(200, 500),
                 "duration": 0,
                 "user": "bob.smith",
                 "device_type": "Windows PC",
@@ -153,15 +185,17 @@ class AttackSimulator:
                 "qname": fqdn,
                 "alert_name": "DNS Tunneling"
             }
-            logs.append(log)
-            
-        return logs
+            yield log
+
+    def generate_beaconing(self, start_time: datetime, duration_hours: int, src_ip_override: str = None,
+                           count: Optional[int] = None) -> List[Dict[str, Any]]:
+        return list(self.iter_beaconing(start_time, duration_hours, src_ip_override, count))
 
-    def generate_beaconing(self, start_time: datetime, duration_hours: int, src_ip_override: str = None) -> List[Dict[str, Any]]:
+    def iter_beaconing(self, start_time: datetime, duration_hours: int, src_ip_override: str = None,
+                       count: Optional[int] = None) -> Iterator[Dict[str, Any]]:
         if not self.beacon_config["enabled"]:
-            return []
+            return
             
-        logs = []
         c2_ip = self.beacon_config["target_ip"]
         interval = self.beacon_config["interval_seconds"]
         jitter = self.beacon_config["jitter_percent"]
@@ -172,24 +206,15 @@ class AttackSimulator:
         elif self.use_dataset:
              devices = self.loader.get_devices()
              if devices:
-                 src_ip = random.choice(devices)
-        
-        current_time = start_time
-        end_time = start_time + timedelta(hours=duration_hours)
+                 src_ip = self.rng.choice(devices)
         
-        while current_time < end_time:
-            jitter_sec = interval * jitter
-            actual_interval = interval + random.uniform(-jitter_sec, jitter_sec)
-            current_time += timedelta(seconds=actual_interval)
-            
-            if current_time > end_time:
-                break
-                
+        # Without a count, beacons run until the end of the window
+        for current_time in self._spaced_times(start_time, duration_hours, interval, interval * jitter, count=count):
             log = {
                 "timestamp": current_time,
                 "srcip": src_ip,
                 "dstip": c2_ip,
-                "srcport": random.randint(49152, 65535), 
+                "srcport": self.rng.randint(49152, 65535), 
                 "dstport": 443,
                 "proto": 6,
                 "service": "HTTPS",
@@ -197,22 +222,24 @@ class AttackSimulator:
                 "policyid": 1,
                 "sentbyte": 1200,
                 "rcvdbyte": 4500,
-                "duration": random.randint(1, 2),
+                "duration": self.rng.randint(1, 2),
                 "user": "SYSTEM",
                 "device_type": "srv-db-01",
                 "level": "notice",
                 "logid": "0000000013",
                 "alert_name": "C2 Beaconing"
             }
-            logs.append(log)
-            
-        return logs
+            yield log
+
+    def generate_api_abuse(self, start_time: datetime, duration_hours: int, src_ip_override: str = None,
+                           count: Optional[int] = None) -> List[Dict[str, Any]]:
+        return list(self.iter_api_abuse(start_time, duration_hours, src_ip_override, count))
 
-    def generate_api_abuse(self, start_time: datetime, duration_hours: int, src_ip_override: str = None) -> List[Dict[str, Any]]:
+    def iter_api_abuse(self, start_time: datetime, duration_hours: int, src_ip_override: str = None,
+                       count: Optional[int] = None) -> Iterator[Dict[str, Any]]:
         if not self.api_abuse_config.get("enabled", False):
-            return []
+            return
             
-        logs = []
         endpoints = self.api_abuse_config.get("target_endpoints", ["/api/v1/data"])
         rate = self.api_abuse_config.get("requests_per_minute", 20)
         
@@ -224,27 +251,24 @@ class AttackSimulator:
         target_ip = "192.168.1.10" # Internal API Gateway
         
         total_requests = int(duration_hours * 60 * rate)
-        current_time = start_time
         
-        for _ in range(total_requests):
-            current_time += timedelta(seconds=60/rate + random.uniform(-0.5, 0.5))
-            
-            endpoint = random.choice(endpoints)
-            status = random.choices([200, 401, 403, 429], weights=[10, 40, 40, 10], k=1)[0]
+        for current_time in self._spaced_times(start_time, duration_hours, 60/rate, 0.5, total_requests, count):
+            endpoint = self.rng.choice(endpoints)
+            status = self.rng.choices([200, 401, 403, 429], weights=[10, 40, 40, 10], k=1)[0]
             
             log = {
                 "timestamp": current_time,
                 "srcip": src_ip,
                 "dstip": target_ip,
-                "srcport": random.randint(10000, 65000), 
+                "srcport": self.rng.randint(10000, 65000), 
                 "dstport": 443,
                 "proto": 6,
                 "service": "HTTPS",
                 "action": "deny" if status in [401, 403] else "accept",
                 "policyid": 2,
-                "sentbyte": random.randint(200, 500),
-                "rcvdbyte": random.randint(100, 300),
-                "duration": random.randint(0, 1),
+                "sentbyte": self.rng.randint(200, 500),
+                "rcvdbyte": self.rng.randint(100, 300),
+                "duration": self.rng.randint(0, 1),
                 "user": "unknown",
                 "device_type": "firewall",
                 "level": "warning",
@@ -255,15 +279,17 @@ class AttackSimulator:
                 "msg": f"API Abuse Detection: Excessive requests to {endpoint}",
                 "alert_name": "API Abuse"
             }
-            logs.append(log)
-            
-        return logs
+            yield log
+
+    def generate_clickjacking(self, start_time: datetime, duration_hours: int, src_ip_override: str = None,
+                              count: Optional[int] = None) -> List[Dict[str, Any]]:
+        return list(self.iter_clickjacking(start_time, duration_hours, src_ip_override, count))
 
-    def generate_clickjacking(self, start_time: datetime, duration_hours: int, src_ip_override: str = None) -> List[Dict[str, Any]]:
+    def iter_clickjacking(self, start_time: datetime, duration_hours: int, src_ip_override: str = None,
+                          count: Optional[int] = None) -> Iterator[Dict[str, Any]]:
         if not self.clickjacking_config.get("enabled", False):
-            return []
+            return
             
-        logs = []
         target_url = self.clickjacking_config.get("target_url", "http://example.com")
         referers = self.clickjacking_config.get("suspicious_referers", ["http://bad-site.com"])
         
@@ -274,7 +300,7 @@ class AttackSimulator:
         
         if self.use_dataset:
              devices = self.loader.get_devices()
-             src_ip = random.choice(devices) if devices else "192.168.1.50"
+             src_ip = self.rng.choice(devices) if devices else "192.168.1.50"
         else:
              src_ip = "192.168.1.50" # Victim User
              
@@ -283,25 +309,29 @@ class AttackSimulator:
             
         dst_ip = "192.168.1.200" # Internal Web Server
         
-        # A few events
-        count = random.randint(1, 5)
-        current_time = start_time
+        if count is None:
+            # A few events, 1-60 minutes apart
+            times = itertools.accumulate((timedelta(minutes=self.rng.randint(1, 60))
+                                          for _ in range(self.rng.randint(1, 5))), initial=start_time)
+            times = itertools.islice(times, 1, None)
+        else:
+            # The same 30.5 +/- 29.5 minute gaps, stretched over the window
+            times = self._spaced_times(start_time, duration_hours, 30.5 * 60, 29.5 * 60, count=count)
         
-        for _ in range(count):
-            current_time += timedelta(minutes=random.randint(1, 60))
-            ref = random.choice(referers)
+        for current_time in times:
+            ref = self.rng.choice(referers)
             
             log = {
                 "timestamp": current_time,
                 "srcip": src_ip,
                 "dstip": dst_ip,
-                "srcport": random.randint(10000, 65000), 
+                "srcport": self.rng.randint(10000, 65000), 
                 "dstport": 80,
                 "proto": 6,
                 "service": "HTTP",
                 "action": "deny", # Blocked by WAF/X-Frame-Options
                 "policyid": 3,
-                "sentbyte": random.randint(300, 600),
+                "sentbyte": self.rng.randint(300, 600),
                 "rcvdbyte": 0,
                 "duration": 0,
                 "user": "user-victim",
@@ -314,6 +344,4 @@ class AttackSimulator:
                 "msg": f"Clickjacking Attempt Blocked: Referer {ref} not allowed",
                 "alert_name": "Clickjacking"
             }
-            logs.append(log)
-            
-        return logs
+            yield log
@@ -0,0 +1,196 @@
+import socket
+import ipaddress
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Window slice drawn at a time by the streaming (iter_*) variants
+STREAM_CHUNK_SECONDS = 3600
+
+# "user-1" .. "user-50", looked up by index instead of formatted per event
+_USERS = np.array([f"user-{i}" for i in range(51)], dtype=object)
+
+
+def ip_strings(ints: np.ndarray) -> List[str]:
+    """Dotted-quad strings for an array of IPv4 addresses as integers."""
+    packed = ints.astype('>u4').tobytes()
+    ntoa = socket.inet_ntoa
+    return [ntoa(packed[i:i + 4]) for i in range(0, len(packed), 4)]
+
+
+class AddressPool:
+    """
+    Random host addresses from a list of CIDRs, drawn like TrafficGenerator's
+    scalar helpers: a uniformly chosen subnet, then a host offset in [1, size - 1].
+    """
+
+    def __init__(self, cidrs: List[str]):
+        nets = [ipaddress.IPv4Network(cidr) for cidr in cidrs]
+        self.bases = np.array([int(n.network_address) for n in nets], dtype=np.int64)
+        self.sizes = np.array([n.num_addresses for n in nets], dtype=np.int64)
+
+    def draw(self, rng: np.random.Generator, n: int) -> np.ndarray:
+        idx = rng.integers(0, len(self.bases), n)
+        return self.bases[idx] + rng.integers(1, self.sizes[idx])
+
+
+class BaselineBatch:
+    """
+    Columnar baseline events: every field is a NumPy array drawn in one shot.
+    Iterating materializes the per-event dicts (same keys and value types as the
+    scalar generator produced), so they only exist once something consumes them.
+    """
+
+    def __init__(self, start_time: datetime, columns: Dict[str, np.ndarray], services: List[Dict[str, Any]],
+                 device_types: np.ndarray, extra: Dict[str, Any]):
+        self.start_time = start_time
+        self.columns = columns
+        self.services = services
+        self.device_types = device_types
+        self.extra = extra
+
+    def __len__(self):
+        return len(self.columns["offset_us"])
+
+    def timestamps(self) -> List[datetime]:
+        offsets = self.columns["offset_us"].astype('timedelta64[us]')
+        return (np.datetime64(self.start_time, 'us') + offsets).tolist()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        c = self.columns
+        svc = c["service"]
+        names = np.array([s["name"] for s in self.services], dtype=object)[svc].tolist()
+        ports = np.array([s["port"] for s in self.services])[svc].tolist()
+        protos = np.array([s["proto"] for s in self.services])[svc].tolist()
+        extra = self.extra
+        for ts, src, dst, sport, dport, proto, name, sent, rcvd, dur, user, dev in zip(
+                self.timestamps(), ip_strings(c["srcip"]), ip_strings(c["dstip"]),
+                c["srcport"].tolist(), ports, protos, names, c["sentbyte"].tolist(), c["rcvdbyte"].tolist(),
+                c["duration"].tolist(), _USERS[c["user"]].tolist(), self.device_types[c["device"]].tolist()):
+            log = {
+                "timestamp": ts,
+                "srcip": src,
+                "dstip": dst,
+                "srcport": sport,
+                "dstport": dport,
+                "proto": proto,
+                "service": name,
+                "action": "accept",
+                "policyid": 1,
+                "sentbyte": sent,
+                "rcvdbyte": rcvd,
+                "duration": dur,
+                "user": user,
+                "device_type": dev,
+                "level": "notice",
+                "logid": "0000000013",
+            }
+            if extra:
+                log.update(extra)
+            yield log
+
+
+class VectorBaseline:
+    """
+    Vectorized baseline traffic, with the distributions of the original per-event loop:
+    services by their config weights, source/destination IPs from the internal/external
+    CIDRs, src port 10000-65000, sentbyte 100-5000, rcvdbyte 100-50000, duration 1-60s,
+    user-1..user-50 and a uniformly chosen device category.
+    """
+
+    def __init__(self, config: Dict[str, Any], rng: Optional[np.random.Generator] = None):
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.services = config["baseline"]["services"]
+        weights = np.array([s["weight"] for s in self.services], dtype=float)
+        self.service_p = weights / weights.sum()
+        self.internal = AddressPool(config["network"]["internal_cidrs"])
+        self.external = AddressPool(config["network"]["external_cidrs"])
+
+    def _columns(self, offsets_us: np.ndarray, device_count: int) -> Dict[str, np.ndarray]:
+        rng, n = self.rng, len(offsets_us)
+        return {
+            "offset_us": offsets_us,
+            "service": rng.choice(len(self.services), n, p=self.service_p),
+            "srcip": self.internal.draw(rng, n),
+            "dstip": self.external.draw(rng, n),
+            "srcport": rng.integers(10000, 65001, n),
+            "sentbyte": rng.integers(100, 5001, n),
+            "rcvdbyte": rng.integers(100, 50001, n),
+            "duration": rng.integers(1, 61, n),
+            "user": rng.integers(1, 51, n),
+            "device": rng.integers(0, device_count, n),
+        }
+
+    @staticmethod
+    def _device_types(device_categories):
+        return np.array(device_categories or ["workstation"], dtype=object)
+
+    def _batch(self, start_time, offsets_us, devices, extra):
+        return BaselineBatch(start_time, self._columns(offsets_us, len(devices)), self.services, devices, extra)
+
+    def _burst_times(self, window: float, chunk_seconds: float) -> Iterator[np.ndarray]:
+        """
+        Yields the burst times (seconds from the start) of the bulk-mode timeline, one
+        array per chunk_seconds of the window. Times drawn past a chunk's end are
+        carried into the next chunk, so chunking doesn't change the process.
+        """
+        rng = self.rng
+        pending = np.empty(0)
+        last = 0.0
+        chunk_end = 0.0
+        while chunk_end < window:
+            chunk_end = min(chunk_end + chunk_seconds, window)
+            while last <= chunk_end:
+                # Gaps average 1.05s, so this overshoots the chunk by ~5%; loops only in the rare short case
+                drawn = last + np.cumsum(rng.uniform(0.1, 2.0, int(chunk_end - last) + 64))
+                pending = np.concatenate([pending, drawn])
+                last = drawn[-1]
+            cut = np.searchsorted(pending, chunk_end, side='right')
+            yield pending[:cut]
+            pending = pending[cut:]
+
+    def _burst_batch(self, start_time, times, devices):
+        sizes = self.rng.integers(1, 6, len(times))
+        offsets = (np.repeat(times, sizes) * 1e6).astype(np.int64)
+        return self._batch(start_time, offsets, devices, {"src_country": "Reserved", "dst_country": "United States"})
+
+    def bursts(self, start_time: datetime, duration_hours: float, device_categories=None) -> BaselineBatch:
+        """
+        The bulk-mode timeline: bursts of 1-5 events spaced 0.1-2s apart over the whole
+        window, in time order.
+        """
+        window = duration_hours * 3600
+        times = np.concatenate(list(self._burst_times(window, window)) or [np.empty(0)])
+        return self._burst_batch(start_time, times, self._device_types(device_categories))
+
+    def iter_bursts(self, start_time: datetime, duration_hours: float, device_categories=None,
+                    chunk_seconds: float = STREAM_CHUNK_SECONDS) -> Iterator[Dict[str, Any]]:
+        """bursts() as a time-ordered stream, drawn chunk_seconds of the window at a time."""
+        devices = self._device_types(device_categories)
+        for times in self._burst_times(duration_hours * 3600, chunk_seconds):
+            yield from self._burst_batch(start_time, times, devices)
+
+    def uniform(self, start_time: datetime, count: int, duration_hours: float,
+                device_categories=None) -> BaselineBatch:
+        """Granular mode: `count` events at uniformly random times in the window (unsorted)."""
+        offsets = (self.rng.uniform(0, duration_hours * 3600, count) * 1e6).astype(np.int64)
+        return self._batch(start_time, offsets, self._device_types(device_categories), {})
+
+    def iter_uniform(self, start_time: datetime, count: int, duration_hours: float, device_categories=None,
+                     chunk_seconds: float = STREAM_CHUNK_SECONDS) -> Iterator[Dict[str, Any]]:
+        """
+        uniform() as a time-ordered stream: the count is split over the chunks of the
+        window multinomially, then each chunk's times are drawn and sorted on their own.
+        """
+        window = duration_hours * 3600
+        devices = self._device_types(device_categories)
+        if window <= 0:
+            # Empty window: every event lands at start_time, as in uniform()
+            yield from self._batch(start_time, np.zeros(count, dtype=np.int64), devices, {})
+            return
+        edges = np.append(np.arange(0, window, chunk_seconds), window)
+        per_chunk = self.rng.multinomial(count, np.diff(edges) / window)
+        for lo, hi, n in zip(edges, edges[1:], per_chunk):
+            offsets = np.sort((self.rng.uniform(lo, hi, n) * 1e6).astype(np.int64))
+            yield from self._batch(start_time, offsets, devices, {})
@@ -0,0 +1,95 @@
+"""
+Benchmarks baseline traffic generation: the original per-event loop (a dozen
+random.* calls, IPv4Address objects and timedelta arithmetic per log) against the
+NumPy-vectorized VectorBaseline, split into drawing the columns and materializing
+the dicts. Also compares the service mix of both with the config weights.
+
+    python benchmarks/bench_baseline.py --events 1000000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import ipaddress
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from baseline_generator import VectorBaseline
+
+
+def legacy_baseline(config, count, start_time, duration):
+    """The granular baseline branch of TrafficGenerator.run before vectorization."""
+    internal_nets = [ipaddress.IPv4Network(c) for c in config["network"]["internal_cidrs"]]
+    external_nets = [ipaddress.IPv4Network(c) for c in config["network"]["external_cidrs"]]
+
+    def random_ip(nets):
+        subnet = random.choice(nets)
+        return str(ipaddress.IPv4Address(int(subnet.network_address) + random.randint(1, subnet.num_addresses - 1)))
+
+    services = config["baseline"]["services"]
+    weights = [s["weight"] for s in services]
+    logs = []
+    for _ in range(count):
+        svc = random.choices(services, weights=weights, k=1)[0]
+        ts = start_time + timedelta(seconds=random.uniform(0, duration * 3600))
+        logs.append({
+            "timestamp": ts, "srcip": random_ip(internal_nets), "dstip": random_ip(external_nets),
+            "srcport": random.randint(10000, 65000), "dstport": svc["port"], "proto": svc["proto"],
+            "service": svc["name"], "action": "accept", "policyid": 1,
+            "sentbyte": random.randint(100, 5000), "rcvdbyte": random.randint(100, 50000),
+            "duration": random.randint(1, 60), "user": f"user-{random.randint(1, 50)}",
+            "device_type": "workstation", "level": "notice", "logid": "0000000013",
+        })
+    return logs
+
+
+def service_mix(logs):
+    counts = Counter(log["service"] for log in logs)
+    total = sum(counts.values())
+    return {name: counts[name] / total for name in counts}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scalar vs vectorized baseline generation")
+    parser.add_argument("--config", default="config.json")
+    parser.add_argument("--events", type=int, default=1000000)
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    duration = config["simulation"]["duration_hours"]
+    start_time = datetime.now() - timedelta(hours=duration)
+    n = args.events
+
+    start = time.perf_counter()
+    legacy = legacy_baseline(config, n, start_time, duration)
+    legacy_time = time.perf_counter() - start
+
+    vb = VectorBaseline(config)
+    start = time.perf_counter()
+    batch = vb.uniform(start_time, n, duration)
+    draw_time = time.perf_counter() - start
+    vector = list(batch)
+    vector_time = time.perf_counter() - start
+
+    print(f"[*] {n} baseline events")
+    print(f"    per-event random.*      : {legacy_time:7.2f}s  {n / legacy_time:10.0f} events/s")
+    print(f"    NumPy draw only         : {draw_time:7.2f}s  {n / draw_time:10.0f} events/s")
+    print(f"    NumPy draw + dicts      : {vector_time:7.2f}s  {n / vector_time:10.0f} events/s  "
+          f"({legacy_time / vector_time:.1f}x)")
+
+    weights = {s["name"]: s["weight"] for s in config["baseline"]["services"]}
+    total = sum(weights.values())
+    old_mix, new_mix = service_mix(legacy), service_mix(vector)
+    print("[*] Service mix (config / per-event / vectorized)")
+    for name, w in weights.items():
+        print(f"    {name:6s}: {w / total:6.3f} / {old_mix.get(name, 0):6.3f} / {new_mix.get(name, 0):6.3f}")
+
+    start = time.perf_counter()
+    bursts = vb.bursts(start_time, duration)
+    print(f"[*] Bulk-mode timeline ({duration}h): {len(bursts)} events drawn in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
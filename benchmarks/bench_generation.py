@@ -0,0 +1,55 @@
+"""
+Benchmarks a full traffic_generator.py run in list mode against --stream (k-way
+heap merge of the profile streams, incremental writes): wall time and peak RSS
+of each run, executed as a child process in a scratch directory.
+
+    python benchmarks/bench_generation.py --hours 24
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def run(workdir, extra_args):
+    """Returns (seconds, peak RSS in MiB, logs written) of one generator run."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, os.path.join(REPO, "traffic_generator.py"), *extra_args],
+                            cwd=workdir, stdout=subprocess.PIPE, text=True)
+    out = proc.stdout.read()
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    if status:
+        raise SystemExit(f"[!] Generator failed:\n{out}")
+    total = next(line for line in out.splitlines() if "Total logs generated" in line).split()[-1]
+    # ru_maxrss is KiB on Linux
+    return elapsed, usage.ru_maxrss / 1024, int(total)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="List vs streaming generation: time and peak memory")
+    parser.add_argument("--config", default=os.path.join(REPO, "config.json"))
+    parser.add_argument("--hours", type=int, default=24, help="Simulated window")
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    config["simulation"]["duration_hours"] = args.hours
+    config["dataset"]["enabled"] = False
+
+    workdir = tempfile.mkdtemp()
+    try:
+        with open(os.path.join(workdir, "config.json"), "w") as f:
+            json.dump(config, f)
+        print(f"[*] {args.hours}h window")
+        for name, extra in (("lists ", []), ("stream", ["--stream"])):
+            elapsed, rss, total = run(workdir, extra)
+            print(f"    {name}: {total} logs  {elapsed:7.2f}s  {total / elapsed:8.0f} logs/s  peak RSS {rss:7.1f} MiB")
+    finally:
+        shutil.rmtree(workdir)
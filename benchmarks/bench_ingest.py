@@ -0,0 +1,123 @@
+"""
+Benchmarks the per-row ingest path against the batched multi-row INSERT path,
+each with plain and server-side prepared statements.
+
+All runs write into the configured database inside a transaction that is
+rolled back afterwards, so the tables are left untouched. The per-row Python
+cost of building statements (column filtering + SQL text) is measured without
+a database first; --python-only stops there.
+
+    python benchmarks/bench_ingest.py --rows 100000 --batch-size 1000
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ingestor import LogIngestor
+from detection.engine import run_detection_pipeline
+from log_schema import ALLOWED_COLUMNS
+from ingest_writer import BatchLogWriter, PreparedStatements, build_log_insert, log_columns, store_log
+from api.db import get_db_connection
+
+
+def load_workload(file_path, rows):
+    """Normalizes the sample file once and repeats it up to `rows` entries with detections precomputed."""
+    base = LogIngestor().parse_log_file(file_path)
+    if not base:
+        raise SystemExit(f"[!] No logs found in {file_path}")
+    workload = []
+    while len(workload) < rows:
+        for log in base[:rows - len(workload)]:
+            workload.append((log, run_detection_pipeline(log)))
+    return workload
+
+
+# The statement building ingest_direct did per log before the column/SQL caches
+LEGACY_ALLOWED = list(ALLOWED_COLUMNS)
+
+
+def legacy_statement(log):
+    cols = [k for k in log.keys() if k in LEGACY_ALLOWED]
+    placeholders = ", ".join(["%s"] * len(cols))
+    return f"INSERT INTO logs ({', '.join(cols)}) VALUES ({placeholders})", tuple(log.get(c) for c in cols)
+
+
+def cached_statement(log):
+    cols = log_columns(log)
+    return build_log_insert(cols), tuple(log.get(c) for c in cols)
+
+
+def bench_statement_building(workload, fn):
+    start = time.perf_counter()
+    for log, _ in workload:
+        fn(log)
+    return time.perf_counter() - start
+
+
+def bench_per_row(conn, workload, prepared=False):
+    cursor = conn.cursor()
+    statements = PreparedStatements(conn) if prepared else None
+    start = time.perf_counter()
+    for log, detections in workload:
+        store_log(cursor, log, detections, statements=statements)
+    elapsed = time.perf_counter() - start
+    conn.rollback()
+    if statements:
+        statements.close()
+    cursor.close()
+    return elapsed
+
+
+def bench_batched(conn, workload, batch_size, prepared=False):
+    cursor = conn.cursor()
+    statements = PreparedStatements(conn) if prepared else None
+    writer = BatchLogWriter(cursor, batch_size, statements=statements)
+    start = time.perf_counter()
+    for log, detections in workload:
+        writer.add(log, detections)
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    conn.rollback()
+    if statements:
+        statements.close()
+    cursor.close()
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-row vs batched ingest benchmark")
+    parser.add_argument("--file", default="simulated_fortigate_logs.json")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--python-only", action="store_true", help="Skip the database runs")
+    args = parser.parse_args()
+
+    workload = load_workload(args.file, args.rows)
+    n = len(workload)
+
+    legacy = bench_statement_building(workload, legacy_statement)
+    cached = bench_statement_building(workload, cached_statement)
+    print(f"[*] {n} logs, statement building only (no database)")
+    print(f"    list scan + SQL format : {legacy / n * 1e6:8.2f} us/log")
+    print(f"    frozenset + SQL cache  : {cached / n * 1e6:8.2f} us/log  ({legacy / cached:.1f}x)")
+    if args.python_only:
+        raise SystemExit(0)
+
+    conn = get_db_connection()
+    try:
+        results = [
+            ("per-row         ", bench_per_row(conn, workload)),
+            ("per-row prepared", bench_per_row(conn, workload, prepared=True)),
+            ("batched         ", bench_batched(conn, workload, args.batch_size)),
+            ("batched prepared", bench_batched(conn, workload, args.batch_size, prepared=True)),
+        ]
+    finally:
+        conn.close()
+
+    baseline = results[0][1]
+    print(f"[*] {n} logs into the database (batch size {args.batch_size})")
+    for name, elapsed in results:
+        print(f"    {name}: {elapsed:8.2f}s  {n / elapsed:10.0f} logs/s  {baseline / elapsed:5.1f}x")
@@ -0,0 +1,71 @@
+"""
+Benchmarks AuthManager.login latency with a fresh connection per call (the old
+behaviour) against the process-wide connection pool. The user lookup without the
+password hash check is timed as well, since the hash dominates a full login.
+
+Needs the configured database and an existing user (seed_users.py creates admin).
+
+    python benchmarks/bench_login.py --user admin --password admin123 --rounds 50
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from api import db
+from api.db import ConnectionPool, db_cursor
+from auth_manager import AuthManager
+
+
+def lookup(username):
+    with db_cursor(dictionary=True) as cursor:
+        cursor.execute("SELECT * FROM users WHERE username = %s", (username,))
+        return cursor.fetchone()
+
+
+def bench(pool, fn, rounds):
+    """Per-call latencies in ms of fn() with api.db handing out connections from pool."""
+    latencies = []
+    with mock.patch.object(db, "get_pool", return_value=pool):
+        fn()  # warm-up: the pooled run opens its connection here
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn()
+            latencies.append((time.perf_counter() - start) * 1000)
+    pool.close()
+    return latencies
+
+
+def report(name, latencies, baseline=None):
+    p50 = statistics.median(latencies)
+    p95 = sorted(latencies)[int(len(latencies) * 0.95) - 1]
+    speedup = f"  {baseline / p50:5.1f}x" if baseline else ""
+    print(f"    {name}: p50 {p50:8.2f} ms  p95 {p95:8.2f} ms{speedup}")
+    return p50
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login latency with and without connection pooling")
+    parser.add_argument("--user", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    if not AuthManager.login(args.user, args.password):
+        raise SystemExit(f"[!] Login as {args.user} failed, create the user first (seed_users.py)")
+
+    # recycle=0 retires every connection on checkout: a new connection per call
+    unpooled = lambda: ConnectionPool(max_size=1, recycle=0)
+    pooled = lambda: ConnectionPool(max_size=1)
+
+    print(f"[*] User lookup only, {args.rounds} rounds")
+    base = report("new connection", bench(unpooled(), lambda: lookup(args.user), args.rounds))
+    report("pooled        ", bench(pooled(), lambda: lookup(args.user), args.rounds), base)
+
+    print(f"[*] Full login (incl. password hash check), {args.rounds} rounds")
+    base = report("new connection", bench(unpooled(), lambda: AuthManager.login(args.user, args.password), args.rounds))
+    report("pooled        ", bench(pooled(), lambda: AuthManager.login(args.user, args.password), args.rounds), base)
@@ -0,0 +1,63 @@
+"""
+Normalization throughput with the tiered timestamp decoder versus dateutil for
+every record, on generated JSON records (timestamp_iso) and on the same records
+as FortiGate key=value lines (date + time).
+
+    python benchmarks/bench_normalize.py --file simulated_fortigate_logs.json
+"""
+import os
+import sys
+import time
+import argparse
+from dateutil import parser as dateutil_parser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ingestor import LogIngestor, TimestampDecoder
+from fortigate_formatter import FortiLogBuilder
+
+
+class DateutilOnly(TimestampDecoder):
+    """The decoder as it was: dateutil for every value."""
+
+    def parse(self, value):
+        try:
+            return dateutil_parser.parse(value)
+        except Exception:
+            return None
+
+
+def logs_per_sec(ingestor, raw_logs, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for raw in raw_logs:
+            ingestor.normalize_log(raw)
+    return rounds * len(raw_logs) / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="normalize_log timestamp decoding benchmark")
+    parser.add_argument("--file", default="simulated_fortigate_logs.json")
+    parser.add_argument("--logs", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    ingestor = LogIngestor()
+    json_logs = []
+    for raw in ingestor.iter_raw_logs(args.file):
+        json_logs.append(raw)
+        if len(json_logs) >= args.logs:
+            break
+    builder = FortiLogBuilder()
+    kv_logs = [ingestor.parse_kv_line(builder.format_kv_string(raw)) for raw in json_logs]
+
+    for name, raw_logs in (("JSON (timestamp_iso)", json_logs), ("key=value (date time)", kv_logs)):
+        legacy = LogIngestor()
+        legacy.timestamps = DateutilOnly()
+        tiered = LogIngestor()
+        slow = logs_per_sec(legacy, raw_logs, args.rounds)
+        fast = logs_per_sec(tiered, raw_logs, args.rounds)
+        print(f"[*] {name}: {len(raw_logs)} logs x {args.rounds} rounds")
+        print(f"    dateutil only : {slow:10,.0f} logs/s")
+        print(f"    tiered decoder: {fast:10,.0f} logs/s ({fast / slow:.1f}x)")
+        print(f"    tiers used    : {tiered.timestamps.format_counts()}")
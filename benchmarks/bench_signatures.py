@@ -0,0 +1,80 @@
+"""
+Microbenchmark: per-log latency of the combined signature matcher versus the
+original chain of re.search calls. Also checks that both agree on every sample.
+
+    python benchmarks/bench_signatures.py --rounds 20
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from ingestor import LogIngestor
+from pattern_manager import PatternManager
+from detection.signatures import KEYWORD_MATCHER
+
+
+def legacy_chain(content):
+    """The keyword checks as they ran in run_detection_pipeline before the combined matcher."""
+    found = []
+    if re.search(r"select\s+\*", content, re.IGNORECASE) or \
+       re.search(r"drop\s+table", content, re.IGNORECASE) or \
+       re.search(r"union\s+select", content, re.IGNORECASE) or \
+       re.search(r"truncate\s+table", content, re.IGNORECASE) or \
+       re.search(r"delete\s+from", content, re.IGNORECASE):
+        found.append("SQL Injection Attempt")
+    if re.search(r"<script", content, re.IGNORECASE) or \
+       re.search(r"%3Cscript", content, re.IGNORECASE) or \
+       re.search(r"alert\s*\(", content, re.IGNORECASE) or \
+       re.search(r"on\w+\s*=", content, re.IGNORECASE) or \
+       re.search(r"javascript:", content, re.IGNORECASE):
+        found.append("Cross-Site Scripting (XSS)")
+    if re.search(r"\.\.[/|\\]", content) or "/etc/passwd" in content:
+        found.append("Directory Traversal")
+    return found
+
+
+def combined(content):
+    return [a["type"] for a in KEYWORD_MATCHER.alerts(content)]
+
+
+def load_samples(file_path):
+    samples = []
+    for log in LogIngestor().parse_log_file(file_path):
+        samples.append(str(log.get('msg', '')) + " " + str(log.get('raw_log', '')))
+
+    # Attack payloads from the pattern library, wrapped like PatternManager logs
+    pm = PatternManager()
+    for name in pm.get_available_patterns():
+        for payload in pm.load_payloads(name):
+            samples.append(f"Detected {name}: {payload} Pattern Detection: {name} - {payload}")
+    return samples
+
+
+def time_per_log(fn, samples, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for content in samples:
+            fn(content)
+    return (time.perf_counter() - start) / (rounds * len(samples))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Signature matcher microbenchmark")
+    parser.add_argument("--file", default="simulated_fortigate_logs.json")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    samples = load_samples(args.file)
+    mismatches = [c for c in samples if legacy_chain(c) != combined(c)]
+
+    legacy = time_per_log(legacy_chain, samples, args.rounds)
+    fast = time_per_log(combined, samples, args.rounds)
+
+    print(f"[*] {len(samples)} samples x {args.rounds} rounds, {len(mismatches)} mismatches")
+    print(f"    re.search chain : {legacy * 1e6:8.2f} us/log")
+    print(f"    combined matcher: {fast * 1e6:8.2f} us/log")
+    print(f"    speedup         : {legacy / fast:.2f}x")
@@ -0,0 +1,74 @@
+"""
+Throughput of the syslog receiver with a local sender: messages/sec accepted by
+the sockets and messages/sec through parsing + detection (the sink discards).
+
+    python benchmarks/bench_syslog.py --messages 50000 --proto tcp
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from fortigate_formatter import FortiLogBuilder
+from syslog_receiver import SyslogReceiver
+
+
+def build_messages(n):
+    builder = FortiLogBuilder()
+    messages = []
+    for i in range(n):
+        line = builder.format_kv_string({
+            "date": "2026-01-06", "time": "10:44:26", "devname": "FGT-60F", "devid": "FGT60F1234567890",
+            "logid": "0000000013", "type": "traffic", "subtype": "forward", "level": "notice", "vd": "root",
+            "srcip": f"10.0.{i // 250 % 250}.{i % 250}", "srcport": 40000 + i % 20000, "dstip": "10.0.1.1",
+            "dstport": 443, "proto": 6, "service": "HTTPS", "action": "accept", "policyid": 3,
+            "sentbyte": 512, "rcvdbyte": 2048, "duration": 1, "msg": "Connection accepted"})
+        messages.append(b"<189>" + line.encode())
+    return messages
+
+
+def send(messages, proto, port):
+    if proto == "udp":
+        udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        for m in messages:
+            udp.sendto(m, ("127.0.0.1", port))
+        udp.close()
+        return
+    with socket.create_connection(("127.0.0.1", port)) as tcp:
+        tcp.sendall(b"\n".join(messages) + b"\n")
+
+
+async def run(messages, proto, queue_size, batch_size):
+    receiver = SyslogReceiver(lambda results: None, host="127.0.0.1",
+                              udp_port=0 if proto == "udp" else None, tcp_port=0 if proto == "tcp" else None,
+                              batch_size=batch_size, flush_interval=0.1, queue_size=queue_size)
+    await receiver.start()
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    await loop.run_in_executor(None, send, messages, proto, receiver.udp_port or receiver.tcp_port)
+    sent = time.perf_counter() - start
+    # Give the last datagrams time to land before draining
+    await asyncio.sleep(0.2)
+    await receiver.stop()
+    total = time.perf_counter() - start
+    return receiver.stats, sent, total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Syslog receiver throughput")
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--proto", choices=["udp", "tcp"], default="udp")
+    parser.add_argument("--queue-size", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    messages = build_messages(args.messages)
+    stats, sent, total = asyncio.run(run(messages, args.proto, args.queue_size, args.batch_size))
+    print(f"[*] {args.messages} messages over {args.proto}")
+    print(f"    accepted  : {stats['received']} ({stats['received'] / sent:,.0f} msg/s while sending)")
+    print(f"    dropped   : {stats['dropped']} (queue full), {stats['kernel_dropped']} (socket buffer full)")
+    print(f"    processed : {stats['processed']} ({stats['processed'] / total:,.0f} msg/s end to end)")
@@ -0,0 +1,86 @@
+"""
+Benchmarks log output: LogWriter (copies the whole list, an indent=2 JSON array and
+a header pass before the CSV) against LogStreamWriter configurations: the
+LogWriter-compatible files, JSONL plus a CSV against the declared schema, and the
+same gzip-compressed. Reports write time and total output size for each.
+
+    python benchmarks/bench_writers.py --events 1000000
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from baseline_generator import VectorBaseline
+from fortigate_formatter import FortiLogBuilder, LogWriter, LogStreamWriter
+from log_schema import SIMULATED_TRAFFIC_SCHEMA
+
+
+def output_size(workdir):
+    return sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir))
+
+
+def write_batch(entries, builder):
+    writer = LogWriter("out")
+    writer.write_csv(entries)
+    writer.write_json(entries, "out")
+    writer.write_raw(entries, builder)
+
+
+def write_stream(entries, builder, **options):
+    with LogStreamWriter("out", builder, **options) as out:
+        out.write_all(entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LogWriter vs LogStreamWriter output speed and size")
+    parser.add_argument("--config", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'config.json'))
+    parser.add_argument("--events", type=int, default=1000000)
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = json.load(f)
+    builder = FortiLogBuilder()
+    batch = VectorBaseline(config, np.random.default_rng(1)).uniform(datetime(2026, 1, 6), args.events, 24)
+    entries = sorted((builder.build_log_entry(log) for log in batch), key=lambda e: e["timestamp"])
+
+    runs = [
+        ("LogWriter csv+json+log          ", lambda: write_batch(entries, builder)),
+        ("stream csv+json+log (superset)  ", lambda: write_stream(entries, builder)),
+        ("stream csv(schema)+jsonl+log    ", lambda: write_stream(entries, builder, formats=("csv", "jsonl", "log"),
+                                                               csv_schema=SIMULATED_TRAFFIC_SCHEMA)),
+        ("stream csv(look-ahead)+jsonl    ", lambda: write_stream(entries, builder, formats=("csv", "jsonl"),
+                                                               csv_lookahead=10000)),
+        ("stream csv(schema)+jsonl+log gz ", lambda: write_stream(entries, builder, formats=("csv", "jsonl", "log"),
+                                                               csv_schema=SIMULATED_TRAFFIC_SCHEMA,
+                                                               compression="gzip")),
+    ]
+
+    cwd = os.getcwd()
+    print(f"[*] {args.events} logs")
+    for name, write in runs:
+        workdir = tempfile.mkdtemp()
+        os.chdir(workdir)
+        try:
+            start = time.perf_counter()
+            # Silence the writers' own "[-] written to" lines
+            stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+            try:
+                write()
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            elapsed = time.perf_counter() - start
+            print(f"    {name}: {elapsed:7.2f}s  {args.events / elapsed:9.0f} logs/s  "
+                  f"{output_size(workdir) / 2**20:8.1f} MiB")
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(workdir)
@@ -0,0 +1,190 @@
+import os
+import tempfile
+from datetime import datetime
+import mysql.connector
+from ingest_writer import BatchLogWriter, log_columns
+from log_schema import ALLOWED_COLUMNS
+from detection.engine import format_alert_object
+from api.db import dialect
+
+# Logs spooled to TSV before each LOAD DATA + move into logs/alerts
+DEFAULT_SPOOL_ROWS = 1000000
+
+ALERT_STAGE_COLUMNS = ("stage_id", "severity", "detection_type", "src_ip", "device", "timestamp",
+                       "mitre_tactic", "mitre_technique")
+
+ALERTS_STAGING_SQL = """
+CREATE TEMPORARY TABLE IF NOT EXISTS alerts_staging (
+    stage_id INT NOT NULL,
+    severity VARCHAR(20),
+    detection_type VARCHAR(100),
+    src_ip VARCHAR(45),
+    device VARCHAR(100),
+    timestamp DATETIME,
+    mitre_tactic VARCHAR(100),
+    mitre_technique VARCHAR(100)
+)
+"""
+
+LOAD_DATA_SQL = (
+    "LOAD DATA LOCAL INFILE %s INTO TABLE {table} "
+    "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({columns})"
+)
+
+# LOAD DATA LOCAL refused by the server (1148, 3948) or the client library (2068)
+LOCAL_INFILE_ERRNOS = frozenset({1148, 2068, 3948})
+
+_TSV_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+
+
+def tsv_value(value):
+    """Formats a value for LOAD DATA's default escaping (NULL is \\N)."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value).translate(_TSV_ESCAPES)
+
+
+class BulkLoader:
+    """
+    Backfill writer: spools normalized logs and their alerts into TSV files, loads
+    them with LOAD DATA LOCAL INFILE into temporary staging tables and moves them
+    into logs and alerts with one INSERT ... SELECT each.
+
+    Staged logs carry their spool sequence number as id. The move adds the current
+    MAX(logs.id), read with a locking read, so every staged alert reaches its logs.id
+    by the same offset without a per-row round trip. Meant for backfills where this
+    is the only writer; add()/flush() mirror BatchLogWriter.
+
+    Like BatchLogWriter, logs are grouped by column signature (one spool file and
+    LOAD DATA each) and only name the columns they have, so the others get their
+    DEFAULTs instead of NULL.
+    """
+
+    def __init__(self, conn, cursor, spool_rows=DEFAULT_SPOOL_ROWS, tmp_dir=None):
+        self.conn = conn
+        self.cursor = cursor
+        self.spool_rows = max(1, int(spool_rows))
+        self.tmp_dir = tmp_dir
+        self.logs_written = 0
+        self.alerts_written = 0
+
+        self.cursor.execute("SHOW COLUMNS FROM logs")
+        self.columns = tuple(row[0] for row in self.cursor.fetchall() if row[0] in ALLOWED_COLUMNS)
+        # log_columns() signature -> the part of it the logs table has
+        self._spool_columns = {}
+        self.cursor.execute("CREATE TEMPORARY TABLE IF NOT EXISTS logs_staging LIKE logs")
+        self.cursor.execute(ALERTS_STAGING_SQL)
+        self._open_spool()
+
+    def _spool_file(self):
+        return tempfile.NamedTemporaryFile('w', suffix='.tsv', dir=self.tmp_dir, delete=False,
+                                           encoding='utf-8', newline='')
+
+    def _open_spool(self):
+        self._logs_files = {}  # column tuple -> spool file of the logs with that signature
+        self._alerts_file = self._spool_file()
+        self._spooled = 0
+        self._spooled_alerts = 0
+
+    def probe(self):
+        """Loads an empty file, raising mysql.connector.Error if LOAD DATA LOCAL is unavailable."""
+        self._alerts_file.flush()
+        self.cursor.execute(LOAD_DATA_SQL.format(table="alerts_staging", columns="stage_id"),
+                            (self._alerts_file.name,))
+
+    def add(self, log, detections):
+        """Spools a log with its detections. Returns False if it has no insertable columns."""
+        log_cols = log_columns(log)
+        if not log_cols:
+            return False
+        cols = self._spool_columns.get(log_cols)
+        if cols is None:
+            cols = self._spool_columns[log_cols] = tuple(c for c in log_cols if c in self.columns)
+        logs_file = self._logs_files.get(cols)
+        if logs_file is None:
+            logs_file = self._logs_files[cols] = self._spool_file()
+        self._spooled += 1
+        stage_id = self._spooled
+        logs_file.write(str(stage_id) + "\t" + "\t".join(tsv_value(log[c]) for c in cols) + "\n")
+        for d in detections:
+            a = format_alert_object(d, log, stage_id)
+            self._alerts_file.write("\t".join(tsv_value(v) for v in (
+                stage_id, a['severity'], a['detection_type'], a['src_ip'], a['device'], a['timestamp'],
+                a['mitre_tactic'], a['mitre_technique'])) + "\n")
+            self._spooled_alerts += 1
+        if self._spooled >= self.spool_rows:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Loads the current spool and moves it into logs and alerts."""
+        if not self._spooled:
+            return
+        files = [*self._logs_files.values(), self._alerts_file]
+        for f in files:
+            f.close()
+        try:
+            self._load_spool()
+        finally:
+            for f in files:
+                os.unlink(f.name)
+        self.logs_written += self._spooled
+        self.alerts_written += self._spooled_alerts
+        self._open_spool()
+
+    def _load_spool(self):
+        cols = ", ".join(self.columns)
+        self.cursor.execute("DELETE FROM logs_staging")
+        self.cursor.execute("DELETE FROM alerts_staging")
+        # Columns a file doesn't name take logs_staging's (= logs') DEFAULTs
+        for spool_cols, logs_file in self._logs_files.items():
+            self.cursor.execute(LOAD_DATA_SQL.format(table="logs_staging", columns=", ".join(("id",) + spool_cols)),
+                                (logs_file.name,))
+        if self._spooled_alerts:
+            self.cursor.execute(LOAD_DATA_SQL.format(table="alerts_staging", columns=", ".join(ALERT_STAGE_COLUMNS)),
+                                (self._alerts_file.name,))
+
+        # Locking read: holds off other inserts at the end of logs until commit
+        self.cursor.execute("SELECT COALESCE(MAX(id), 0) FROM logs FOR UPDATE")
+        base = int(self.cursor.fetchone()[0])
+        self.cursor.execute(
+            f"INSERT INTO logs (id, {cols}) SELECT id + %s, {cols} FROM logs_staging ORDER BY id", (base,))
+        if self._spooled_alerts:
+            self.cursor.execute(
+                "INSERT INTO alerts (severity, detection_type, src_ip, device, timestamp, raw_log_reference, "
+                "mitre_tactic, mitre_technique) SELECT severity, detection_type, src_ip, device, timestamp, "
+                "stage_id + %s, mitre_tactic, mitre_technique FROM alerts_staging", (base,))
+        print(f"[*] Bulk loaded {self._spooled} logs, {self._spooled_alerts} alerts.")
+
+    def close(self):
+        for f in (*self._logs_files.values(), self._alerts_file):
+            f.close()
+            if os.path.exists(f.name):
+                os.unlink(f.name)
+
+
+def make_bulk_writer(conn, cursor, batch_size=1000, spool_rows=DEFAULT_SPOOL_ROWS):
+    """
+    Returns a BulkLoader, or a BatchLogWriter when the connection can't LOAD DATA LOCAL
+    (SQLite, or local_infile disabled on either side).
+    """
+    if dialect(conn) == "sqlite":
+        # One transaction of multi-row INSERTs is already SQLite's fast path
+        print("[*] Bulk mode needs MySQL, falling back to batched inserts.")
+        return BatchLogWriter(cursor, batch_size)
+
+    loader = BulkLoader(conn, cursor, spool_rows)
+    try:
+        loader.probe()
+    except mysql.connector.Error as e:
+        if e.errno not in LOCAL_INFILE_ERRNOS:
+            loader.close()
+            raise
+        print(f"[!] LOAD DATA LOCAL INFILE unavailable ({e}), falling back to batched inserts.")
+        loader.close()
+        return BatchLogWriter(cursor, batch_size)
+    return loader
@@ -5,6 +5,15 @@ class Config:
     DB_USER = os.environ.get('DB_USER', 'root')
     DB_PASSWORD = os.environ.get('DB_PASSWORD', 'password') # Ensure you set your local MySQL password here
     DB_NAME = os.environ.get('DB_NAME', 'iot_security')
+    # Storage backend: 'mysql', or 'sqlite' for local / embedded use without a server
+    DB_BACKEND = os.environ.get('DB_BACKEND', 'mysql')
+    SQLITE_PATH = os.environ.get('SQLITE_PATH', 'network_logs.db')
+
+    # Connection pool (api/db.py)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+    DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))    # seconds to wait for a free connection
+    DB_POOL_RECYCLE = float(os.environ.get('DB_POOL_RECYCLE', 3600))  # reconnect connections older than this
+    DB_POOL_PING_AFTER = float(os.environ.get('DB_POOL_PING_AFTER', 30))  # ping connections idle longer than this
 
     # Flask Configuration
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-prod')
@@ -8,12 +8,13 @@ import random
 import time
 import subprocess
 import json
-from sqlalchemy import create_engine, text
+from sqlalchemy import text
 
 # Database Connection (Using SQLAlchemy for Pandas compatibility)
-from config import Config
-DB_URL = f"mysql+mysqlconnector://{Config.DB_USER}:{Config.DB_PASSWORD}@{Config.DB_HOST}/{Config.DB_NAME}"
-engine = create_engine(DB_URL)
+from api.db import sqlalchemy_engine
+# Configured backend (MySQL or SQLite); MySQL connections come from the process-wide
+# pool in api/db.py, shared with AuthManager
+engine = sqlalchemy_engine()
 
 def get_db_connection():
     # Helper to return engine for pandas
@@ -394,7 +395,7 @@ if gen_btn:
                 st.error(res.stderr)
             else:
                 st.write("Ingesting logs to database...")
-                ingest = subprocess.run([python_exec, "ingest_logs.py"], capture_output=True, text=True)
+                ingest = subprocess.run([python_exec, "ingest_logs.py", "--batch-size", "1000"], capture_output=True, text=True)
                 if ingest.returncode != 0:
                     status.update(label="Ingestion Failed", state="error")
                     st.error(ingest.stderr)
@@ -1,4 +1,6 @@
+import math
 import statistics
+from collections import OrderedDict
 
 def detect_beaconing(timestamps, tolerance=0.1):
     """
@@ -44,3 +46,87 @@ def detect_beaconing(timestamps, tolerance=0.1):
         }
 
     return None
+
+
+class BeaconTracker:
+    """
+    Online beaconing detector keyed by (src_ip, dst_ip).
+
+    Keeps Welford running statistics of the inter-arrival times of each flow, so
+    memory is O(1) per flow and nothing is re-sorted or recomputed. Flows idle for
+    longer than idle_timeout seconds are aged out. An alert is emitted when a
+    flow's coefficient of variation drops below the tolerance, and again only
+    after it has risen back above it.
+    """
+
+    # Flow state layout: [last_ts, n_intervals, mean, m2, alerted]
+    def __init__(self, tolerance=0.1, min_events=4, idle_timeout=3600, max_flows=1000000):
+        self.tolerance = tolerance
+        self.min_events = min_events
+        self.idle_timeout = idle_timeout
+        self.max_flows = max_flows
+        self.flows = OrderedDict()  # least recently seen first
+        self._newest_ts = None
+
+    def update(self, src_ip, dst_ip, timestamp):
+        """Feeds one event (timestamp as datetime or epoch seconds). Returns an alert dict or None."""
+        ts = timestamp.timestamp() if hasattr(timestamp, 'timestamp') else float(timestamp)
+        key = (src_ip, dst_ip)
+
+        if self._newest_ts is None or ts > self._newest_ts:
+            self._newest_ts = ts
+            self.expire(ts)
+
+        state = self.flows.pop(key, None)
+        if state is None or ts - state[0] > self.idle_timeout:
+            self.flows[key] = [ts, 0, 0.0, 0.0, False]
+            if len(self.flows) > self.max_flows:
+                self.flows.popitem(last=False)
+            return None
+        self.flows[key] = state
+
+        delta = ts - state[0]
+        if delta < 0:
+            # Out-of-order event, keep the newer reference point
+            return None
+        state[0] = ts
+
+        # Welford update of the interval mean / sum of squared deviations
+        state[1] += 1
+        diff = delta - state[2]
+        state[2] += diff / state[1]
+        state[3] += diff * (delta - state[2])
+
+        n, mean, m2 = state[1], state[2], state[3]
+        # The sample variance needs at least 2 intervals, whatever min_events says
+        if n < 2 or n + 1 < self.min_events or mean == 0:
+            return None
+
+        variance = m2 / (n - 1)
+        cv = math.sqrt(variance) / mean
+        if cv >= self.tolerance:
+            state[4] = False
+            return None
+        if state[4]:
+            return None
+
+        state[4] = True
+        return {
+            "type": "Beaconing Detected",
+            "severity": "Low",
+            "average_interval": mean,
+            "variance": variance,
+            "events_count": n + 1,
+            "indicators": f"Fixed-interval traffic {src_ip} -> {dst_ip} every {mean:.1f}s (CV {cv:.3f})",
+            "mitre_tactic": "Command and Control (TA0011)",
+            "mitre_technique": "Application Layer Protocol (T1071)"
+        }
+
+    def expire(self, now):
+        """Drops flows whose last event is older than idle_timeout before `now`."""
+        cutoff = now - self.idle_timeout
+        while self.flows:
+            key, state = next(iter(self.flows.items()))
+            if state[0] >= cutoff:
+                break
+            self.flows.popitem(last=False)
@@ -1,18 +1,57 @@
 import math
-from collections import Counter
+import hashlib
+import numpy as np
+from collections import Counter, OrderedDict, deque
+
+# Names per NumPy histogram block in calculate_entropy_batch (block x 256 counts)
+ENTROPY_BATCH_BLOCK = 4096
 
 def calculate_entropy(string):
     """Calculates the Shannon entropy of a string."""
     if not string:
         return 0
-    prob = [float(string.count(c)) / len(string) for c in dict.fromkeys(list(string))]
+    # One pass to count characters (Counter keeps first-occurrence order, like dict.fromkeys)
+    length = len(string)
+    prob = [float(n) / length for n in Counter(string).values()]
     entropy = - sum([p * math.log(p) / math.log(2.0) for p in prob])
     return entropy
 
-def detect_dns_tunneling(domain, config=None):
+def calculate_entropy_batch(strings):
+    """
+    Vectorized calculate_entropy: returns (entropies, lengths) as float64 / int64
+    arrays for a sequence of strings, using one byte histogram per block of names.
+    Non-ASCII strings (where bytes != characters) go through the scalar version.
+    """
+    n = len(strings)
+    entropies = np.zeros(n, dtype=np.float64)
+    lengths = np.fromiter((len(s) for s in strings), dtype=np.int64, count=n)
+
+    ascii_idx = []
+    for i, s in enumerate(strings):
+        if s.isascii():
+            ascii_idx.append(i)
+        else:
+            entropies[i] = calculate_entropy(s)
+
+    for start in range(0, len(ascii_idx), ENTROPY_BATCH_BLOCK):
+        block = ascii_idx[start:start + ENTROPY_BATCH_BLOCK]
+        encoded = "".join(strings[i] for i in block).encode('ascii')
+        data = np.frombuffer(encoded, dtype=np.uint8)
+        block_len = lengths[block]
+        rows = np.repeat(np.arange(len(block)), block_len)
+        counts = np.bincount(rows * 256 + data, minlength=len(block) * 256).reshape(len(block), 256)
+
+        prob = counts / np.maximum(block_len, 1)[:, None]
+        log_prob = np.log2(prob, where=counts > 0, out=np.zeros_like(prob))
+        entropies[block] = -(prob * log_prob).sum(axis=1)
+
+    return entropies, lengths
+
+def detect_dns_tunneling(domain, config=None, entropy=None):
     """
     Analyzes a domain string for signs of DNS tunneling.
     Returns a dictionary with detection details if suspicious, else None.
+    'entropy' can be passed in when it was already computed by calculate_entropy_batch.
     """
     if config is None:
         config = {"entropy_threshold": 4.5, "max_length": 50}
@@ -33,7 +72,9 @@ def detect_dns_tunneling(domain, config=None):
         details.append(f"High query length ({len(domain)})")
 
     # Check 2: Entropy
-    entropy = calculate_entropy(domain)
+    if entropy is None:
+        entropy = calculate_entropy(domain)
+    entropy = float(entropy)
     if entropy > HIGH_ENTROPY_THRESHOLD:
         details.append(f"High entropy ({entropy:.2f})")
 
@@ -49,6 +90,15 @@ def detect_dns_tunneling(domain, config=None):
     
     return None
 
+def detect_dns_tunneling_batch(domains, config=None):
+    """
+    detect_dns_tunneling over many domains, with entropy computed in one vectorized pass.
+    Returns a list aligned with 'domains' (alert dict or None).
+    """
+    domains = [str(d) if d else "" for d in domains]
+    entropies, _ = calculate_entropy_batch(domains)
+    return [detect_dns_tunneling(d, config, e) for d, e in zip(domains, entropies)]
+
 def analyze_subdomain_volume(logs, threshold=None):
     """
     Checks for excessive unique subdomains for a common parent domain in a batch of logs.
@@ -87,3 +137,153 @@ def analyze_subdomain_volume(logs, threshold=None):
             })
             
     return alerts
+
+
+class HyperLogLog:
+    """
+    Fixed-memory distinct counter: 2**p one-byte registers.
+    Only the register maths lives here; WindowedDistinctCounter keeps the
+    registers and the running sums used for O(1) estimates.
+    """
+
+    def __init__(self, p=8):
+        self.p = p
+        self.m = 1 << p
+        self.alpha = 0.7213 / (1 + 1.079 / self.m)
+        self._rest_bits = 64 - p
+        self._rest_mask = (1 << self._rest_bits) - 1
+
+    def locate(self, value):
+        """Returns (register index, rank) for a string value."""
+        h = int.from_bytes(hashlib.blake2b(value.encode('utf-8', 'replace'), digest_size=8).digest(), 'big')
+        rest = h & self._rest_mask
+        return h >> self._rest_bits, self._rest_bits - rest.bit_length() + 1
+
+    def estimate(self, inverse_sum, zeros):
+        """Cardinality estimate from sum(2**-register) and the number of empty registers."""
+        raw = self.alpha * self.m * self.m / inverse_sum
+        if raw <= 2.5 * self.m and zeros:
+            # Small-range correction (linear counting)
+            return self.m * math.log(self.m / zeros)
+        return raw
+
+
+class WindowedDistinctCounter:
+    """
+    Distinct count over a sliding time window for one key.
+    The window is split into `buckets` sub-windows, each with its own HLL
+    registers; `merged` holds their register-wise max so inserts and estimates
+    are O(1). Registers are only re-merged when a sub-window expires.
+    """
+
+    def __init__(self, hll, window, buckets):
+        self.hll = hll
+        self.bucket_len = window / buckets
+        self.buckets = buckets
+        self.slots = deque()  # (bucket id, registers), oldest first
+        self.merged = bytearray(hll.m)
+        self.inverse_sum = float(hll.m)
+        self.zeros = hll.m
+        self.last_seen = None
+        self.alerted = False
+
+    def add(self, value, ts):
+        self._advance(ts)
+        idx, rank = self.hll.locate(value)
+        registers = self.slots[-1][1]
+        if rank > registers[idx]:
+            registers[idx] = rank
+        old = self.merged[idx]
+        if rank > old:
+            self.merged[idx] = rank
+            self.inverse_sum += 2.0 ** -rank - 2.0 ** -old
+            if old == 0:
+                self.zeros -= 1
+        self.last_seen = ts
+
+    def count(self):
+        return self.hll.estimate(self.inverse_sum, self.zeros)
+
+    def _advance(self, ts):
+        bucket_id = int(ts // self.bucket_len)
+        if self.slots and self.slots[-1][0] >= bucket_id:
+            return
+        self.slots.append((bucket_id, bytearray(self.hll.m)))
+        expired = False
+        while self.slots[0][0] <= bucket_id - self.buckets:
+            self.slots.popleft()
+            expired = True
+        if expired:
+            self._remerge()
+
+    def _remerge(self):
+        merged = bytearray(self.hll.m)
+        for _, registers in self.slots:
+            for i, r in enumerate(registers):
+                if r > merged[i]:
+                    merged[i] = r
+        self.merged = merged
+        self.inverse_sum = sum(2.0 ** -r for r in merged)
+        self.zeros = merged.count(0)
+
+
+class SubdomainVolumeTracker:
+    """
+    Streaming version of analyze_subdomain_volume: unique subdomains per parent
+    domain over a sliding window, in fixed memory per parent. Parents idle for
+    a full window are evicted, and at most max_parents are tracked (LRU).
+    Alerts once when a parent crosses the threshold, re-arming when it falls back.
+    """
+
+    def __init__(self, threshold=10, window=600, buckets=4, precision=8, max_parents=10000):
+        self.threshold = threshold
+        self.window = window
+        self.buckets = buckets
+        self.max_parents = max_parents
+        self.hll = HyperLogLog(precision)
+        self.parents = OrderedDict()  # least recently seen first
+
+    def update(self, domain, timestamp):
+        """Feeds one queried name (timestamp as datetime or epoch seconds). Returns an alert dict or None."""
+        if not domain:
+            return None
+        parts = domain.split('.')
+        if len(parts) <= 2:
+            return None
+        parent = ".".join(parts[-2:])
+        ts = timestamp.timestamp() if hasattr(timestamp, 'timestamp') else float(timestamp)
+
+        self._evict(ts)
+        counter = self.parents.pop(parent, None)
+        if counter is None or counter.bucket_len != self.window / self.buckets:
+            counter = WindowedDistinctCounter(self.hll, self.window, self.buckets)
+        self.parents[parent] = counter
+        if len(self.parents) > self.max_parents:
+            self.parents.popitem(last=False)
+
+        counter.add(domain, ts)
+        count = int(round(counter.count()))
+        if count <= self.threshold:
+            counter.alerted = False
+            return None
+        if counter.alerted:
+            return None
+
+        counter.alerted = True
+        return {
+            "type": "Excessive Unique Subdomains",
+            "severity": "Medium",
+            "domain": parent,
+            "count": count,
+            "indicators": f"~{count} unique subdomains of {parent} in {self.window}s",
+            "mitre_tactic": "Command and Control (TA0011)",
+            "mitre_technique": "Application Layer Protocol: DNS (T1071.004)"
+        }
+
+    def _evict(self, now):
+        cutoff = now - self.window
+        while self.parents:
+            parent, counter = next(iter(self.parents.items()))
+            if counter.last_seen >= cutoff:
+                break
+            self.parents.popitem(last=False)
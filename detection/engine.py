@@ -1,92 +1,180 @@
-from detection.dns import detect_dns_tunneling
-from detection.ssh import detect_ssh_abuse
-# Beaconing usually requires state/multiple logs, so it might be triggered differently 
-# or via a periodic job. For single-log processing, we include stateless checks.
+from detection.dns import detect_dns_tunneling, calculate_entropy_batch, SubdomainVolumeTracker
+from detection.ssh import detect_ssh_abuse, SSHBruteForceTracker
+from detection.signatures import KEYWORD_MATCHER
+from detection.sigma import get_sigma_ruleset
+from detection.beacon import BeaconTracker
+# Beaconing usually requires state/multiple logs, so it runs in StreamingDetector
+# below, which ingestion feeds in log order. run_detection_pipeline stays stateless.
 import json
 import os
+import time
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config.json')
+# How often (seconds) the config file's mtime is re-checked for hot reload
+CONFIG_CHECK_INTERVAL = 1.0
+
+_config_cache = {"rules": {}, "mtime": None, "checked_at": None}
+
+def load_detection_config(force_reload=False):
+    """
+    Returns the 'detection_rules' section of config.json.
+    The parsed rules are cached and only re-read when the file's mtime changes
+    (checked at most every CONFIG_CHECK_INTERVAL seconds) or force_reload is set.
+    """
+    now = time.monotonic()
+    checked_at = _config_cache["checked_at"]
+    if not force_reload and checked_at is not None and now - checked_at < CONFIG_CHECK_INTERVAL:
+        return _config_cache["rules"]
+    _config_cache["checked_at"] = now
 
-def load_detection_config():
-    config_path = os.path.join(os.path.dirname(__file__), '..', 'config.json')
     try:
-        with open(config_path, 'r') as f:
-            return json.load(f).get('detection_rules', {})
-    except:
-        return {}
+        mtime = os.stat(CONFIG_PATH).st_mtime_ns
+    except OSError:
+        return _config_cache["rules"]
+
+    if force_reload or mtime != _config_cache["mtime"]:
+        try:
+            with open(CONFIG_PATH, 'r') as f:
+                rules = json.load(f).get('detection_rules', {})
+        except:
+            # Keep the last good rules (e.g. file caught mid-write); retry on next check
+            return _config_cache["rules"]
+        _config_cache["rules"] = rules
+        _config_cache["mtime"] = mtime
+
+    return _config_cache["rules"]
+
+def reload_detection_config():
+    """Re-reads config.json immediately, regardless of mtime, and returns the fresh rules."""
+    return load_detection_config(force_reload=True)
+
+def is_dns_query(log_entry):
+    """True if the DNS checks apply: UDP (17) or DNS service or Port 53, with a qname."""
+    proto = str(log_entry.get('protocol', '')).lower()
+    svc = str(log_entry.get('service', '')).lower()
+    port = str(log_entry.get('dst_port', ''))
+    return bool((proto == '17' or 'dns' in svc or port == '53') and log_entry.get('qname'))
 
-def run_detection_pipeline(log_entry):
+def is_ssh_session(log_entry):
+    """True if the SSH checks apply: TCP (6) AND (SSH service OR Port 22)."""
+    proto = str(log_entry.get('protocol', '')).lower()
+    svc = str(log_entry.get('service', '')).lower()
+    port = str(log_entry.get('dst_port', ''))
+    return (proto == '6' or proto == 'tcp') and ('ssh' in svc or port == '22')
+
+def is_aggregated_ssh(ssh_alert, log_entry, ssh_cfg):
+    """
+    True if StreamingDetector rolls this per-event SSH hit up into SSH Brute Force
+    instead of it being alerted on its own: ssh.aggregate is on, the hit is an
+    authentication failure and the log has a usable timestamp.
+    """
+    return (ssh_cfg.get('aggregate', False) and "SSH Authentication Failure" in ssh_alert['indicators']
+            and hasattr(log_entry.get('timestamp'), 'timestamp'))
+
+def precompute_dns_entropy(log_entries):
+    """
+    Computes qname entropy for every DNS log of a batch in one vectorized pass.
+    Returns a list aligned with log_entries (entropy or None) for run_detection_pipeline.
+    """
+    dns_idx = [i for i, log in enumerate(log_entries) if is_dns_query(log)]
+    result = [None] * len(log_entries)
+    if dns_idx:
+        entropies, _ = calculate_entropy_batch([str(log_entries[i]['qname']) for i in dns_idx])
+        for i, entropy in zip(dns_idx, entropies):
+            result[i] = entropy
+    return result
+
+def run_detection_pipeline(log_entry, dns_entropy=None):
     """
     Runs all applicable stateless detection rules on a single normalized log entry.
+    dns_entropy: qname entropy precomputed by precompute_dns_entropy (batch paths).
     """
     alerts_found = []
 
-    # Load live config
+    # Cached config, hot-reloaded when config.json changes
     config = load_detection_config()
 
     # 1. DNS Detection
-    # Check for UDP (17) or DNS service or Port 53
-    proto = str(log_entry.get('protocol', '')).lower()
-    svc = str(log_entry.get('service', '')).lower()
-    port = str(log_entry.get('dst_port', ''))
-    
-    if (proto == '17' or 'dns' in svc or port == '53') and log_entry.get('qname'):
-        dns_alert = detect_dns_tunneling(log_entry['qname'], config.get('dns', {}))
+    if is_dns_query(log_entry):
+        dns_alert = detect_dns_tunneling(str(log_entry['qname']), config.get('dns', {}), entropy=dns_entropy)
         if dns_alert:
             alerts_found.append(dns_alert)
 
     # 2. SSH Detection
-    # Check for TCP (6) AND (SSH service OR Port 22)
-    if (proto == '6' or proto == 'tcp') and ('ssh' in svc or port == '22'):
-        ssh_alert = detect_ssh_abuse(log_entry, config.get('ssh', {}))
-        if ssh_alert:
+    # With ssh.aggregate, plain authentication failures are rolled up by StreamingDetector
+    # instead; IoT hits (and logs without a usable timestamp) are still alerted per event
+    ssh_cfg = config.get('ssh', {})
+    if is_ssh_session(log_entry):
+        ssh_alert = detect_ssh_abuse(log_entry, ssh_cfg)
+        only_failure = ssh_alert and ssh_alert['indicators'] == ["SSH Authentication Failure"]
+        if ssh_alert and not (only_failure and is_aggregated_ssh(ssh_alert, log_entry, ssh_cfg)):
             alerts_found.append(ssh_alert)
 
     # 3. Generic Keyword Detection (Web / Database / Shell)
-    # Checks 'msg' or 'raw_log' for common attack signatures
-    import re
+    # Checks 'msg' or 'raw_log' for common attack signatures in a single pass
     content = str(log_entry.get('msg', '')) + " " + str(log_entry.get('raw_log', ''))
-    
-    # SQL Injection via Regex (Handles newlines and multiple spaces)
-    # detecting: select *, drop table, union select, truncate table, delete from
-    if re.search(r"select\s+\*", content, re.IGNORECASE) or \
-       re.search(r"drop\s+table", content, re.IGNORECASE) or \
-       re.search(r"union\s+select", content, re.IGNORECASE) or \
-       re.search(r"truncate\s+table", content, re.IGNORECASE) or \
-       re.search(r"delete\s+from", content, re.IGNORECASE):
-        alerts_found.append({
-            "type": "SQL Injection Attempt",
-            "severity": "high",
-            "mitre_tactic": "Initial Access",
-            "mitre_technique": "T1190",
-            "indicators": "Suspicious SQL patterns detected (Regex Match)"
-        })
-        
-    # XSS / Web Injection
-    # detecting: <script>, alert(...), onerror=, onload=, and URL encoded variants (%3Cscript)
-    if re.search(r"<script", content, re.IGNORECASE) or \
-       re.search(r"%3Cscript", content, re.IGNORECASE) or \
-       re.search(r"alert\s*\(", content, re.IGNORECASE) or \
-       re.search(r"on\w+\s*=", content, re.IGNORECASE) or \
-       re.search(r"javascript:", content, re.IGNORECASE):
-        alerts_found.append({
-            "type": "Cross-Site Scripting (XSS)",
-            "severity": "medium",
-            "mitre_tactic": "Initial Access",
-            "mitre_technique": "T1190",
-            "indicators": "XSS payload detected (Regex Match)"
-        })
-        
-    # Path Traversal
-    if re.search(r"\.\.[/|\\]", content) or "/etc/passwd" in content:
-        alerts_found.append({
-            "type": "Directory Traversal",
-            "severity": "high",
-            "mitre_tactic": "Initial Access",
-            "mitre_technique": "T1190",
-            "indicators": "Path traversal sequence detected"
-        })
+    alerts_found.extend(KEYWORD_MATCHER.alerts(content))
+
+    # 4. Sigma rules from pattern/, one automaton scan per log field
+    alerts_found.extend(get_sigma_ruleset().alerts(log_entry))
 
     return alerts_found
 
+class StreamingDetector:
+    """
+    Stateful detections that need to see logs in order (beaconing, DNS subdomain
+    volume, windowed SSH brute force, ...).
+    Must run in a single process, after run_detection_pipeline. Thresholds are
+    re-read from the cached config on every call, so hot reload still applies.
+    """
+
+    def __init__(self):
+        self.beacons = BeaconTracker()
+        self.subdomains = SubdomainVolumeTracker()
+        self.ssh = SSHBruteForceTracker()
+
+    def process(self, log_entry):
+        """Feeds one normalized log through the stateful detectors and returns any alerts."""
+        alerts_found = []
+        config = load_detection_config()
+        timestamp = log_entry.get('timestamp')
+        src_ip = log_entry.get('src_ip')
+        dst_ip = log_entry.get('dst_ip')
+
+        # Beaconing: per-flow inter-arrival regularity
+        beacon_cfg = config.get('beaconing', {})
+        if beacon_cfg.get('enabled', True) and src_ip and dst_ip and hasattr(timestamp, 'timestamp'):
+            self.beacons.tolerance = beacon_cfg.get('cv_threshold', 0.1)
+            self.beacons.min_events = beacon_cfg.get('min_events', 4)
+            self.beacons.idle_timeout = beacon_cfg.get('idle_timeout_seconds', 3600)
+            beacon_alert = self.beacons.update(src_ip, dst_ip, timestamp)
+            if beacon_alert:
+                alerts_found.append(beacon_alert)
+
+        # DNS: unique subdomains per parent domain over a sliding window
+        qname = log_entry.get('qname')
+        if qname and hasattr(timestamp, 'timestamp'):
+            dns_cfg = config.get('dns', {})
+            self.subdomains.threshold = dns_cfg.get('volume_threshold', 10)
+            self.subdomains.window = dns_cfg.get('volume_window_seconds', 600)
+            volume_alert = self.subdomains.update(str(qname), timestamp)
+            if volume_alert:
+                alerts_found.append(volume_alert)
+
+        # SSH: roll authentication failures up into one brute-force alert per flow and window
+        ssh_cfg = config.get('ssh', {})
+        if ssh_cfg.get('aggregate', False) and is_ssh_session(log_entry):
+            ssh_alert = detect_ssh_abuse(log_entry, ssh_cfg)
+            if ssh_alert and is_aggregated_ssh(ssh_alert, log_entry, ssh_cfg):
+                self.ssh.threshold = ssh_cfg.get('attempt_threshold', 10)
+                self.ssh.window = ssh_cfg.get('window_seconds', 60)
+                self.ssh.cooldown = ssh_cfg.get('cooldown_seconds', 300)
+                brute_alert = self.ssh.update(src_ip, dst_ip, timestamp, ssh_alert['indicators'])
+                if brute_alert:
+                    alerts_found.append(brute_alert)
+
+        return alerts_found
+
 def format_alert_object(detection_result, log_entry, log_id):
     """
     Standardizes the output alert object for the database.
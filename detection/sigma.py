@@ -0,0 +1,260 @@
+import os
+import re
+import fnmatch
+import yaml
+from collections import deque
+
+PATTERNS_DIR = os.path.join(os.path.dirname(__file__), '..', 'pattern')
+
+# Sigma field names used in pattern/ -> keys of our normalized logs.
+# Fields that aren't listed are looked up under their own name.
+FIELD_ALIASES = {
+    "request_uri": ["url"],
+    "uri": ["url"],
+    "cs-uri-stem": ["url"],
+    "cs-uri-query": ["url"],
+    "message": ["msg"],
+    "cs-method": ["http_method"],
+    "http.method": ["http_method"],
+    "cs-user-agent": ["user_agent"],
+    "uri_query": ["url"],
+    "network.request": ["url"],
+    "outbound_request": ["url"],
+    "log_message": ["msg"],
+    "dns.lookup": ["qname", "query"],
+    "destination.port": ["dst_port"],
+    "source.ip": ["src_ip"],
+    "destination.ip": ["dst_ip"],
+    "destination_ip": ["dst_ip"],
+}
+
+# A bare 'keywords' list is searched for in the free-text fields
+KEYWORD_FIELDS = ["msg", "raw_log"]
+
+# Conditions we can evaluate: one selection name, or several joined with 'and'
+_SIMPLE_CONDITION = re.compile(r"^\s*\w+(\s+and\s+\w+)*\s*$", re.IGNORECASE)
+
+
+class AhoCorasick:
+    """
+    Multi-pattern substring matcher. Patterns are added with an arbitrary payload
+    and search() returns the payloads of every pattern occurring in the text,
+    in one pass over the text.
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.out = [[]]
+        self.delta = None
+
+    def add(self, pattern, payload):
+        state = 0
+        for ch in pattern:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.out.append([])
+            state = nxt
+        self.out[state].append(payload)
+
+    def build(self):
+        """Computes failure links and flattens them into a full transition table."""
+        fail = [0] * len(self.goto)
+        delta = [None] * len(self.goto)
+        delta[0] = dict(self.goto[0])
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # Inherit every transition of the failure state, then override with our own edges
+            delta[state] = dict(delta[fail[state]])
+            delta[state].update(self.goto[state])
+            self.out[state] = self.out[state] + self.out[fail[state]]
+            for ch, nxt in self.goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                queue.append(nxt)
+        self.delta = delta
+        return self
+
+    def search(self, text):
+        delta = self.delta
+        out = self.out
+        state = 0
+        found = set()
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+def _load_yaml(path):
+    """Loads a rule file, tolerating a stray title line above the YAML body."""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    try:
+        return yaml.safe_load(text)
+    except yaml.YAMLError:
+        lines = text.splitlines()
+        while lines and not re.match(r'^[\w.-]+\s*:', lines[0]):
+            lines.pop(0)
+        return yaml.safe_load("\n".join(lines))
+
+
+def _mitre_from_tags(tags):
+    tactic, technique = None, None
+    for tag in tags or []:
+        tag = str(tag).lower()
+        if not tag.startswith('attack.'):
+            continue
+        name = tag[len('attack.'):]
+        if re.match(r'^t\d{4}', name):
+            technique = technique or name.upper()
+        elif name not in ('iot',):
+            tactic = tactic or name.replace('-', ' ').replace('_', ' ').title()
+    return tactic, technique
+
+
+def _as_list(value):
+    return value if isinstance(value, list) else [value]
+
+
+class SigmaRuleSet:
+    """
+    Compiles Sigma-style rules from the pattern/ tree into field-indexed matchers.
+
+    Every '<field>|contains' list (and '*x*' wildcard values) of every rule goes
+    into one Aho-Corasick automaton per log field, so each field of a log is scanned
+    once no matter how many rules reference it. Rules whose condition is an
+    aggregation (count ... within) or uses not/or are skipped.
+    """
+
+    def __init__(self):
+        self.rules = []          # [{"alert": {...}, "groups": n, "equals": [(keys, values)]}]
+        self.matchers = {}       # log key -> AhoCorasick with (rule_idx, group_idx) payloads
+        self.skipped = 0
+
+    @classmethod
+    def load(cls, patterns_dir=PATTERNS_DIR):
+        ruleset = cls()
+        if os.path.isdir(patterns_dir):
+            for root, _, files in sorted(os.walk(patterns_dir)):
+                for f_name in sorted(files):
+                    if f_name.endswith(('.yaml', '.yml')):
+                        ruleset._add_file(os.path.join(root, f_name))
+        for matcher in ruleset.matchers.values():
+            matcher.build()
+        return ruleset
+
+    def summary(self):
+        return f"Compiled {len(self.rules)} Sigma rules ({self.skipped} skipped)"
+
+    def _add_file(self, path):
+        try:
+            data = _load_yaml(path)
+        except Exception:
+            # Malformed files are counted, PatternManager reports the parse errors
+            self.skipped += 1
+            return
+        if isinstance(data, dict) and isinstance(data.get('rule'), dict):
+            data = data['rule']
+        if not self.add_rule(data):
+            self.skipped += 1
+
+    def add_rule(self, rule):
+        """Compiles one parsed rule. Returns False if it can't be evaluated per log."""
+        if not isinstance(rule, dict) or not isinstance(rule.get('detection'), dict):
+            return False
+
+        detection = rule['detection']
+        condition = detection.get('condition', 'selection')
+        if not isinstance(condition, str) or not _SIMPLE_CONDITION.match(condition):
+            return False
+
+        contains_groups = []   # [(log keys, [patterns])]
+        equals = []            # [(log keys, [values])]
+        for name in re.split(r'\s+and\s+', condition.strip(), flags=re.IGNORECASE):
+            selection = detection.get(name)
+            if name == 'keywords' and isinstance(selection, list):
+                contains_groups.append((KEYWORD_FIELDS, [str(v) for v in selection]))
+                continue
+            if not isinstance(selection, dict):
+                return False
+
+            for key, value in selection.items():
+                field, _, modifier = key.partition('|')
+                log_keys = FIELD_ALIASES.get(field, [field])
+                values = [str(v) for v in _as_list(value)]
+                if modifier == 'contains':
+                    contains_groups.append((log_keys, values))
+                elif modifier:
+                    return False
+                elif all(len(v) > 2 and v.startswith('*') and v.endswith('*') for v in values):
+                    contains_groups.append((log_keys, [v[1:-1] for v in values]))
+                else:
+                    equals.append((log_keys, [v.lower() for v in values]))
+
+        # Need at least one substring group to index the rule by
+        contains_groups = [(keys, [p.lower() for p in pats if p]) for keys, pats in contains_groups]
+        if not contains_groups or any(not pats for _, pats in contains_groups):
+            return False
+
+        rule_idx = len(self.rules)
+        for group_idx, (log_keys, patterns) in enumerate(contains_groups):
+            for log_key in log_keys:
+                matcher = self.matchers.setdefault(log_key, AhoCorasick())
+                for p in patterns:
+                    matcher.add(p, (rule_idx, group_idx))
+
+        tactic, technique = _mitre_from_tags(rule.get('tags'))
+        name = rule.get('name') or rule.get('title') or rule.get('id')
+        self.rules.append({
+            "alert": {
+                "type": str(name),
+                "severity": str(rule.get('severity') or rule.get('level') or 'medium').lower(),
+                "mitre_tactic": tactic,
+                "mitre_technique": technique,
+                "indicators": f"Sigma rule {rule.get('id', name)} matched"
+            },
+            "groups": len(contains_groups),
+            "equals": equals,
+        })
+        return True
+
+    def _equals_match(self, log_entry, equals):
+        for log_keys, values in equals:
+            present = [str(log_entry[k]).lower() for k in log_keys if log_entry.get(k) is not None]
+            if not any(fnmatch.fnmatchcase(p, v) for p in present for v in values):
+                return False
+        return True
+
+    def alerts(self, log_entry):
+        """Returns an alert dict for every compiled rule matching the log."""
+        hits = {}
+        for log_key, matcher in self.matchers.items():
+            value = log_entry.get(log_key)
+            if value is None or value == '':
+                continue
+            for rule_idx, group_idx in matcher.search(str(value).lower()):
+                hits.setdefault(rule_idx, set()).add(group_idx)
+
+        alerts = []
+        for rule_idx in sorted(hits):
+            rule = self.rules[rule_idx]
+            if len(hits[rule_idx]) == rule["groups"] and self._equals_match(log_entry, rule["equals"]):
+                alerts.append(dict(rule["alert"]))
+        return alerts
+
+
+_ruleset = None
+
+def get_sigma_ruleset():
+    """
+    Returns the process-wide rule set, compiling pattern/ on first use. Silent, since
+    every worker process compiles its own: entry points print its summary() once.
+    """
+    global _ruleset
+    if _ruleset is None:
+        _ruleset = SigmaRuleSet.load()
+    return _ruleset
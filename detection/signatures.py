@@ -0,0 +1,101 @@
+import re
+
+# Keyword signatures checked against a log's 'msg' + 'raw_log' content.
+# Each rule becomes one named group in a single combined regex.
+SIGNATURE_RULES = [
+    {
+        # SQL Injection via Regex (Handles newlines and multiple spaces)
+        "alert": {
+            "type": "SQL Injection Attempt",
+            "severity": "high",
+            "mitre_tactic": "Initial Access",
+            "mitre_technique": "T1190",
+            "indicators": "Suspicious SQL patterns detected (Regex Match)"
+        },
+        "patterns": [r"select\s+\*", r"drop\s+table", r"union\s+select", r"truncate\s+table", r"delete\s+from"],
+    },
+    {
+        # XSS / Web Injection, including URL encoded variants (%3Cscript)
+        "alert": {
+            "type": "Cross-Site Scripting (XSS)",
+            "severity": "medium",
+            "mitre_tactic": "Initial Access",
+            "mitre_technique": "T1190",
+            "indicators": "XSS payload detected (Regex Match)"
+        },
+        "patterns": [r"<script", r"%3Cscript", r"alert\s*\(", r"on\w+\s*=", r"javascript:"],
+    },
+    {
+        # Path Traversal (case-sensitive, like a plain substring check)
+        "alert": {
+            "type": "Directory Traversal",
+            "severity": "high",
+            "mitre_tactic": "Initial Access",
+            "mitre_technique": "T1190",
+            "indicators": "Path traversal sequence detected"
+        },
+        "patterns": [r"\.\.[/|\\]", r"(?-i:/etc/passwd)"],
+    },
+]
+
+
+def _leading_char(pattern):
+    """Returns the literal first character of a pattern, or None if it doesn't start with one."""
+    if pattern.startswith("(?-i:"):
+        pattern = pattern[len("(?-i:"):]
+    if not pattern:
+        return None
+    if pattern[0] == "\\":
+        # Escaped punctuation (e.g. \.) is a literal, \w / \d etc. are not
+        return pattern[1] if len(pattern) > 1 and not pattern[1].isalnum() else None
+    return None if pattern[0] in ".^$*+?{}[]|()" else pattern[0]
+
+
+class SignatureMatcher:
+    """
+    Compiles a list of signature rules into one regex and scans content once.
+
+    Every rule is a named group inside a zero-width lookahead, so matches never
+    consume text another rule needs. The alternation reports only the first rule
+    that matches at an offset, so at each hit the later rules are also tried at
+    that offset with their own regex (earlier ones already failed there); one rule
+    can't hide another that starts at the same place.
+    When every pattern starts with a literal, the lookahead is prefixed with a
+    character class of those literals, which lets the regex engine skip ahead
+    to candidate offsets instead of trying every branch at every position.
+    The scan stops as soon as every rule has matched.
+    """
+
+    def __init__(self, rules, flags=re.IGNORECASE):
+        self.rules = rules
+        branches = []
+        leading = set()
+        for i, rule in enumerate(rules):
+            branches.append(f"(?P<r{i}>{'|'.join(rule['patterns'])})")
+            leading.update(_leading_char(p) for p in rule['patterns'])
+
+        combined = "(?=" + "|".join(branches) + ")"
+        if None not in leading:
+            combined = "(?=[" + "".join(re.escape(c) for c in sorted(leading)) + "])" + combined
+        self.regex = re.compile(combined, flags)
+        self.rule_regexes = [re.compile("|".join(rule['patterns']), flags) for rule in rules]
+
+    def match(self, content):
+        """Returns the indexes of the rules that match content, in rule order."""
+        hits = set()
+        for m in self.regex.finditer(content):
+            first = int(m.lastgroup[1:])
+            hits.add(first)
+            for i in range(first + 1, len(self.rules)):
+                if i not in hits and self.rule_regexes[i].match(content, m.start()):
+                    hits.add(i)
+            if len(hits) == len(self.rules):
+                break
+        return sorted(hits)
+
+    def alerts(self, content):
+        """Returns a fresh alert dict for every matching rule."""
+        return [dict(self.rules[i]["alert"]) for i in self.match(content)]
+
+
+KEYWORD_MATCHER = SignatureMatcher(SIGNATURE_RULES)
@@ -1,3 +1,5 @@
+from collections import OrderedDict, deque
+
 def detect_ssh_abuse(log_entry, config=None):
     """
     Analyzes a single log entry for SSH abuse from IoT devices.
@@ -47,3 +49,68 @@ def detect_ssh_abuse(log_entry, config=None):
         }
 
     return None
+
+
+class SSHBruteForceTracker:
+    """
+    Aggregates per-event SSH abuse into one brute-force alert per (src_ip, dst_ip).
+
+    For each flow only the timestamps of the last `threshold` suspicious attempts
+    are kept; when they all fall inside `window` seconds the rate has crossed the
+    threshold and one alert is emitted. Further alerts for the flow are suppressed
+    for `cooldown` seconds. Flows idle past both window and cooldown are dropped.
+    """
+
+    def __init__(self, threshold=10, window=60, cooldown=300, max_flows=100000):
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.max_flows = max_flows
+        self.flows = OrderedDict()  # (src, dst) -> [deque of ts, suppressed_until, suppressed_count]
+
+    def update(self, src_ip, dst_ip, timestamp, indicators=None):
+        """Records one suspicious SSH attempt. Returns an aggregated alert dict or None."""
+        ts = timestamp.timestamp() if hasattr(timestamp, 'timestamp') else float(timestamp)
+        key = (src_ip, dst_ip)
+        self._expire(ts)
+
+        state = self.flows.pop(key, None)
+        if state is None or state[0].maxlen != self.threshold:
+            state = [deque(maxlen=self.threshold), None, 0]
+        self.flows[key] = state
+        if len(self.flows) > self.max_flows:
+            self.flows.popitem(last=False)
+
+        attempts = state[0]
+        attempts.append(ts)
+
+        if state[1] is not None and ts < state[1]:
+            state[2] += 1
+            return None
+        if len(attempts) < self.threshold or ts - attempts[0] > self.window:
+            return None
+
+        state[1] = ts + self.cooldown
+        suppressed, state[2] = state[2], 0
+        span = max(ts - attempts[0], 0.0)
+        details = [f"{len(attempts)} SSH attempts in {span:.0f}s from {src_ip} to {dst_ip}"]
+        if suppressed:
+            details.append(f"{suppressed} attempts suppressed since previous alert")
+        details.extend(indicators or [])
+        return {
+            "type": "SSH Brute Force",
+            "severity": "High",
+            "indicators": details,
+            "src_ip": src_ip,
+            "attempts": len(attempts),
+            "mitre_tactic": "Credential Access (TA0006)",
+            "mitre_technique": "Brute Force (T1110)"
+        }
+
+    def _expire(self, now):
+        cutoff = now - max(self.window, self.cooldown)
+        while self.flows:
+            key, state = next(iter(self.flows.items()))
+            if state[0] and state[0][-1] >= cutoff:
+                break
+            self.flows.popitem(last=False)
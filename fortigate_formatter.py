@@ -1,8 +1,13 @@
+import io
+import os
 import csv
+import gzip
 import json
 import logging
+import tempfile
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, List, Optional, TextIO
+from log_schema import LogSchemaValidationException
 
 class FortiLogBuilder:
     """
@@ -39,40 +44,27 @@ class FortiLogBuilder:
             
         return entry
 
+    # defined order for common fields to look realistic
+    KV_FIELD_ORDER = (
+        "date", "time", "devname", "devid", "logid", "type", "subtype", 
+        "level", "vd", "srcip", "srcport", "dstip", "dstport", "proto", 
+        "service", "action", "policyid", "sentbyte", "rcvdbyte", 
+        "duration", "user", "authuser", "device_type"
+    )
+    _KV_SKIP = frozenset(KV_FIELD_ORDER + ("timestamp",))
+
     def format_kv_string(self, entry: Dict[str, Any]) -> str:
         """
         Converts a dictionary to a FortiGate key=value string.
         """
-        # defined order for common fields to look realistic
-        field_order = [
-            "date", "time", "devname", "devid", "logid", "type", "subtype", 
-            "level", "vd", "srcip", "srcport", "dstip", "dstport", "proto", 
-            "service", "action", "policyid", "sentbyte", "rcvdbyte", 
-            "duration", "user", "authuser", "device_type"
-        ]
-        
-        parts = []
-        
-        # Add ordered fields first
-        for key in field_order:
-            if key in entry:
-                value = entry[key]
-                # Wrap value in quotes if it contains spaces, though FGT doesn't always do this.
-                # Standard FGT practice: values with spaces are quoted.
-                str_val = str(value)
-                if ' ' in str_val:
-                    str_val = f'"{str_val}"'
-                parts.append(f"{key}={str_val}")
-        
-        # Add remaining fields
-        for key, value in entry.items():
-            if key not in field_order and key != "timestamp":
-                str_val = str(value)
-                if ' ' in str_val:
-                    str_val = f'"{str_val}"'
-                parts.append(f"{key}={str_val}")
-                
-        return " ".join(parts)
+        # Ordered fields first, then the remaining ones in entry order
+        pairs = [(key, entry[key]) for key in self.KV_FIELD_ORDER if key in entry]
+        skip = self._KV_SKIP
+        pairs.extend((key, value) for key, value in entry.items() if key not in skip)
+
+        # Wrap value in quotes if it contains spaces, though FGT doesn't always do this.
+        # Standard FGT practice: values with spaces are quoted.
+        return " ".join([f'{key}="{s}"' if ' ' in (s := str(value)) else f"{key}={s}" for key, value in pairs])
 
 class LogWriter:
     """
@@ -83,19 +75,11 @@ class LogWriter:
         # self.json_file = f"{output_base_name}.json" # Requirement: Output in CSV and JSON
         self.kv_file = f"{output_base_name}.log" # Traditional FGT raw format
 
-    def write_csv(self, logs: List[Dict[str, Any]]):
-        if not logs:
-            return
-            
-        # Extract headers from the superset of keys
-        headers = set()
-        for log in logs:
-            headers.update(log.keys())
-        
+    @staticmethod
+    def csv_headers(headers) -> List[str]:
+        """Orders a key superset into CSV columns: standard fields first, then alphabetical."""
         # Remove internal keys
-        if "timestamp" in headers:
-            headers.remove("timestamp")
-            
+        headers = set(headers) - {"timestamp"}
         sorted_headers = sorted(list(headers))
         
         # Ensure standard fields are first
@@ -106,6 +90,17 @@ class LogWriter:
                 final_headers.append(p)
                 sorted_headers.remove(p)
         final_headers.extend(sorted_headers)
+        return final_headers
+
+    def write_csv(self, logs: List[Dict[str, Any]]):
+        if not logs:
+            return
+            
+        # Extract headers from the superset of keys
+        headers = set()
+        for log in logs:
+            headers.update(log.keys())
+        final_headers = self.csv_headers(headers)
 
         with open(self.csv_file, 'w', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=final_headers)
@@ -139,3 +134,210 @@ class LogWriter:
                 line = formatter.format_kv_string(log)
                 f.write(line + "\n")
         print(f"[-] Raw FortiGate logs written to {self.kv_file}")
+
+
+# Optional compression of streamed output: name -> file suffix
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+def open_output(path: str, compression: Optional[str] = None, buffer_size: int = 1 << 20) -> TextIO:
+    """Opens an output file for text writing, optionally gzip or zstd compressed."""
+    if compression is None:
+        return open(path, 'w', newline='', buffering=buffer_size)
+    if compression == "gzip":
+        # Level 6 is gzip's own default: most of level 9's ratio at a fraction of its cost
+        return io.TextIOWrapper(gzip.GzipFile(path, 'wb', compresslevel=6), newline='')
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression needs the 'zstandard' package (pip install zstandard)")
+        raw = open(path, 'wb', buffering=buffer_size)
+        return io.TextIOWrapper(zstandard.ZstdCompressor(level=3).stream_writer(raw), newline='')
+    raise ValueError(f"Unknown compression '{compression}' (expected one of {sorted(COMPRESSION_SUFFIXES)})")
+
+
+class _BufferedOutput:
+    """
+    An output file fed through an in-memory list of strings, written out in one
+    join every FLUSH_LINES lines instead of a write call per line.
+    """
+
+    FLUSH_LINES = 4096
+
+    def __init__(self, path: str, compression: Optional[str] = None):
+        self.path = path + COMPRESSION_SUFFIXES.get(compression, "")
+        self.f = open_output(self.path, compression)
+        self.lines = []
+        self.write = self.lines.append
+
+    def maybe_flush(self):
+        if len(self.lines) >= self.FLUSH_LINES:
+            self.flush()
+
+    def flush(self):
+        self.f.write("".join(self.lines))
+        self.lines.clear()
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+
+class LogStreamWriter:
+    """
+    Incremental counterpart of LogWriter: entries are written as they arrive, so a
+    run never holds more than the current entry (plus the CSV look-ahead, if any).
+
+    formats picks the files, named output_base_name + extension:
+      "log"   - raw FortiGate key=value lines (.log)
+      "json"  - a JSON array in write_json's indent=2 layout (.json)
+      "jsonl" - one compact JSON object per line (.jsonl); the fast, appendable form
+      "csv"   - one row per entry (.csv)
+    compression ("gzip" or "zstd", the latter needing the zstandard package)
+    applies to every file and appends .gz / .zst to its name.
+
+    The CSV columns come from, in order of preference:
+      csv_schema    - a log_schema.LogSchema declaring every field; rows are written
+                      straight out and a field outside it raises LogSchemaValidationException.
+      csv_lookahead - the key superset of the first N entries, held back until the
+                      header is known. Fields first seen later are kept in a trailing
+                      "extra" column as a JSON object.
+      neither       - the exact superset of all entries, as write_csv does. Rows are
+                      spooled to a temporary JSON-lines file and the CSV is written on close().
+    """
+
+    FORMATS = {"log": ".log", "json": ".json", "jsonl": ".jsonl", "csv": ".csv"}
+    BUFFER_SIZE = 1 << 20
+
+    def __init__(self, output_base_name: str, formatter: FortiLogBuilder, formats=("csv", "json", "log"),
+                 compression: Optional[str] = None, csv_schema=None, csv_lookahead: Optional[int] = None):
+        unknown = set(formats) - set(self.FORMATS)
+        if unknown:
+            raise ValueError(f"Unknown output format(s) {sorted(unknown)} (expected some of {list(self.FORMATS)})")
+        if csv_schema is not None and csv_lookahead is not None:
+            raise ValueError("csv_schema and csv_lookahead are mutually exclusive")
+        if compression is not None and compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Unknown compression '{compression}' (expected one of {sorted(COMPRESSION_SUFFIXES)})")
+
+        self.formatter = formatter
+        self.count = 0
+        self.outputs = {fmt: _BufferedOutput(output_base_name + self.FORMATS[fmt], compression)
+                        for fmt in formats if fmt != "csv"}
+        if "json" in self.outputs:
+            self.outputs["json"].write("[")
+
+        self._csv = None
+        self._csv_path = output_base_name + ".csv"
+        self._compression = compression
+        self._columns = None
+        self._lookahead = None
+        self._spool = None
+        if "csv" in formats:
+            if csv_schema is not None:
+                self._open_csv(LogWriter.csv_headers(csv_schema.fields))
+                self._schema = csv_schema
+            elif csv_lookahead is not None:
+                self._lookahead = []
+                self._lookahead_size = csv_lookahead
+            else:
+                self._headers = set()
+                self._spool = tempfile.NamedTemporaryFile('w+', suffix='.jsonl', delete=False,
+                                                          buffering=self.BUFFER_SIZE)
+
+    def _open_csv(self, columns: List[str]):
+        self._csv = _BufferedOutput(self._csv_path, self._compression)
+        self._columns = columns
+        self._column_set = set(columns)
+        # csv.writer only needs a write(); point it at the output's line buffer
+        self._csv_writer = csv.writer(self._csv)
+        self._csv_writer.writerow(columns)
+
+    def _write_csv_row(self, row: Dict[str, Any]):
+        if not self._column_set.issuperset(row):
+            if self._lookahead is None:
+                unknown = sorted(set(row) - self._column_set)
+                raise LogSchemaValidationException(f"Unknown field(s) {unknown} in schema '{self._schema.name}'")
+            row = dict(row)
+            row["extra"] = json.dumps({k: row.pop(k) for k in list(row) if k not in self._column_set})
+        # csv writes None (a missing field) as an empty cell, like DictWriter's restval
+        self._csv_writer.writerow(map(row.get, self._columns))
+
+    def _end_lookahead(self):
+        headers = set()
+        for row in self._lookahead:
+            headers.update(row)
+        self._open_csv(LogWriter.csv_headers(headers) + ["extra"])
+        self._column_set.discard("extra")
+        for row in self._lookahead:
+            self._write_csv_row(row)
+            self._csv.maybe_flush()
+        self._lookahead = []
+
+    def write(self, entry: Dict[str, Any]):
+        outputs = self.outputs
+        if "log" in outputs:
+            outputs["log"].write(self.formatter.format_kv_string(entry) + "\n")
+
+        row = entry.copy()
+        ts = row.pop("timestamp", None)
+        if self._csv is not None:
+            self._write_csv_row(row)
+        elif self._spool is not None:
+            self._headers.update(row)
+            self._spool.write(json.dumps(row) + "\n")
+        elif self._lookahead is not None:
+            self._lookahead.append(row.copy())
+            if len(self._lookahead) >= self._lookahead_size:
+                self._end_lookahead()
+
+        if ts is not None:
+            row["timestamp_iso"] = ts.isoformat()
+        if "jsonl" in outputs:
+            outputs["jsonl"].write(json.dumps(row) + "\n")
+        if "json" in outputs:
+            # Same bytes as json.dump(list, indent=2)
+            outputs["json"].write(("\n  " if not self.count else ",\n  ") +
+                                  json.dumps(row, indent=2).replace("\n", "\n  "))
+        self.count += 1
+        if not self.count % _BufferedOutput.FLUSH_LINES:
+            for out in outputs.values():
+                out.flush()
+            if self._csv is not None:
+                self._csv.flush()
+
+    def write_all(self, entries: Iterable[Dict[str, Any]]) -> int:
+        for entry in entries:
+            self.write(entry)
+        return self.count
+
+    def close(self):
+        if "json" in self.outputs:
+            self.outputs["json"].write("\n]" if self.count else "]")
+        for out in self.outputs.values():
+            out.close()
+        paths = [out.path for out in self.outputs.values()]
+
+        if self._lookahead:
+            self._end_lookahead()
+        if self._spool is not None:
+            try:
+                self._spool.seek(0)
+                if self.count:
+                    self._open_csv(LogWriter.csv_headers(self._headers))
+                    for line in self._spool:
+                        self._write_csv_row(json.loads(line))
+                        self._csv.maybe_flush()
+            finally:
+                self._spool.close()
+                os.unlink(self._spool.name)
+        if self._csv is not None:
+            self._csv.close()
+            paths.insert(0, self._csv.path)
+        print(f"[-] {self.count} logs streamed to {', '.join(paths)}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
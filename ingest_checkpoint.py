@@ -0,0 +1,65 @@
+import os
+import hashlib
+
+# Bytes at the head of a file hashed to recognise it again on resume
+FINGERPRINT_BYTES = 4096
+
+CHECKPOINT_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    file_path VARCHAR(512) PRIMARY KEY,
+    fingerprint CHAR(40) NOT NULL,
+    byte_offset BIGINT NOT NULL,
+    records BIGINT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+)
+"""
+
+CHECKPOINT_SAVE_SQL = (
+    "INSERT INTO ingest_checkpoints (file_path, fingerprint, byte_offset, records) VALUES (%s, %s, %s, %s) "
+    "ON DUPLICATE KEY UPDATE fingerprint = VALUES(fingerprint), byte_offset = VALUES(byte_offset), "
+    "records = VALUES(records)"
+)
+
+
+def file_fingerprint(file_path, length):
+    """SHA-1 of the first `length` bytes (capped at FINGERPRINT_BYTES) of a file."""
+    with open(file_path, 'rb') as f:
+        return hashlib.sha1(f.read(min(length, FINGERPRINT_BYTES))).hexdigest()
+
+
+class CheckpointStore:
+    """
+    Byte-offset watermarks for ingested files, kept in the ingest_checkpoints table.
+
+    A checkpoint is written with the same cursor as the logs it covers, so committing
+    the transaction makes the rows and the watermark durable together. The fingerprint
+    covers the bytes already consumed, which lets a file grow between runs while a
+    regenerated or rotated file under the same name starts over from byte 0.
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.cursor.execute(CHECKPOINT_TABLE_SQL)
+
+    def load(self, file_path):
+        """Returns (byte_offset, records) to resume from, or (0, 0) when the file is new or changed."""
+        path = os.path.abspath(file_path)
+        self.cursor.execute(
+            "SELECT fingerprint, byte_offset, records FROM ingest_checkpoints WHERE file_path = %s", (path,))
+        row = self.cursor.fetchone()
+        if not row:
+            return 0, 0
+
+        fingerprint, offset, records = row[0], int(row[1]), int(row[2])
+        if os.path.getsize(file_path) < offset:
+            print(f"[!] {file_path} is shorter than its checkpoint, starting over.")
+            return 0, 0
+        if file_fingerprint(file_path, offset) != fingerprint:
+            print(f"[!] {file_path} changed since its checkpoint, starting over.")
+            return 0, 0
+        return offset, records
+
+    def save(self, file_path, offset, records):
+        """Records the watermark; becomes durable with the caller's next commit."""
+        self.cursor.execute(CHECKPOINT_SAVE_SQL, (
+            os.path.abspath(file_path), file_fingerprint(file_path, offset), offset, records))
@@ -1,98 +1,361 @@
 import os
 import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from ingestor import LogIngestor
-from detection.engine import run_detection_pipeline, format_alert_object
+from detection.engine import run_detection_pipeline, precompute_dns_entropy, StreamingDetector
+from detection.sigma import get_sigma_ruleset
+from ingest_writer import AlertRollup, BatchLogWriter, PreparedStatements, store_log
+from ingest_checkpoint import CheckpointStore
+from bulk_loader import BulkLoader, make_bulk_writer
+from tailer import FileTailer
 from api.db import get_db_connection
 import mysql.connector # Added for mysql.connector.Error
 
-def ingest_direct(file_path):
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_CHUNK_SIZE = 500
+# Follow mode: max seconds a buffered log waits before commit, and idle poll delay
+DEFAULT_FLUSH_INTERVAL = 0.5
+FOLLOW_POLL_INTERVAL = 0.1
+
+# One ingestor per process (workers build their own on import)
+_ingestor = LogIngestor()
+
+def process_chunk(raw_logs):
+    """
+    Normalizes and runs detection on a chunk of raw logs.
+    Pure CPU work, safe to run in a worker process. Returns [(log, detections), ...]
+    in input order; logs that fail normalization or detection are dropped.
+    """
+    logs = []
+    for raw in raw_logs:
+        log = _ingestor.normalize_log(raw)
+        if not log:
+            print(f"[!] Normalization failed for a log.")
+            continue
+
+        # Pre-process: Restore timestamp from timestamp_iso if needed
+        if 'timestamp' not in log and 'timestamp_iso' in log:
+            log['timestamp'] = log['timestamp_iso']
+        logs.append(log)
+
+    # DNS entropy for the whole chunk in one vectorized pass
+    entropies = precompute_dns_entropy(logs)
+
+    results = []
+    for log, entropy in zip(logs, entropies):
+        try:
+            detections = run_detection_pipeline(log, dns_entropy=entropy)
+        except Exception as e:
+            print(f"[!] Error processing log: {e}")
+            continue
+        results.append((log, detections))
+    return results
+
+def _chunked(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_processed(raw_logs, workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields (log, detections) pairs in input order.
+    With workers > 1, chunks are processed by a process pool. At most 2 chunks per
+    worker are in flight, so memory stays bounded and results come back in order
+    for the single writer (the calling process).
+    """
+    chunks = ((chunk, None) for chunk in _chunked(raw_logs, max(1, chunk_size)))
+    for results, _ in iter_processed_chunks(chunks, workers):
+        yield from results
+
+def iter_processed_chunks(chunks, workers=1):
+    """
+    Takes (raw_logs, tag) pairs and yields (results, tag) in input order, where
+    results is process_chunk(raw_logs). The tag travels with its chunk untouched
+    (the ingest loop uses it for the chunk's end offset).
+    """
+    if workers <= 1:
+        for chunk, tag in chunks:
+            yield process_chunk(chunk), tag
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for chunk, tag in chunks:
+            in_flight.append((pool.submit(_process_chunk_counted, chunk), tag))
+            if len(in_flight) >= workers * 2:
+                future, tag = in_flight.popleft()
+                yield _merge_counts(future.result()), tag
+        while in_flight:
+            future, tag = in_flight.popleft()
+            yield _merge_counts(future.result()), tag
+
+def _process_chunk_counted(raw_logs):
+    """process_chunk() in a worker, also returning the timestamp tier counts of this chunk."""
+    before = dict(_ingestor.timestamps.counts)
+    results = process_chunk(raw_logs)
+    return results, {tier: n - before[tier] for tier, n in _ingestor.timestamps.counts.items()}
+
+def _merge_counts(result):
+    results, counts = result
+    _ingestor.timestamps.merge(counts)
+    return results
+
+def _offset_chunks(raw_with_offsets, size):
+    """Groups (raw, end_offset) pairs into (raws, (end offset of the last raw, len(raws))) chunks."""
+    for chunk in _chunked(raw_with_offsets, size):
+        yield [raw for raw, _ in chunk], (chunk[-1][1], len(chunk))
+
+def _iter_offsets(file_path, start_offset):
+    """ingestor.iter_raw_with_offsets() with the error reporting of iter_parsed()."""
+    try:
+        yield from _ingestor.iter_raw_with_offsets(file_path, start_offset)
+    except json.JSONDecodeError as e:
+        print(f"Error parsing JSON: {e}")
+    except Exception as e:
+        print(f"Error reading file: {e}")
+
+def ingest_direct(file_path, batch_size=0, workers=1, chunk_size=DEFAULT_CHUNK_SIZE, rollup_seconds=0,
+                  checkpoint_every=0, restart=False, prepared=False, bulk=False):
+    """
+    Ingests a JSON log file into the database.
+    batch_size > 0 switches from the per-row path to multi-row INSERTs of that size.
+    workers > 1 moves normalization and detection into a process pool; this
+    process stays the only one talking to the database.
+    rollup_seconds > 0 merges repeated alerts into one alerts row per time bucket.
+    checkpoint_every > 0 commits roughly every that many records together with the
+    file's byte offset, and resumes from the last checkpoint (unless restart).
+    prepared runs the log INSERTs as server-side prepared statements.
+    bulk loads through TSV files and LOAD DATA LOCAL INFILE (bulk_loader.py), falling
+    back to batched inserts where that isn't available.
+    """
     print(f"[*] Starting ingestion for {file_path}")
     if not os.path.exists(file_path):
         print(f"[!] Error: {file_path} not found.")
         return
 
-    ingestor = LogIngestor()
-    normalized_logs = ingestor.parse_log_file(file_path)
-    
-    conn = get_db_connection()
+    conn = get_db_connection(allow_local_infile=True) if bulk else get_db_connection()
     cursor = conn.cursor()
+
+    checkpoints = CheckpointStore(cursor) if checkpoint_every and checkpoint_every > 0 else None
+    start_offset, records = 0, 0
+    if checkpoints and not restart:
+        start_offset, records = checkpoints.load(file_path)
+        if start_offset:
+            print(f"[*] Resuming {file_path} at byte {start_offset} ({records} records already ingested).")
+
+    resumed_records = records
+
+    # Stream the file so memory stays bounded by the write batch, not the file size
+    chunks = _offset_chunks(_iter_offsets(file_path, start_offset), max(1, chunk_size))
     
     processed_count = 0
     alerts_generated = 0
 
-    print(f"[*] Processing {len(normalized_logs)} logs...")
-    if normalized_logs:
-        print(f"DEBUG: First normalized log keys: {list(normalized_logs[0].keys())}")
-        print(f"DEBUG: First normalized log content: {normalized_logs[0]}")
-        
-    for log in normalized_logs:
-        # Pre-process: Restore timestamp from timestamp_iso if needed
-        if 'timestamp' not in log and 'timestamp_iso' in log:
-            log['timestamp'] = log['timestamp_iso']
+    print(f"[*] Processing logs from {file_path} ({workers} worker(s))...")
 
-        try:
-            # 1. Store Normalized Log
-            # Updated to handle Super-Set of 8+ Domains
-            # Prepare SQL
-            # Dynamic Columns for generic insertion
-
-            allowed_cols = [
-                "timestamp", "src_ip", "dst_ip", "src_port", "dst_port", "protocol", "service", "action", 
-                "policyid", "sentbyte", "rcvdbyte", "duration", "user", "device_type", "level", "logid",
-                "qname", "raw_log", "msg", "src_country", "dst_country", "log_type", "host", "direction",
-                "auth_type", "auth_result", "failure_reason", "location", "process_name", "process_id",
-                "parent_process", "command_line", "file_path", "hash", "integrity_level", 
-                "http_method", "url", "status_code", "user_agent", "request_size", "response_size", "session_id",
-                "client_ip", "asset_id", "hostname", "mac_address", "os", "os_version", "role", "criticality", "last_seen",
-                "alert_name", "detection_engine", "action_taken", "confidence", "query", "query_type", "response", "rcode", 
-                "ttl", "resolver", "cloud_provider", "account_id", "api_call", "resource", "region", "result", "ip_address"
-            ]
-            
-            # Filter keys that exist in both log and allowed_cols
-            cols = [k for k in log.keys() if k in allowed_cols]
-            
-            if not cols:
-                print(f"DEBUG: Skipping log with no matching columns: {log}")
+    rollup = AlertRollup(rollup_seconds) if rollup_seconds and rollup_seconds > 0 else None
+    statements = PreparedStatements(conn) if prepared else None
+    if bulk:
+        writer = make_bulk_writer(conn, cursor, batch_size or DEFAULT_BATCH_SIZE)
+    elif batch_size and batch_size > 0:
+        writer = BatchLogWriter(cursor, batch_size, rollup, statements)
+    else:
+        writer = None
+    # Stateful detectors live in the writer process, which sees logs in file order
+    streaming = StreamingDetector()
+    first = True
+    since_checkpoint = 0
+
+    def checkpoint(offset):
+        nonlocal alerts_generated
+        # Buffered rows first, so the watermark never runs ahead of the data
+        if writer:
+            writer.flush()
+        elif rollup:
+            alerts_generated += rollup.flush(cursor)
+        checkpoints.save(file_path, offset, records)
+        conn.commit()
+
+    for results, (end_offset, raw_count) in iter_processed_chunks(chunks, workers):
+        for log, detections in results:
+            if first:
+                print(f"DEBUG: First normalized log keys: {list(log.keys())}")
+                print(f"DEBUG: First normalized log content: {log}")
+                first = False
+
+            try:
+                detections = detections + streaming.process(log)
+
+                if writer:
+                    if not writer.add(log, detections):
+                        print(f"DEBUG: Skipping log with no matching columns: {log}")
+                    continue
+
+                # Per-row path: store normalized log, then its alerts
+                log_id, alert_count = store_log(cursor, log, detections, rollup, statements)
+                if log_id is None:
+                    print(f"DEBUG: Skipping log with no matching columns: {log}")
+                    continue
+                print(f"DEBUG: Executed INSERT for {log.get('log_type')}")
+                alerts_generated += alert_count
+                processed_count += 1
+            except Exception as e:
+                print(f"[!] Error processing log: {e}")
                 continue
 
-            placeholders = ", ".join(["%s"] * len(cols))
-            sql_log = f"INSERT INTO logs ({', '.join(cols)}) VALUES ({placeholders})"
-            
-            # Create values tuple in same order as cols
-            vals = []
-            for c in cols:
-                val = log.get(c)
-                # Ensure empty strings are None for Integers if necessary, or just rely on DB casting
-                vals.append(val)
-                
-            cursor.execute(sql_log, tuple(vals))
-            print(f"DEBUG: Executed INSERT for {log.get('log_type')}")
-            # print(f"DEBUG: SQL: {sql_log}")
-            # print(f"DEBUG: VALS: {vals}")
-            log_id = cursor.lastrowid
-
-            # 2. Detect Anomalies
-            detections = run_detection_pipeline(log)
-            
-            for d in detections:
-                alert_data = format_alert_object(d, log, log_id)
-                # 3. Store Alert
-                sql_alert = "INSERT INTO alerts (severity, detection_type, src_ip, device, timestamp, raw_log_reference, mitre_tactic, mitre_technique) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
-                cursor.execute(sql_alert, (alert_data['severity'], alert_data['detection_type'], alert_data['src_ip'], alert_data['device'], alert_data['timestamp'], log_id, alert_data['mitre_tactic'], alert_data['mitre_technique']))
-                alerts_generated += 1
-            
-            processed_count += 1
-        except Exception as e:
-            print(f"[!] Error processing log: {e}")
-            continue
+        records += raw_count
+        since_checkpoint += raw_count
+        if checkpoints and since_checkpoint >= checkpoint_every:
+            checkpoint(end_offset)
+            since_checkpoint = 0
+
+    if checkpoints and since_checkpoint:
+        checkpoint(end_offset)
+    elif writer:
+        writer.flush()
+    elif rollup:
+        alerts_generated += rollup.flush(cursor)
+
+    if writer:
+        processed_count = writer.logs_written
+        alerts_generated = writer.alerts_written
+    if rollup:
+        print(f"[*] Rolled up {rollup.alerts_seen} alerts into {rollup.bucket_seconds}s buckets.")
     
     conn.commit()
+    if statements:
+        statements.close()
+    if isinstance(writer, BulkLoader):
+        writer.close()
     cursor.close()
     conn.close()
     
+    print(f"[*] Parsed {records - resumed_records} raw logs from JSON.")
+    print(f"[*] Timestamps decoded: {_ingestor.timestamps.format_counts()}")
     print(f"[+] Ingestion complete: {processed_count} logs processed, {alerts_generated} alerts generated.")
 
+def ingest_follow(file_path, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                  rollup_seconds=0, checkpoint=False, restart=False, stop=None, prepared=False):
+    """
+    Tails a growing JSONL or FortiGate key=value file and ingests new lines as they land.
+    Logs are micro-batched: the buffer is written and committed once batch_size logs
+    are pending or the oldest has waited flush_interval seconds, whichever comes first.
+    Runs until interrupted, or until stop() returns True when given.
+    checkpoint records the tail position with every commit so a restart picks up there.
+    """
+    print(f"[*] Following {file_path} (batch {batch_size}, flush every {flush_interval}s). Ctrl+C to stop.")
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    checkpoints = CheckpointStore(cursor) if checkpoint else None
+    start_offset = 0
+    if checkpoints and not restart and os.path.exists(file_path):
+        start_offset, _ = checkpoints.load(file_path)
+        if start_offset:
+            print(f"[*] Resuming {file_path} at byte {start_offset}.")
+
+    tailer = FileTailer(file_path, start_offset)
+    rollup = AlertRollup(rollup_seconds) if rollup_seconds and rollup_seconds > 0 else None
+    statements = PreparedStatements(conn) if prepared else None
+    writer = BatchLogWriter(cursor, max(1, batch_size), rollup, statements)
+    streaming = StreamingDetector()
+
+    records = 0
+    pending = 0
+    oldest_pending = None
+
+    def commit():
+        writer.flush()
+        if checkpoints:
+            checkpoints.save(file_path, tailer.offset, records)
+        conn.commit()
+
+    try:
+        while not (stop and stop()):
+            raw_logs = []
+            for line in tailer.poll():
+                try:
+                    raw = _ingestor.parse_line(line)
+                except ValueError as e:
+                    print(f"[!] Skipping malformed line: {e}")
+                    continue
+                if raw:
+                    raw_logs.append(raw)
+            records += len(raw_logs)
+
+            for log, detections in process_chunk(raw_logs):
+                try:
+                    if writer.add(log, detections + streaming.process(log)):
+                        pending += 1
+                except Exception as e:
+                    print(f"[!] Error processing log: {e}")
+
+            now = time.monotonic()
+            if pending and oldest_pending is None:
+                oldest_pending = now
+            if pending >= batch_size or (pending and now - oldest_pending >= flush_interval):
+                commit()
+                pending, oldest_pending = 0, None
+            elif not raw_logs:
+                time.sleep(FOLLOW_POLL_INTERVAL)
+    except KeyboardInterrupt:
+        print("[*] Stopping follow mode.")
+    finally:
+        try:
+            commit()
+        finally:
+            tailer.close()
+            if statements:
+                statements.close()
+            cursor.close()
+            conn.close()
+
+    print(f"[*] Timestamps decoded: {_ingestor.timestamps.format_counts()}")
+    print(f"[+] Follow mode stopped: {writer.logs_written} logs, {writer.alerts_written} alerts written "
+          f"({tailer.rotations} rotations, {tailer.truncations} truncations).")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest generated logs into the database")
     # Look for the JSON file generated by traffic_generator.py
-    log_file = "simulated_fortigate_logs.json"
-    ingest_direct(log_file)
+    parser.add_argument("--file", default="simulated_fortigate_logs.json", help="Log file to ingest")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help=f"Rows per multi-row INSERT (0 = per-row inserts, e.g. {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes for normalization and detection (1 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Logs handed to a worker per task")
+    parser.add_argument("--rollup-seconds", type=int, default=0,
+                        help="Merge repeated (type, src_ip, device) alerts per time bucket of this size (0 = one row per alert)")
+    parser.add_argument("--checkpoint-every", type=int, default=0,
+                        help="Commit and record the file offset every N records, resuming from it on the next run (0 = single commit; with --follow any N > 0 checkpoints every commit)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore a stored checkpoint and ingest the file from the beginning")
+    parser.add_argument("--follow", action="store_true",
+                        help="Keep running and ingest lines appended to a JSONL or FortiGate key=value file")
+    parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL,
+                        help="Follow mode: max seconds before buffered logs are committed")
+    parser.add_argument("--prepared", action="store_true",
+                        help="Run log INSERTs as server-side prepared statements (one per column signature)")
+    parser.add_argument("--bulk", action="store_true",
+                        help="Backfill via TSV + LOAD DATA LOCAL INFILE into staging tables (MySQL only, no --rollup-seconds)")
+    args = parser.parse_args()
+    if args.bulk and args.rollup_seconds:
+        parser.error("--bulk writes one alert row per detection and can't be combined with --rollup-seconds")
+    print(f"[*] {get_sigma_ruleset().summary()}")
+
+    if args.follow:
+        ingest_follow(args.file, batch_size=args.batch_size or DEFAULT_BATCH_SIZE,
+                      flush_interval=args.flush_interval, rollup_seconds=args.rollup_seconds,
+                      checkpoint=args.checkpoint_every > 0, restart=args.restart, prepared=args.prepared)
+    else:
+        ingest_direct(args.file, batch_size=args.batch_size, workers=args.workers, chunk_size=args.chunk_size,
+                      rollup_seconds=args.rollup_seconds, checkpoint_every=args.checkpoint_every,
+                      restart=args.restart, prepared=args.prepared, bulk=args.bulk)
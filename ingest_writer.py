@@ -0,0 +1,279 @@
+from datetime import datetime
+from collections import OrderedDict
+from detection.engine import format_alert_object
+from log_schema import ALLOWED_COLUMNS
+
+ALERT_INSERT_SQL = (
+    "INSERT INTO alerts (severity, detection_type, src_ip, device, timestamp, raw_log_reference, "
+    "mitre_tactic, mitre_technique) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+)
+
+# Rolled-up alerts: one row per (detection_type, src_ip, device, bucket_start),
+# see the uq_alert_rollup key in schema.sql
+ALERT_ROLLUP_COLUMNS = (
+    "severity", "detection_type", "src_ip", "device", "timestamp", "raw_log_reference",
+    "mitre_tactic", "mitre_technique", "first_seen", "last_seen", "event_count", "bucket_start"
+)
+ALERT_ROLLUP_UPDATE = (
+    " ON DUPLICATE KEY UPDATE first_seen = LEAST(first_seen, VALUES(first_seen)),"
+    " last_seen = GREATEST(last_seen, VALUES(last_seen)),"
+    " event_count = event_count + VALUES(event_count)"
+)
+ALERT_ROLLUP_CHUNK = 500
+
+# MySQL prepared statements take at most 65535 placeholders
+MAX_PREPARED_PARAMS = 65535
+
+# log key tuple -> insertable column tuple; logs of one source share a handful of key layouts
+_columns_by_keys = {}
+# (column tuple, rows) -> INSERT text; the same str object every time, which is what
+# lets a prepared cursor skip re-preparing
+_insert_sql = {}
+
+
+def log_columns(log):
+    """Returns the insertable columns of a normalized log, in key order."""
+    keys = tuple(log)
+    cols = _columns_by_keys.get(keys)
+    if cols is None:
+        cols = _columns_by_keys[keys] = tuple(k for k in keys if k in ALLOWED_COLUMNS)
+    return cols
+
+
+def build_log_insert(cols, rows=1):
+    """Returns the (cached) INSERT INTO logs statement with `rows` value groups."""
+    sql = _insert_sql.get((cols, rows))
+    if sql is None:
+        group = "(" + ", ".join(["%s"] * len(cols)) + ")"
+        sql = _insert_sql[(cols, rows)] = f"INSERT INTO logs ({', '.join(cols)}) VALUES " + ", ".join([group] * rows)
+    return sql
+
+
+class PreparedStatements:
+    """
+    Server-side prepared statements, one per distinct SQL text.
+
+    mysql-connector's prepared cursor holds a single statement and re-prepares
+    whenever it is handed a different SQL string, so each statement gets its own
+    cursor on the shared connection (same transaction). The least recently used
+    cursor is closed once more than max_statements are open.
+    """
+
+    def __init__(self, conn, max_statements=64):
+        self.conn = conn
+        self.max_statements = max_statements
+        self.cursors = OrderedDict()
+
+    def execute(self, sql, params):
+        """Executes sql on its prepared cursor and returns that cursor (for lastrowid)."""
+        cursor = self.cursors.get(sql)
+        if cursor is None:
+            cursor = self.cursors[sql] = self.conn.cursor(prepared=True)
+            if len(self.cursors) > self.max_statements:
+                self.cursors.popitem(last=False)[1].close()
+        else:
+            self.cursors.move_to_end(sql)
+        cursor.execute(sql, params)
+        return cursor
+
+    def close(self):
+        for cursor in self.cursors.values():
+            cursor.close()
+        self.cursors.clear()
+
+
+def alert_row(detection, log, log_id):
+    """Converts a detection result into a parameter tuple for ALERT_INSERT_SQL."""
+    alert_data = format_alert_object(detection, log, log_id)
+    return (
+        alert_data['severity'], alert_data['detection_type'], alert_data['src_ip'], alert_data['device'],
+        alert_data['timestamp'], log_id, alert_data['mitre_tactic'], alert_data['mitre_technique']
+    )
+
+
+def store_log(cursor, log, detections, rollup=None, statements=None):
+    """
+    Per-row path: inserts one log and its alerts (or hands them to `rollup`).
+    With `statements` (PreparedStatements) the log INSERT runs as a prepared statement.
+    Returns (log_id, alerts_written) or (None, 0) if the log has no insertable columns;
+    alerts handed to `rollup` count once its flush() writes them.
+    """
+    cols = log_columns(log)
+    if not cols:
+        return None, 0
+
+    params = tuple(log.get(c) for c in cols)
+    if statements is not None:
+        log_id = statements.execute(build_log_insert(cols), params).lastrowid
+    else:
+        cursor.execute(build_log_insert(cols), params)
+        log_id = cursor.lastrowid
+
+    if rollup is not None:
+        for d in detections:
+            rollup.add(d, log, log_id)
+        return log_id, 0
+    for d in detections:
+        cursor.execute(ALERT_INSERT_SQL, alert_row(d, log, log_id))
+    return log_id, len(detections)
+
+
+class AlertRollup:
+    """
+    Merges alerts with the same (detection_type, src_ip, device) inside a time
+    bucket into one row carrying first_seen, last_seen and event_count.
+    Rows accumulate in memory and are upserted in bulk by flush(), so repeats
+    across batches keep folding into the same alerts row.
+    """
+
+    def __init__(self, bucket_seconds=300):
+        self.bucket_seconds = max(1, int(bucket_seconds))
+        self.pending = {}  # rollup key -> [row values in ALERT_ROLLUP_COLUMNS order]
+        self.alerts_seen = 0
+
+    def _bucket_start(self, ts):
+        if not isinstance(ts, datetime):
+            return ts
+        epoch = ts.timestamp()
+        return datetime.fromtimestamp(epoch - epoch % self.bucket_seconds, ts.tzinfo)
+
+    def add(self, detection, log, log_id):
+        alert_data = format_alert_object(detection, log, log_id)
+        ts = alert_data['timestamp']
+        bucket = self._bucket_start(ts)
+        key = (alert_data['detection_type'], alert_data['src_ip'], alert_data['device'], bucket)
+        self.alerts_seen += 1
+
+        row = self.pending.get(key)
+        if row is None:
+            self.pending[key] = [
+                alert_data['severity'], alert_data['detection_type'], alert_data['src_ip'], alert_data['device'],
+                ts, log_id, alert_data['mitre_tactic'], alert_data['mitre_technique'], ts, ts, 1, bucket
+            ]
+            return
+        # first_seen / last_seen / event_count
+        if ts is not None and (row[8] is None or ts < row[8]):
+            row[8] = ts
+        if ts is not None and (row[9] is None or ts > row[9]):
+            row[9] = ts
+        row[10] += 1
+
+    def flush(self, cursor):
+        """Upserts every pending rollup row. Returns the number of rows sent."""
+        rows = list(self.pending.values())
+        self.pending = {}
+        group = "(" + ", ".join(["%s"] * len(ALERT_ROLLUP_COLUMNS)) + ")"
+        for start in range(0, len(rows), ALERT_ROLLUP_CHUNK):
+            chunk = rows[start:start + ALERT_ROLLUP_CHUNK]
+            sql = (f"INSERT INTO alerts ({', '.join(ALERT_ROLLUP_COLUMNS)}) VALUES "
+                   + ", ".join([group] * len(chunk)) + ALERT_ROLLUP_UPDATE)
+            cursor.execute(sql, [v for row in chunk for v in row])
+        return len(rows)
+
+
+class BatchLogWriter:
+    """
+    Buffers normalized logs and writes them with multi-row INSERTs.
+
+    Logs are grouped by their column set so every group shares one statement.
+    MySQL reports the id of the *first* row of a multi-row INSERT in lastrowid
+    and allocates the rest consecutively (stepping by auto_increment_increment),
+    which is how each buffered log's alerts get linked to the right logs.id.
+    """
+
+    def __init__(self, cursor, batch_size=1000, rollup=None, statements=None):
+        self.cursor = cursor
+        self.batch_size = max(1, int(batch_size))
+        self.rollup = rollup
+        # Optional PreparedStatements for the log INSERTs; alerts stay on the plain cursor
+        self.statements = statements
+        self.pending = {}  # column tuple -> [(values, log, detections), ...]
+        self.logs_written = 0
+        self.alerts_written = 0
+        self._id_step = None
+
+    def add(self, log, detections):
+        """Queues a log with its detections. Returns False if it has no insertable columns."""
+        cols = log_columns(log)
+        if not cols:
+            return False
+
+        group = self.pending.setdefault(cols, [])
+        group.append((tuple(log.get(c) for c in cols), log, detections))
+        if len(group) >= self.batch_size:
+            self._flush_group(cols)
+        return True
+
+    def flush(self):
+        """Writes every pending group."""
+        for cols in list(self.pending.keys()):
+            self._flush_group(cols)
+
+    def _auto_increment_step(self):
+        if self._id_step is None:
+            try:
+                self.cursor.execute("SELECT @@auto_increment_increment")
+                self._id_step = int(self.cursor.fetchone()[0])
+            except Exception:
+                self._id_step = 1
+        return self._id_step
+
+    def _execute(self, sql, params):
+        if self.statements is not None:
+            return self.statements.execute(sql, params)
+        self.cursor.execute(sql, params)
+        return self.cursor
+
+    def _flush_group(self, cols):
+        rows = self.pending.pop(cols, [])
+        if not rows:
+            return
+
+        # Prepared statements (and SQLite) cap the placeholder count, so large groups go in slices
+        per_insert = len(rows)
+        max_params = MAX_PREPARED_PARAMS if self.statements is not None else getattr(self.cursor, "max_params", None)
+        if max_params:
+            per_insert = max(1, max_params // len(cols))
+
+        log_ids = []
+        for start in range(0, len(rows), per_insert):
+            part = rows[start:start + per_insert]
+            try:
+                params = [v for values, _, _ in part for v in values]
+                first_id = self._execute(build_log_insert(cols, len(part)), params).lastrowid
+                step = self._auto_increment_step()
+                log_ids.extend(first_id + i * step for i in range(len(part)))
+            except Exception as e:
+                # A failed multi-row INSERT is rolled back as a whole, so retry row by row
+                # to keep the good logs of this batch.
+                print(f"[!] Batch insert of {len(part)} logs failed ({e}), retrying row by row.")
+                log_ids.extend(self._insert_rows_individually(cols, part))
+
+        alert_rows = []
+        for (_, log, detections), log_id in zip(rows, log_ids):
+            if log_id is None:
+                continue
+            self.logs_written += 1
+            for d in detections:
+                if self.rollup is not None:
+                    self.rollup.add(d, log, log_id)
+                else:
+                    alert_rows.append(alert_row(d, log, log_id))
+
+        if alert_rows:
+            self.cursor.executemany(ALERT_INSERT_SQL, alert_rows)
+            self.alerts_written += len(alert_rows)
+        if self.rollup is not None:
+            # End of batch: fold this batch's alerts into the alerts table
+            self.alerts_written += self.rollup.flush(self.cursor)
+
+    def _insert_rows_individually(self, cols, rows):
+        sql = build_log_insert(cols)
+        log_ids = []
+        for values, _, _ in rows:
+            try:
+                log_ids.append(self._execute(sql, values).lastrowid)
+            except Exception as e:
+                print(f"[!] Error processing log: {e}")
+                log_ids.append(None)
+        return log_ids
@@ -1,42 +1,211 @@
+import re
 import json
+import codecs
 from dateutil import parser
 from datetime import datetime
 
+# Bytes read per chunk when streaming log files
+STREAM_CHUNK_SIZE = 1 << 16
+
+# One FortiGate key=value pair. format_kv_string doesn't escape quotes inside quoted
+# values, so a quoted value runs to the quote followed by the next key or end of line.
+_KV_PAIR = re.compile(r'([\w.-]+)=(?:"(.*?)"(?=\s+[\w.-]+=|\s*$)|(\S*))')
+# Numeric fields of format_kv_string's field_order, restored to int as in the JSON logs
+KV_INT_FIELDS = frozenset({"srcport", "dstport", "proto", "policyid", "sentbyte", "rcvdbyte", "duration"})
+
+# FortiGate date=... time=... joined with a space
+FORTIGATE_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class TimestampDecoder:
+    """
+    Tiered timestamp parsing, cheapest first: datetime.fromisoformat (our writer's
+    timestamp_iso), the fixed FortiGate format, and dateutil only as a fallback.
+    counts records how many values each tier decoded ('failed' = none did).
+    """
+
+    TIERS = ("isoformat", "fortigate", "dateutil", "failed")
+
+    def __init__(self):
+        self.counts = dict.fromkeys(self.TIERS, 0)
+
+    def parse(self, value):
+        """Returns a datetime, or None if no tier could decode value."""
+        try:
+            ts = datetime.fromisoformat(value)
+            self.counts["isoformat"] += 1
+            return ts
+        except (TypeError, ValueError):
+            pass
+        try:
+            ts = datetime.strptime(value, FORTIGATE_TS_FORMAT)
+            self.counts["fortigate"] += 1
+            return ts
+        except (TypeError, ValueError):
+            pass
+        try:
+            ts = parser.parse(value)
+            self.counts["dateutil"] += 1
+            return ts
+        except Exception:
+            self.counts["failed"] += 1
+            return None
+
+    def merge(self, counts):
+        """Adds counts gathered by another decoder (e.g. in a worker process)."""
+        for tier, n in counts.items():
+            self.counts[tier] += n
+
+    def format_counts(self):
+        return ", ".join(f"{tier} {n}" for tier, n in self.counts.items())
+
 class LogIngestor:
     def __init__(self):
-        pass
+        self.timestamps = TimestampDecoder()
 
     def parse_log_file(self, file_path):
         """
         Reads a JSON log file and returns a list of normalized log dictionaries.
+        Prefer iter_normalized() for large files, this materializes the whole file.
         """
-        normalized_logs = []
-        try:
-            with open(file_path, 'r') as f:
-                # Assuming file contains one JSON object per line (JSONL) or a JSON array
-                content = f.read().strip()
-                if content.startswith('['):
-                     raw_logs = json.loads(content)
-                else: 
-                     # Handle JSONL
-                     raw_logs = [json.loads(line) for line in content.splitlines() if line.strip()]
-
-            print(f"[*] Parsed {len(raw_logs)} raw logs from JSON.")
-            for raw in raw_logs:
-                normalized = self.normalize_log(raw)
-                if normalized:
-                    normalized_logs.append(normalized)
-                else:
-                    print(f"[!] Normalization failed for a log.")
-                    
-            return normalized_logs
+        return list(self.iter_normalized(file_path))
 
+    def iter_normalized(self, file_path):
+        """
+        Streams normalized log dictionaries from a JSON array or JSONL file.
+        Only one read chunk plus the current record are held in memory.
+        """
+        for raw in self.iter_parsed(file_path):
+            normalized = self.normalize_log(raw)
+            if normalized:
+                yield normalized
+            else:
+                print(f"[!] Normalization failed for a log.")
+
+    def iter_parsed(self, file_path):
+        """
+        iter_raw_logs() with the error reporting of parse_log_file:
+        decode/read errors end the stream instead of raising.
+        """
+        count = 0
+        try:
+            for raw in self.iter_raw_logs(file_path):
+                count += 1
+                yield raw
         except json.JSONDecodeError as e:
             print(f"Error parsing JSON: {e}")
-            return []
         except Exception as e:
             print(f"Error reading file: {e}")
-            return []
+        print(f"[*] Parsed {count} raw logs from JSON.")
+
+    def iter_raw_logs(self, file_path, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Yields raw log objects one at a time.
+        Handles a top-level JSON array (as written by LogWriter.write_json), JSONL,
+        or FortiGate key=value lines (as written by LogWriter.write_raw).
+        """
+        for raw, _ in self.iter_raw_with_offsets(file_path, chunk_size=chunk_size):
+            yield raw
+
+    def iter_raw_with_offsets(self, file_path, start_offset=0, chunk_size=STREAM_CHUNK_SIZE):
+        """
+        Yields (raw_log, end_offset) pairs, end_offset being the byte offset just past
+        the record. Passing a previous end_offset as start_offset resumes after that record.
+        """
+        with open(file_path, 'rb') as f:
+            head = f.read(chunk_size)
+            stripped = head.lstrip()
+            if stripped.startswith(b'['):
+                offset = start_offset or (len(head) - len(stripped) + 1)
+                f.seek(offset)
+                yield from self._iter_json_array(f, offset, chunk_size)
+                return
+
+            # Handle JSONL / FortiGate key=value, one record per line
+            is_kv = bool(stripped) and not stripped.startswith(b'{')
+            offset = start_offset
+            f.seek(offset)
+            for line in f:
+                offset += len(line)
+                if not line.strip():
+                    continue
+                if is_kv:
+                    raw = self.parse_kv_line(line.decode('utf-8', errors='replace'))
+                    if raw:
+                        yield raw, offset
+                else:
+                    yield json.loads(line), offset
+
+    def _iter_json_array(self, f, offset, chunk_size):
+        """
+        Incrementally decodes the elements of a JSON array, starting at byte `offset`
+        (just past the opening '[' or a previous element), yielding (element, end_offset).
+        """
+        decoder = json.JSONDecoder()
+        utf8 = codecs.getincrementaldecoder('utf-8')()
+        buf, pos = '', 0
+        ascii_buf = True
+        eof = False
+        while True:
+            # Skip separators between elements (ASCII, so one byte per char)
+            start = pos
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            offset += pos - start
+
+            if pos < len(buf):
+                if buf[pos] == ']':
+                    return
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # A bare scalar may be cut at a chunk boundary; only trust it once a delimiter follows
+                    if end < len(buf) or eof or isinstance(obj, (dict, list)):
+                        offset += (end - pos) if ascii_buf else len(buf[pos:end].encode('utf-8'))
+                        yield obj, offset
+                        pos = end
+                        continue
+            elif eof:
+                raise json.JSONDecodeError("Unterminated JSON array", buf, pos)
+
+            more = f.read(chunk_size)
+            eof = not more
+            buf, pos = buf[pos:] + utf8.decode(more, final=eof), 0
+            ascii_buf = buf.isascii()
+
+    def parse_kv_line(self, line):
+        """
+        Parses one FortiGate key=value line (the format of FortiLogBuilder.format_kv_string)
+        into a dict, or None if it has no pairs. The line is kept as raw_log.
+        """
+        if '"' in line:
+            pairs = [(key, quoted.replace('\\"', '"') if '\\' in quoted else quoted) if quoted else (key, bare)
+                     for key, quoted, bare in _KV_PAIR.findall(line)]
+        else:
+            # Nothing quoted, so every whitespace-separated token is one pair
+            pairs = [token.split('=', 1) for token in line.split() if '=' in token]
+        raw = dict(pairs)
+        for key in KV_INT_FIELDS.intersection(raw):
+            if raw[key].isdigit():
+                raw[key] = int(raw[key])
+        if not raw:
+            return None
+        raw['raw_log'] = line.strip()
+        return raw
+
+    def parse_line(self, line):
+        """Decodes one line of a JSONL or FortiGate key=value log. Raises on malformed JSON."""
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        line = line.strip()
+        if not line:
+            return None
+        if line.startswith('{'):
+            return json.loads(line)
+        return self.parse_kv_line(line)
 
     def normalize_log(self, raw_log):
         """
@@ -48,10 +217,7 @@ class LogIngestor:
             if not ts_str:
                 ts_str = f"{raw_log.get('date')} {raw_log.get('time')}"
             
-            try:
-                timestamp = parser.parse(ts_str)
-            except:
-                timestamp = datetime.now()
+            timestamp = self.timestamps.parse(ts_str) or datetime.now()
 
             # Start with raw_log to keep all fields (e.g. log_type, auth_result, process_name)
             normalized = raw_log.copy()
@@ -73,6 +239,7 @@ class LogIngestor:
             if 'dstip' in raw_log and 'dst_ip' not in raw_log: normalized['dst_ip'] = raw_log['dstip']
             if 'srcport' in raw_log and 'src_port' not in raw_log: normalized['src_port'] = raw_log['srcport']
             if 'dstport' in raw_log and 'dst_port' not in raw_log: normalized['dst_port'] = raw_log['dstport']
+            if 'proto' in raw_log and 'protocol' not in raw_log: normalized['protocol'] = raw_log['proto']
             
             # Ensure raw_log string is present
             if 'raw_log' not in normalized or not isinstance(normalized['raw_log'], str):
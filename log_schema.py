@@ -160,5 +160,34 @@ IOT_SCHEMA = LogSchema(
     dependency_rules=[]
 )
 
+# Everything traffic_generator.py writes: firewall traffic plus the fields the
+# baseline and attack profiles add. Declares the CSV columns of streamed runs.
+SIMULATED_TRAFFIC_SCHEMA = LogSchema(
+    name="SimulatedTraffic",
+    fields={
+        **FIREWALL_SCHEMA.fields,
+        "src_country": "str", "dst_country": "str",
+        "alert_name": "str",
+        "qname": "str",
+        "url": "str", "http_method": "str", "status_code": "int"
+    },
+    dependency_rules=FIREWALL_SCHEMA.dependency_rules
+)
+
+# Columns of the `logs` table that ingestion is allowed to populate (used by the
+# writers and the SQLite backend, so kept here, free of their dependencies).
+# Covers the Super-Set of 8+ log domains (see fix_schema_direct.py).
+ALLOWED_COLUMNS = frozenset([
+    "timestamp", "src_ip", "dst_ip", "src_port", "dst_port", "protocol", "service", "action",
+    "policyid", "sentbyte", "rcvdbyte", "duration", "user", "device_type", "level", "logid",
+    "qname", "raw_log", "msg", "src_country", "dst_country", "log_type", "host", "direction",
+    "auth_type", "auth_result", "failure_reason", "location", "process_name", "process_id",
+    "parent_process", "command_line", "file_path", "hash", "integrity_level",
+    "http_method", "url", "status_code", "user_agent", "request_size", "response_size", "session_id",
+    "client_ip", "asset_id", "hostname", "mac_address", "os", "os_version", "role", "criticality", "last_seen",
+    "alert_name", "detection_engine", "action_taken", "confidence", "query", "query_type", "response", "rcode",
+    "ttl", "resolver", "cloud_provider", "account_id", "api_call", "resource", "region", "result", "ip_address"
+])
+
 def validate_entry(entry: Dict[str, Any], schema: LogSchema):
     return schema.validate(entry)
@@ -30,8 +30,13 @@ CREATE TABLE IF NOT EXISTS alerts (
     raw_log_reference INT,
     mitre_tactic VARCHAR(100),
     mitre_technique VARCHAR(100),
+    first_seen DATETIME,
+    last_seen DATETIME,
+    event_count INT DEFAULT 1,
+    bucket_start DATETIME,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    FOREIGN KEY (raw_log_reference) REFERENCES logs(id)
+    FOREIGN KEY (raw_log_reference) REFERENCES logs(id),
+    UNIQUE KEY uq_alert_rollup (detection_type, src_ip, device, bucket_start)
 );
 
 CREATE TABLE IF NOT EXISTS devices (
@@ -52,3 +57,12 @@ CREATE TABLE IF NOT EXISTS users (
     managed_by INT,
     FOREIGN KEY (managed_by) REFERENCES users(id) ON DELETE SET NULL
 );
+
+-- Byte-offset watermarks of checkpointed ingestion (see ingest_checkpoint.py)
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    file_path VARCHAR(512) PRIMARY KEY,
+    fingerprint CHAR(40) NOT NULL,
+    byte_offset BIGINT NOT NULL,
+    records BIGINT NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
@@ -0,0 +1,280 @@
+import os
+import re
+import socket
+import asyncio
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from ingestor import LogIngestor
+from detection.engine import StreamingDetector
+from detection.sigma import get_sigma_ruleset
+from ingest_logs import process_chunk, DEFAULT_BATCH_SIZE, DEFAULT_FLUSH_INTERVAL
+from ingest_writer import AlertRollup, BatchLogWriter
+from api.db import get_db_connection
+
+# 514 needs root, FortiGate can be pointed at any port
+DEFAULT_PORT = 5514
+# Messages buffered between the sockets and the processing task
+DEFAULT_QUEUE_SIZE = 100000
+# Max bytes of one TCP message
+TCP_LINE_LIMIT = 1 << 20
+# Kernel receive buffer requested for the UDP socket (capped by net.core.rmem_max)
+UDP_RCVBUF = 8 << 20
+
+_PRI = re.compile(rb'^\s*<\d{1,3}>')
+_KV_START = re.compile(rb'(?:^|(?<=\s))[A-Za-z_][\w.-]*=')
+
+_ingestor = LogIngestor()
+
+
+def strip_syslog_header(data):
+    """
+    Returns the key=value payload of a syslog message, dropping the <PRI> and any
+    RFC 3164 / RFC 5424 header in front of the first key=value pair.
+    """
+    m = _PRI.match(data)
+    if m:
+        data = data[m.end():]
+    if not data.startswith(b'date='):
+        m = _KV_START.search(data)
+        if not m:
+            return b''
+        data = data[m.start():]
+    return data.strip()
+
+
+def kernel_udp_drops(sock):
+    """
+    Datagrams the kernel dropped for this socket because its receive buffer was full
+    (Linux /proc/net/udp 'drops' column). None where that isn't available.
+    """
+    try:
+        inode = str(os.fstat(sock.fileno()).st_ino)
+        with open('/proc/net/udp') as f:
+            next(f)
+            for line in f:
+                fields = line.split()
+                if fields[9] == inode:
+                    return int(fields[-1])
+    except (OSError, IndexError, ValueError):
+        pass
+    return None
+
+
+class SyslogReceiver:
+    """
+    Receives FortiGate key=value syslog over UDP and TCP and feeds it to the ingest pipeline.
+
+    The socket side only enqueues raw messages. A single consumer task takes them
+    off the queue in micro-batches (batch_size messages or flush_interval seconds)
+    and runs parsing, normalization, detection and the sink in a worker thread,
+    so the event loop keeps draining sockets meanwhile.
+
+    Backpressure: the queue is bounded. TCP readers wait for room, which stalls the
+    sender through TCP flow control; UDP has no way to push back, so datagrams
+    arriving on a full queue are dropped and counted in stats['dropped'].
+    """
+
+    def __init__(self, sink, host='0.0.0.0', udp_port=DEFAULT_PORT, tcp_port=DEFAULT_PORT,
+                 batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        self.sink = sink
+        self.host = host
+        self.udp_port = udp_port
+        self.tcp_port = tcp_port
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.stats = {"received": 0, "dropped": 0, "kernel_dropped": 0, "malformed": 0, "processed": 0, "batches": 0}
+        self.streaming = StreamingDetector()
+        self.queue = None
+        self._udp = None
+        self._udp_drops_base = 0
+        self._tcp = None
+        self._consumer = None
+        # One thread: batches are processed in arrival order by a single DB writer
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def start(self):
+        """Binds the listeners (port None disables one, 0 picks a free port) and starts consuming."""
+        loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        if self.udp_port is not None:
+            self._udp, _ = await loop.create_datagram_endpoint(
+                lambda: _SyslogDatagramProtocol(self), local_addr=(self.host, self.udp_port))
+            self.udp_port = self._udp.get_extra_info('sockname')[1]
+            sock = self._udp.get_extra_info('socket')
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RCVBUF)
+            except OSError:
+                pass
+            self._udp_drops_base = kernel_udp_drops(sock) or 0
+        if self.tcp_port is not None:
+            self._tcp = await asyncio.start_server(self._handle_tcp, self.host, self.tcp_port, limit=TCP_LINE_LIMIT)
+            self.tcp_port = self._tcp.sockets[0].getsockname()[1]
+        self._consumer = asyncio.create_task(self._consume())
+        print(f"[*] Syslog receiver listening on {self.host} (udp {self.udp_port}, tcp {self.tcp_port})")
+
+    async def stop(self):
+        """Closes the listeners, processes whatever is still queued and stops."""
+        if self._udp:
+            self._update_kernel_drops()
+            self._udp.close()
+        if self._tcp:
+            self._tcp.close()
+            await self._tcp.wait_closed()
+        await self.queue.join()
+        self._consumer.cancel()
+        try:
+            await self._consumer
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown(wait=True)
+        print(f"[+] Syslog receiver stopped: {self.format_stats()}")
+
+    def _update_kernel_drops(self):
+        drops = kernel_udp_drops(self._udp.get_extra_info('socket'))
+        if drops is not None:
+            self.stats["kernel_dropped"] = drops - self._udp_drops_base
+
+    def format_stats(self):
+        if self._udp and not self._udp.is_closing():
+            self._update_kernel_drops()
+        return ", ".join(f"{k} {v}" for k, v in self.stats.items())
+
+    def enqueue_nowait(self, data):
+        try:
+            self.queue.put_nowait(data)
+            self.stats["received"] += 1
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+
+    async def _handle_tcp(self, reader, writer):
+        # Supports both TCP framings of RFC 6587: octet counting ("<len> <msg>") and newline-delimited
+        try:
+            while True:
+                first = await reader.read(1)
+                if not first:
+                    break
+                if first.isdigit():
+                    length = int(first + (await reader.readuntil(b' '))[:-1])
+                    data = await reader.readexactly(length)
+                else:
+                    data = first + await reader.readline()
+                if data.strip():
+                    await self.queue.put(data)
+                    self.stats["received"] += 1
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError, ConnectionError) as e:
+            print(f"[!] Dropping syslog TCP connection: {e}")
+        finally:
+            writer.close()
+
+    async def _consume(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await loop.run_in_executor(self._executor, self._process_batch, batch)
+            except Exception as e:
+                print(f"[!] Error processing syslog batch: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _process_batch(self, batch):
+        raw_logs = []
+        for data in batch:
+            raw = _ingestor.parse_kv_line(strip_syslog_header(data).decode('utf-8', errors='replace'))
+            if raw:
+                raw_logs.append(raw)
+            else:
+                self.stats["malformed"] += 1
+
+        results = []
+        for log, detections in process_chunk(raw_logs):
+            try:
+                results.append((log, detections + self.streaming.process(log)))
+            except Exception as e:
+                print(f"[!] Error processing log: {e}")
+        self.sink(results)
+        self.stats["processed"] += len(results)
+        self.stats["batches"] += 1
+
+
+class _SyslogDatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    def datagram_received(self, data, addr):
+        self.receiver.enqueue_nowait(data)
+
+
+class DatabaseSink:
+    """Writes each processed batch with multi-row INSERTs and commits it."""
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, rollup_seconds=0):
+        self.conn = get_db_connection()
+        self.cursor = self.conn.cursor()
+        rollup = AlertRollup(rollup_seconds) if rollup_seconds and rollup_seconds > 0 else None
+        self.writer = BatchLogWriter(self.cursor, batch_size, rollup)
+
+    def __call__(self, results):
+        for log, detections in results:
+            self.writer.add(log, detections)
+        self.writer.flush()
+        self.conn.commit()
+
+    def close(self):
+        self.cursor.close()
+        self.conn.close()
+
+
+async def serve(receiver, stats_interval=10):
+    await receiver.start()
+    try:
+        while True:
+            await asyncio.sleep(stats_interval)
+            print(f"[*] syslog: {receiver.format_stats()}")
+    finally:
+        await receiver.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Receive FortiGate syslog and ingest it into the database")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="UDP and TCP port")
+    parser.add_argument("--no-udp", action="store_true")
+    parser.add_argument("--no-tcp", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--flush-interval", type=float, default=DEFAULT_FLUSH_INTERVAL)
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Messages buffered before UDP drops / TCP backpressure")
+    parser.add_argument("--rollup-seconds", type=int, default=0)
+    args = parser.parse_args()
+    print(f"[*] {get_sigma_ruleset().summary()}")
+
+    sink = DatabaseSink(args.batch_size, args.rollup_seconds)
+    receiver = SyslogReceiver(sink, args.host,
+                              udp_port=None if args.no_udp else args.port,
+                              tcp_port=None if args.no_tcp else args.port,
+                              batch_size=args.batch_size, flush_interval=args.flush_interval,
+                              queue_size=args.queue_size)
+    try:
+        asyncio.run(serve(receiver))
+    except KeyboardInterrupt:
+        print("[*] Stopping syslog receiver.")
+    finally:
+        sink.close()
@@ -0,0 +1,102 @@
+import os
+
+# Bytes read per poll from the followed file
+TAIL_READ_SIZE = 1 << 16
+# Reads per poll() before returning what we have
+POLL_MAX_READS = 16
+
+
+class FileTailer:
+    """
+    Follows a growing line-oriented log file (JSONL or FortiGate key=value), like tail -F.
+
+    poll() returns the complete lines appended since the previous call; a trailing
+    partial line is held back until its newline arrives. Rotation (the path now
+    names a different file) drains the old file before switching to the new one,
+    and truncation (the file shrank below our position) rewinds to the start.
+    `offset` is the byte position just past the last returned line of the
+    current file, usable as a checkpoint watermark.
+    """
+
+    def __init__(self, file_path, start_offset=0, read_size=TAIL_READ_SIZE):
+        self.file_path = file_path
+        self.read_size = read_size
+        self.offset = start_offset
+        self.rotations = 0
+        self.truncations = 0
+        self._f = None
+        self._partial = b''
+
+    def _open(self):
+        try:
+            self._f = open(self.file_path, 'rb')
+        except FileNotFoundError:
+            return False
+        # A resume offset beyond the end means the file was replaced while we were away
+        if os.fstat(self._f.fileno()).st_size < self.offset:
+            self.offset = 0
+        self._f.seek(self.offset)
+        return True
+
+    def _read_available(self, max_reads=None):
+        """
+        Reads up to max_reads chunks (all available data if None).
+        Returns (complete lines, whether the end of the file was reached).
+        """
+        lines = []
+        reads = 0
+        while max_reads is None or reads < max_reads:
+            data = self._f.read(self.read_size)
+            if not data:
+                return lines, True
+            reads += 1
+            data = self._partial + data
+            cut = data.rfind(b'\n') + 1
+            self._partial = data[cut:]
+            if cut:
+                lines.extend(data[:cut].splitlines())
+            self.offset = self._f.tell() - len(self._partial)
+        return lines, False
+
+    def _rotated(self):
+        try:
+            st = os.stat(self.file_path)
+        except FileNotFoundError:
+            # Moved away and not recreated yet: keep draining the old file
+            return False
+        return st.st_ino != os.fstat(self._f.fileno()).st_ino
+
+    def poll(self):
+        """Returns the list of new complete lines (bytes, without line endings)."""
+        if self._f is None and not self._open():
+            return []
+
+        if os.fstat(self._f.fileno()).st_size < self._f.tell():
+            print(f"[!] {self.file_path} was truncated, reading from the start.")
+            self.truncations += 1
+            self._f.seek(0)
+            self._partial = b''
+            self.offset = 0
+
+        # Bounded read, so a large backlog is handed out in slices
+        lines, at_eof = self._read_available(POLL_MAX_READS)
+
+        if at_eof and self._rotated():
+            # Whatever was appended to the old file before the switch still counts
+            lines.extend(self._read_available()[0])
+            if self._partial.strip():
+                lines.append(self._partial)
+            print(f"[*] {self.file_path} was rotated, following the new file.")
+            self.rotations += 1
+            self.close()
+            self._partial = b''
+            self.offset = 0
+            if self._open():
+                lines.extend(self._read_available(POLL_MAX_READS)[0])
+
+        return [line for line in lines if line.strip()]
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
@@ -0,0 +1,171 @@
+"""
+In-memory stand-in for the slice of MySQL that ingestion talks to, shared by the
+ingestion tests: multi-row INSERTs with auto-increment ids (batched ingest), alert
+INSERTs (per-detection and rolled up), the checkpoint table, prepared cursors
+(per column signature), LOAD DATA LOCAL INFILE into staging tables and the
+INSERT ... SELECT moves out of them (bulk load).
+
+Writes stay on the connection (conn.logs, conn.alerts, conn.checkpoints) until
+commit() moves them into the FakeDB, so only committed rows survive a new connection.
+Rows are dicts; log rows get the column DEFAULTs of schema.sql for columns not written.
+"""
+import re
+import mysql.connector
+
+# logs columns with their DEFAULT (NOT NULL without one: MySQL's implicit '')
+LOG_COLUMN_DEFAULTS = {
+    "timestamp": None, "src_ip": "", "dst_ip": "", "src_port": None, "dst_port": None, "service": None,
+    "device_type": None, "protocol": None, "action": None, "policyid": None, "sentbyte": 0, "rcvdbyte": 0,
+    "user": "N/A", "raw_log": None,
+}
+
+_INSERT_COLUMNS = re.compile(r"INSERT INTO \w+ \(([^)]*)\)")
+
+
+class Crash(BaseException):
+    """Stands in for the process dying mid-ingest (not caught by the per-log handlers)."""
+
+
+def read_tsv(path):
+    """Parses a LOAD DATA file back with MySQL's default escaping."""
+    unescape = {"t": "\t", "n": "\n", "r": "\r", "0": "\0", "\\": "\\"}
+    rows = []
+    with open(path, encoding='utf-8', newline='') as f:
+        for line in f.read().split("\n")[:-1]:
+            fields = []
+            for field in line.split("\t"):
+                if field == "\\N":
+                    fields.append(None)
+                else:
+                    fields.append(re.sub(r"\\(.)", lambda m: unescape[m.group(1)], field))
+            rows.append(fields)
+    return rows
+
+
+def _insert_columns(sql):
+    return [c.strip() for c in _INSERT_COLUMNS.match(sql).group(1).split(",")]
+
+
+class FakeDB:
+    """
+    Committed state. `columns` maps the logs columns to their DEFAULT; max_id
+    pre-fills ids 1..max_id; infile_errno makes LOAD DATA fail with that error;
+    an INSERT INTO logs raises Crash once crash_at rows exist.
+    """
+
+    def __init__(self, columns=None, max_id=0, infile_errno=None):
+        self.columns = dict(LOG_COLUMN_DEFAULTS if columns is None else columns)
+        self.logs = {i: {} for i in range(1, max_id + 1)}
+        self.alerts = []
+        self.checkpoints = {}
+        self.next_id = max_id + 1
+        self.crash_at = None
+        self.infile_errno = infile_errno
+
+    def connect(self):
+        return FakeConnection(self)
+
+    def log_row(self, values):
+        """A logs row as stored: the column defaults, overridden by the written values."""
+        return {**self.columns, **values}
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.logs, self.alerts, self.checkpoints = {}, [], {}
+        self.staging = {"logs_staging": [], "alerts_staging": []}
+        self.statements = []
+        self.cursors = []
+        self.prepares = 0
+
+    def cursor(self, prepared=False):
+        cursor = FakeCursor(self, prepared)
+        self.cursors.append(cursor)
+        return cursor
+
+    def commit(self):
+        self.db.logs.update(self.logs)
+        self.db.alerts.extend(self.alerts)
+        self.db.checkpoints.update(self.checkpoints)
+        self.logs, self.alerts, self.checkpoints = {}, [], {}
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    """A plain cursor, or with prepared a prepared one that counts (re-)prepares on its connection."""
+
+    def __init__(self, conn, prepared=False):
+        self.conn = conn
+        self.prepared = prepared
+        self.sql = None
+        self.closed = False
+        self.lastrowid = None
+        self._rows = []
+
+    def execute(self, sql, params=None):
+        conn, db = self.conn, self.conn.db
+        if self.prepared and sql is not self.sql:
+            conn.prepares += 1
+            self.sql = sql
+        conn.statements.append(sql)
+        self._rows = []
+
+        if sql.startswith("SELECT fingerprint"):
+            cp = dict(db.checkpoints, **conn.checkpoints).get(params[0])
+            self._rows = [(cp[1], cp[2], cp[3])] if cp else []
+        elif sql.startswith("INSERT INTO ingest_checkpoints"):
+            conn.checkpoints[params[0]] = params
+        elif sql.startswith("SELECT @@auto_increment_increment"):
+            self._rows = [(1,)]
+        elif sql.startswith("SHOW COLUMNS FROM logs"):
+            self._rows = [(c,) for c in ["id", *db.columns, "created_at"]]
+        elif sql.startswith("DELETE FROM"):
+            conn.staging[sql.split()[-1]] = []
+        elif sql.startswith("LOAD DATA LOCAL INFILE"):
+            if db.infile_errno:
+                raise mysql.connector.Error(msg="Loading local data is disabled", errno=db.infile_errno)
+            table = sql.split("INTO TABLE ")[1].split()[0]
+            cols = [c.strip() for c in sql[sql.rindex("(") + 1:-1].split(",")]
+            # logs_staging is LIKE logs, so columns the file doesn't name get the logs DEFAULTs
+            base = db.columns if table == "logs_staging" else {}
+            conn.staging[table] += [{**base, **dict(zip(cols, row))} for row in read_tsv(params[0])]
+        elif sql.startswith("SELECT COALESCE(MAX(id), 0) FROM logs"):
+            self._rows = [(max([*db.logs, *conn.logs], default=0),)]
+        elif sql.startswith("INSERT INTO logs") and " SELECT " in sql:
+            for row in conn.staging["logs_staging"]:
+                row = dict(row)
+                log_id = int(row.pop("id")) + params[0]
+                conn.logs[log_id] = row
+                db.next_id = max(db.next_id, log_id + 1)
+        elif sql.startswith("INSERT INTO logs"):
+            if db.crash_at is not None and len(db.logs) + len(conn.logs) == db.crash_at:
+                raise Crash()
+            cols = _insert_columns(sql)
+            self.lastrowid = db.next_id
+            for i in range(0, len(params), len(cols)):
+                conn.logs[db.next_id] = db.log_row(dict(zip(cols, params[i:i + len(cols)])))
+                db.next_id += 1
+        elif sql.startswith("INSERT INTO alerts") and " SELECT " in sql:
+            for row in conn.staging["alerts_staging"]:
+                row = dict(row)
+                conn.alerts.append(dict(row, raw_log_reference=int(row.pop("stage_id")) + params[0]))
+        elif sql.startswith("INSERT INTO alerts"):
+            cols = _insert_columns(sql)
+            for i in range(0, len(params), len(cols)):
+                conn.alerts.append(dict(zip(cols, params[i:i + len(cols)])))
+
+    def executemany(self, sql, seq):
+        for params in seq:
+            self.execute(sql, params)
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        self.closed = True
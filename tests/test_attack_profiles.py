@@ -0,0 +1,52 @@
+import os
+import json
+import random
+import unittest
+from datetime import datetime, timedelta
+from attack_profiles import AttackSimulator
+
+CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config.json")
+
+class TestCountExactAttacks(unittest.TestCase):
+
+    def setUp(self):
+        with open(CONFIG) as f:
+            config = json.load(f)
+        config["dataset"]["enabled"] = False
+        self.start = datetime(2026, 1, 6, 10, 0, 0)
+        self.attacker = AttackSimulator(config, random.Random(11))
+
+    def test_counts_are_exact_and_spread_over_the_window(self):
+        end = self.start + timedelta(hours=2)
+        for generate in (self.attacker.generate_dns_tunneling, self.attacker.generate_beaconing,
+                         self.attacker.generate_api_abuse, self.attacker.generate_clickjacking):
+            for count in (0, 1, 5, 37):
+                logs = generate(self.start, 2, count=count)
+                self.assertEqual(len(logs), count, generate.__name__)
+                stamps = [log["timestamp"] for log in logs]
+                self.assertEqual(stamps, sorted(stamps), generate.__name__)
+            # The last of N events lands near the end of the window, not N steps after the start
+            self.assertGreater(stamps[-1], end - timedelta(minutes=30), generate.__name__)
+            self.assertLess(stamps[-1], end + timedelta(minutes=30), generate.__name__)
+
+        self.assertEqual(len(self.attacker.generate_iot_bruteforce(self.start, 2, count=7)), 7)
+
+    def test_small_count_does_not_build_the_campaign(self):
+        calls = 0
+        rng = self.attacker.rng
+        uniform = rng.uniform
+        def counted(a, b):
+            nonlocal calls
+            calls += 1
+            return uniform(a, b)
+        rng.uniform = counted
+        self.assertEqual(len(self.attacker.generate_dns_tunneling(self.start, 1, count=5)), 5)
+        self.assertEqual(calls, 5)
+
+    def test_default_volume_is_config_driven(self):
+        self.assertEqual(len(self.attacker.generate_dns_tunneling(self.start, 1)), 3600)
+        self.assertEqual(len(self.attacker.generate_iot_bruteforce(self.start, 1)), 500)
+        self.assertIn(len(self.attacker.generate_clickjacking(self.start, 1)), range(1, 6))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import json
+import ipaddress
+import unittest
+from collections import Counter
+from datetime import datetime, timedelta
+import numpy as np
+from baseline_generator import VectorBaseline, ip_strings
+
+CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config.json")
+
+class TestVectorBaseline(unittest.TestCase):
+
+    def setUp(self):
+        with open(CONFIG) as f:
+            self.config = json.load(f)
+        self.start = datetime(2026, 1, 6, 10, 0, 0)
+        self.vb = VectorBaseline(self.config, np.random.default_rng(7))
+
+    def test_ip_strings(self):
+        ints = np.array([int(ipaddress.IPv4Address(ip)) for ip in ("10.10.0.1", "192.168.1.254", "8.8.8.8")])
+        self.assertEqual(ip_strings(ints), ["10.10.0.1", "192.168.1.254", "8.8.8.8"])
+
+    def test_uniform_matches_config_distributions(self):
+        logs = list(self.vb.uniform(self.start, 50000, 1, ["Router", "Printer"]))
+        self.assertEqual(len(logs), 50000)
+        self.assertEqual(list(logs[0]), ["timestamp", "srcip", "dstip", "srcport", "dstport", "proto", "service",
+                                         "action", "policyid", "sentbyte", "rcvdbyte", "duration", "user",
+                                         "device_type", "level", "logid"])
+
+        services = {s["name"]: s for s in self.config["baseline"]["services"]}
+        total = sum(s["weight"] for s in services.values())
+        mix = Counter(log["service"] for log in logs)
+        for name, svc in services.items():
+            self.assertAlmostEqual(mix[name] / len(logs), svc["weight"] / total, delta=0.01)
+
+        internal = [ipaddress.IPv4Network(c) for c in self.config["network"]["internal_cidrs"]]
+        external = [ipaddress.IPv4Network(c) for c in self.config["network"]["external_cidrs"]]
+        end = self.start + timedelta(hours=1)
+        for log in logs[:2000]:
+            svc = services[log["service"]]
+            self.assertEqual((log["dstport"], log["proto"]), (svc["port"], svc["proto"]))
+            self.assertTrue(any(ipaddress.IPv4Address(log["srcip"]) in n for n in internal))
+            self.assertTrue(any(ipaddress.IPv4Address(log["dstip"]) in n for n in external))
+            self.assertTrue(self.start <= log["timestamp"] <= end)
+            self.assertIn(log["device_type"], ("Router", "Printer"))
+        for key, low, high in (("srcport", 10000, 65000), ("sentbyte", 100, 5000), ("rcvdbyte", 100, 50000),
+                               ("duration", 1, 60)):
+            values = [log[key] for log in logs]
+            self.assertTrue(low <= min(values) < low + (high - low) * 0.01)
+            self.assertTrue(high - (high - low) * 0.01 < max(values) <= high)
+            self.assertIsInstance(values[0], int)
+        self.assertEqual(len({log["user"] for log in logs}), 50)
+
+    def test_bursts_cover_window_in_order(self):
+        batch = self.vb.bursts(self.start, 1)
+        logs = list(batch)
+        times = [log["timestamp"] for log in logs]
+        self.assertEqual(times, sorted(times))
+        self.assertLessEqual(times[-1], self.start + timedelta(hours=1))
+        self.assertGreater(times[-1], self.start + timedelta(minutes=59, seconds=50))
+        # ~3429 bursts of 3 events on average
+        self.assertAlmostEqual(len(logs) / 10300, 1, delta=0.05)
+        self.assertEqual(logs[0]["device_type"], "workstation")
+        self.assertEqual((logs[0]["src_country"], logs[0]["dst_country"]), ("Reserved", "United States"))
+
+    def test_empty_window_keeps_every_event(self):
+        streamed = list(self.vb.iter_uniform(self.start, 25, 0))
+        self.assertEqual(len(streamed), 25)
+        self.assertEqual({log["timestamp"] for log in streamed}, {self.start})
+        self.assertEqual({log["timestamp"] for log in self.vb.uniform(self.start, 25, 0)}, {self.start})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import sqlite3
+import unittest
+from datetime import datetime
+from bulk_loader import BulkLoader, make_bulk_writer, tsv_value
+from ingest_writer import BatchLogWriter
+from tests.fake_mysql import FakeDB
+
+class TestBulkLoader(unittest.TestCase):
+
+    def test_tsv_escaping(self):
+        self.assertEqual(tsv_value(None), "\\N")
+        self.assertEqual(tsv_value("a\tb\nc\\d"), "a\\tb\\nc\\\\d")
+        self.assertEqual(tsv_value(datetime(2026, 1, 6, 10, 44, 26)), "2026-01-06 10:44:26.000000")
+
+    def test_load_and_move_links_alerts(self):
+        conn = FakeDB({"timestamp": None, "src_ip": None, "dst_ip": None, "msg": None}, max_id=41).connect()
+        loader = BulkLoader(conn, conn.cursor(), spool_rows=3)
+        ts = datetime(2026, 1, 6, 10, 44, 26)
+        for i in range(5):
+            detections = [{"type": "SSH Abuse", "severity": "medium"}] if i % 2 else []
+            loader.add({"timestamp": ts, "src_ip": f"10.0.0.{i}", "msg": f"line\t{i}\nnext", "other": 1}, detections)
+        self.assertFalse(loader.add({"not_a_column": 1}, []))
+        loader.flush()
+        loader.close()
+
+        self.assertEqual((loader.logs_written, loader.alerts_written), (5, 2))
+        self.assertEqual(sorted(conn.logs), [42, 43, 44, 45, 46])
+        self.assertEqual(conn.logs[44]["msg"], "line\t2\nnext")
+        self.assertIsNone(conn.logs[44]["dst_ip"])
+        for alert in conn.alerts:
+            self.assertEqual(conn.logs[alert["raw_log_reference"]]["src_ip"], alert["src_ip"])
+
+    def test_missing_keys_get_column_defaults_like_insert(self):
+        logs = [{"timestamp": "2026-01-06 10:44:26", "src_ip": "10.0.0.1", "dst_ip": "10.0.1.1", "sentbyte": "7"},
+                {"timestamp": "2026-01-06 10:44:27", "service": "HTTP"}]
+
+        batch = FakeDB().connect()
+        writer = BatchLogWriter(batch.cursor())
+        bulk = FakeDB().connect()
+        loader = BulkLoader(bulk, bulk.cursor())
+        for log in logs:
+            writer.add(log, [])
+            loader.add(log, [])
+        writer.flush()
+        loader.flush()
+        loader.close()
+
+        self.assertEqual(list(bulk.logs.values()), list(batch.logs.values()))
+        self.assertEqual([(r["sentbyte"], r["rcvdbyte"], r["user"], r["src_ip"]) for r in bulk.logs.values()],
+                         [("7", 0, "N/A", "10.0.0.1"), (0, 0, "N/A", "")])
+        # One LOAD DATA per column signature
+        self.assertEqual(len([s for s in bulk.statements if "INTO TABLE logs_staging" in s]), 2)
+
+    def test_falls_back_when_local_infile_disabled(self):
+        conn = FakeDB(infile_errno=3948).connect()
+        self.assertIsInstance(make_bulk_writer(conn, conn.cursor()), BatchLogWriter)
+        conn = sqlite3.connect(":memory:")
+        self.assertIsInstance(make_bulk_writer(conn, conn.cursor()), BatchLogWriter)
+        conn.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import time
+import threading
+import unittest
+from unittest import mock
+import mysql.connector
+from api import db
+from api.db import ConnectionPool, PoolTimeout
+
+class FakeConnection:
+    def __init__(self, n):
+        self.n = n
+        self.closed = False
+        self.in_transaction = False
+        self.pings = 0
+        self.alive = True
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        self.pings += 1
+        if not self.alive:
+            raise mysql.connector.errors.InterfaceError("server has gone away")
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+class FakeFactory:
+    def __init__(self):
+        self.opened = []
+
+    def __call__(self):
+        conn = FakeConnection(len(self.opened))
+        self.opened.append(conn)
+        return conn
+
+class TestConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.factory = FakeFactory()
+
+    def test_reuses_released_connection(self):
+        pool = ConnectionPool(self.factory, max_size=2)
+        conn = pool.acquire()
+        conn.in_transaction = True
+        conn.close()
+        with pool.acquire() as again:
+            self.assertEqual(again.n, 0)
+            # Left-over transaction was rolled back on release
+            self.assertFalse(again.in_transaction)
+        self.assertEqual(len(self.factory.opened), 1)
+        self.assertEqual(pool.stats["reused"], 1)
+
+    def test_closed_proxy_is_unusable(self):
+        pool = ConnectionPool(self.factory)
+        conn = pool.acquire()
+        conn.close()
+        conn.close()
+        with self.assertRaises(mysql.connector.errors.OperationalError):
+            conn.ping()
+        self.assertEqual(len(pool._idle), 1)
+
+    def test_size_limit_waits_then_times_out(self):
+        pool = ConnectionPool(self.factory, max_size=1, timeout=0.05)
+        held = pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+
+        pool.timeout = 5
+        threading.Timer(0.05, held.close).start()
+        start = time.monotonic()
+        with pool.acquire() as conn:
+            self.assertEqual(conn.n, 0)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(len(self.factory.opened), 1)
+
+    def test_health_checks(self):
+        pool = ConnectionPool(self.factory, ping_after=0)
+        pool.acquire().close()
+        with pool.acquire() as conn:
+            self.assertEqual(conn.pings, 1)
+            conn.alive = False
+        # Dead connection is replaced by a new one
+        with pool.acquire() as conn:
+            self.assertEqual(conn.n, 1)
+        self.assertTrue(self.factory.opened[0].closed)
+
+        pool = ConnectionPool(self.factory, recycle=0)
+        pool.acquire().close()
+        with pool.acquire() as conn:
+            self.assertEqual(conn.n, 3)
+        self.assertTrue(self.factory.opened[2].closed)
+
+    def test_settings_are_read_from_config_at_creation(self):
+        with mock.patch.multiple(db.Config, DB_POOL_SIZE=3, DB_POOL_TIMEOUT=0.5):
+            pool = ConnectionPool(self.factory, recycle=60)
+        self.assertEqual((pool.max_size, pool.timeout, pool.recycle), (3, 0.5, 60))
+
+    def test_failed_connect_frees_slot(self):
+        pool = ConnectionPool(mock.Mock(side_effect=mysql.connector.Error("refused")), max_size=1, timeout=0)
+        for _ in range(2):
+            with self.assertRaises(mysql.connector.Error):
+                pool.acquire()
+
+    def test_db_connection_discards_broken_connection(self):
+        pool = ConnectionPool(self.factory)
+        with mock.patch.object(db, "get_pool", return_value=pool):
+            with self.assertRaises(mysql.connector.errors.OperationalError):
+                with db.db_connection():
+                    raise mysql.connector.errors.OperationalError("lost connection")
+            self.assertTrue(self.factory.opened[0].closed)
+            self.assertEqual(pool._idle, [])
+            self.assertEqual(pool._size, 0)
+
+            with db.db_connection() as conn:
+                self.assertEqual(conn.n, 1)
+            self.assertEqual(len(pool._idle), 1)
+
+if __name__ == '__main__':
+    unittest.main()
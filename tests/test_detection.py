@@ -1,52 +1,291 @@
-import unittest
-from datetime import datetime, timedelta
-from detection.dns import detect_dns_tunneling
-from detection.ssh import detect_ssh_abuse
-from detection.beacon import detect_beaconing
-
-class TestDetectionEngine(unittest.TestCase):
-    
-    def test_dns_tunneling(self):
-        # Test normal domain
-        self.assertIsNone(detect_dns_tunneling("google.com"))
-        
-        # Test long query / high entropy
-        long_domain = "a" * 60 + ".example.com"
-        alert = detect_dns_tunneling(long_domain)
-        self.assertIsNotNone(alert)
-        self.assertEqual(alert['type'], "DNS Tunneling")
-        self.assertIn("High query length", str(alert['indicators']))
-
-    def test_ssh_abuse(self):
-        # Test normal
-        normal_log = {"protocol": "ssh", "device_type": "laptop", "action": "login_success"}
-        self.assertIsNone(detect_ssh_abuse(normal_log))
-        
-        # Test IoT device SSH
-        iot_log = {"protocol": "ssh", "device_type": "camera", "action": "login_success", "src_ip": "1.1.1.1"}
-        alert = detect_ssh_abuse(iot_log)
-        self.assertIsNotNone(alert)
-        self.assertIn("Unexpected SSH traffic", str(alert['indicators']))
-        
-        # Test Failed login
-        fail_log = {"protocol": "ssh", "device_type": "server", "action": "login_failed", "src_ip": "1.1.1.1"}
-        alert_fail = detect_ssh_abuse(fail_log)
-        self.assertIsNotNone(alert_fail)
-        self.assertIn("SSH Authentication Failure", str(alert_fail['indicators']))
-
-    def test_beaconing(self):
-        # Fixed interval every 10 seconds
-        base_time = datetime.now()
-        timestamps = [base_time + timedelta(seconds=10*x) for x in range(10)]
-        
-        alert = detect_beaconing(timestamps)
-        self.assertIsNotNone(alert)
-        self.assertEqual(alert['type'], "Beaconing Detected")
-        self.assertAlmostEqual(alert['average_interval'], 10.0, delta=0.1)
-
-        # Irregular interval
-        irregular = [base_time, base_time + timedelta(seconds=10), base_time + timedelta(seconds=45), base_time + timedelta(seconds=48)]
-        self.assertIsNone(detect_beaconing(irregular))
-
-if __name__ == '__main__':
-    unittest.main()
+import os
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from detection import engine
+from detection.dns import detect_dns_tunneling, detect_dns_tunneling_batch, calculate_entropy, calculate_entropy_batch, SubdomainVolumeTracker
+from detection.ssh import detect_ssh_abuse, SSHBruteForceTracker
+from detection.beacon import detect_beaconing, BeaconTracker
+from detection.signatures import KEYWORD_MATCHER, SignatureMatcher
+from detection.sigma import AhoCorasick, SigmaRuleSet
+
+class TestDetectionEngine(unittest.TestCase):
+    
+    def test_dns_tunneling(self):
+        # Test normal domain
+        self.assertIsNone(detect_dns_tunneling("google.com"))
+        
+        # Test long query / high entropy
+        long_domain = "a" * 60 + ".example.com"
+        alert = detect_dns_tunneling(long_domain)
+        self.assertIsNotNone(alert)
+        self.assertEqual(alert['type'], "DNS Tunneling")
+        self.assertIn("High query length", str(alert['indicators']))
+
+    def test_entropy_batch_matches_scalar(self):
+        names = ["google.com", "", "a" * 60 + ".example.com", "x7f3k9q2m1z8.evil.cc", "bücher.de"]
+        entropies, lengths = calculate_entropy_batch(names)
+        for name, entropy, length in zip(names, entropies, lengths):
+            self.assertAlmostEqual(entropy, calculate_entropy(name), places=9)
+            self.assertEqual(length, len(name))
+
+        batch = detect_dns_tunneling_batch(names)
+        self.assertEqual(batch, [detect_dns_tunneling(n) for n in names])
+
+    def test_ssh_abuse(self):
+        # Test normal
+        normal_log = {"protocol": "ssh", "device_type": "laptop", "action": "login_success"}
+        self.assertIsNone(detect_ssh_abuse(normal_log))
+        
+        # Test IoT device SSH
+        iot_log = {"protocol": "ssh", "device_type": "camera", "action": "login_success", "src_ip": "1.1.1.1"}
+        alert = detect_ssh_abuse(iot_log)
+        self.assertIsNotNone(alert)
+        self.assertIn("Unexpected SSH traffic", str(alert['indicators']))
+        
+        # Test Failed login
+        fail_log = {"protocol": "ssh", "device_type": "server", "action": "login_failed", "src_ip": "1.1.1.1"}
+        alert_fail = detect_ssh_abuse(fail_log)
+        self.assertIsNotNone(alert_fail)
+        self.assertIn("SSH Authentication Failure", str(alert_fail['indicators']))
+
+    def test_ssh_bruteforce_aggregation(self):
+        tracker = SSHBruteForceTracker(threshold=10, window=60, cooldown=300)
+        # 500 attempts, one every 0.2s, then a second burst after the cool-down
+        alerts = [tracker.update("192.168.1.201", "8.8.8.9", 1000 + i * 0.2) for i in range(500)]
+        alerts += [tracker.update("192.168.1.201", "8.8.8.9", 1350 + i * 0.2) for i in range(20)]
+        fired = [a for a in alerts if a]
+        self.assertEqual(len(fired), 2)
+        self.assertEqual(fired[0]['type'], "SSH Brute Force")
+        self.assertIn("suppressed", str(fired[1]['indicators']))
+
+        # Slow attempts never cross the rate threshold
+        tracker = SSHBruteForceTracker(threshold=10, window=60)
+        self.assertFalse(any(tracker.update("a", "b", i * 30) for i in range(50)))
+
+    def _ssh_alerts(self, logs):
+        """Alert types from the stateless pipeline and StreamingDetector, ssh.aggregate on."""
+        detector = engine.StreamingDetector()
+        types = []
+        for log in logs:
+            for alert in engine.run_detection_pipeline(log) + detector.process(log):
+                if alert['type'].startswith("SSH"):
+                    types.append((alert['type'], len(alert['indicators'])))
+        return types
+
+    def test_ssh_aggregation_keeps_iot_alerts(self):
+        self.assertTrue(engine.load_detection_config()['ssh']['aggregate'])
+        base_time = datetime(2024, 1, 1)
+        session = {"protocol": "6", "service": "SSH", "dst_port": 22, "src_ip": "192.168.1.201",
+                   "dst_ip": "8.8.8.9", "device_type": "iot_camera"}
+
+        # Benign camera sessions: per-event IoT alerts, no brute force
+        logs = [{**session, "action": "accept", "timestamp": base_time + timedelta(seconds=i)} for i in range(10)]
+        self.assertEqual(self._ssh_alerts(logs), [("SSH Abuse", 1)] * 10)
+
+        # Failing camera logins: per-event IoT + failure alerts, and the burst is rolled up
+        logs = [{**session, "action": "deny", "timestamp": base_time + timedelta(seconds=i)} for i in range(10)]
+        types = [t for t, _ in self._ssh_alerts(logs)]
+        self.assertEqual(types.count("SSH Abuse"), 10)
+        self.assertEqual(types.count("SSH Brute Force"), 1)
+
+        # Plain failures only show up aggregated
+        logs = [{**session, "device_type": "server", "action": "deny",
+                 "timestamp": base_time + timedelta(seconds=i)} for i in range(10)]
+        self.assertEqual([t for t, _ in self._ssh_alerts(logs)], ["SSH Brute Force"])
+
+    def test_ssh_aggregation_without_timestamp(self):
+        log = {"protocol": "6", "service": "SSH", "dst_port": 22, "src_ip": "10.0.0.9", "dst_ip": "10.0.0.1",
+               "device_type": "server", "action": "deny", "timestamp": "not a date"}
+        self.assertEqual(self._ssh_alerts([log] * 3), [("SSH Abuse", 1)] * 3)
+
+    def test_beaconing(self):
+        # Fixed interval every 10 seconds
+        base_time = datetime.now()
+        timestamps = [base_time + timedelta(seconds=10*x) for x in range(10)]
+        
+        alert = detect_beaconing(timestamps)
+        self.assertIsNotNone(alert)
+        self.assertEqual(alert['type'], "Beaconing Detected")
+        self.assertAlmostEqual(alert['average_interval'], 10.0, delta=0.1)
+
+        # Irregular interval
+        irregular = [base_time, base_time + timedelta(seconds=10), base_time + timedelta(seconds=45), base_time + timedelta(seconds=48)]
+        self.assertIsNone(detect_beaconing(irregular))
+
+class TestSubdomainVolumeTracker(unittest.TestCase):
+
+    def test_threshold_alerts_once(self):
+        tracker = SubdomainVolumeTracker(threshold=13, window=600)
+        alerts = [tracker.update(f"chunk{i:04d}data.evil.cc", 1000 + i) for i in range(200)]
+        fired = [(i, a) for i, a in enumerate(alerts) if a]
+        self.assertEqual(len(fired), 1)
+        self.assertEqual(fired[0][1]['domain'], "evil.cc")
+        self.assertGreaterEqual(fired[0][0], 12)
+        # Repeats of the same name don't add to the count
+        tracker = SubdomainVolumeTracker(threshold=3)
+        self.assertEqual([tracker.update("a.b.example.com", i) for i in range(50)], [None] * 50)
+
+    def test_window_and_fixed_memory(self):
+        tracker = SubdomainVolumeTracker(threshold=10 ** 9, window=600, buckets=4)
+        for i in range(5000):
+            tracker.update(f"x{i}.tunnel.cc", 10 + i * 0.1)
+        counter = tracker.parents["tunnel.cc"]
+        self.assertAlmostEqual(counter.count(), 5000, delta=5000 * 0.2)
+        self.assertLessEqual(len(counter.slots), 4)
+        # Later traffic only sees the last window; idle parents are evicted
+        for i in range(100):
+            tracker.update(f"late{i}.tunnel.cc", 5000 + i)
+        self.assertAlmostEqual(tracker.parents["tunnel.cc"].count(), 100, delta=15)
+        tracker.update("a.other.cc", 100000)
+        self.assertEqual(list(tracker.parents.keys()), ["other.cc"])
+
+class TestBeaconTracker(unittest.TestCase):
+
+    def test_matches_batch_statistics(self):
+        base_time = datetime(2024, 1, 1)
+        offsets = [0, 300, 601, 899, 1202, 1500]
+        timestamps = [base_time + timedelta(seconds=o) for o in offsets]
+        expected = detect_beaconing(timestamps)
+
+        tracker = BeaconTracker()
+        alerts = [tracker.update("10.0.0.5", "198.51.100.55", ts) for ts in timestamps]
+        fired = [a for a in alerts if a]
+        # One alert when the flow first crosses the threshold, then suppressed
+        self.assertEqual(len(fired), 1)
+        self.assertIsNone(alerts[-1])
+        self.assertEqual(alerts[3]['events_count'], 4)
+
+        tracker = BeaconTracker(min_events=len(offsets))
+        last = [tracker.update("a", "b", ts) for ts in timestamps][-1]
+        self.assertAlmostEqual(last['average_interval'], expected['average_interval'])
+        self.assertAlmostEqual(last['variance'], expected['variance'])
+
+    def test_small_min_events(self):
+        # A single interval has no sample variance: no alert (and no ZeroDivisionError) until the second
+        tracker = BeaconTracker(min_events=2)
+        alerts = [tracker.update("a", "b", t) for t in (0, 300, 600)]
+        self.assertEqual(alerts[:2], [None, None])
+        self.assertEqual(alerts[2]['events_count'], 3)
+
+    def test_irregular_and_idle_flows(self):
+        base_time = datetime(2024, 1, 1)
+        tracker = BeaconTracker(idle_timeout=600)
+        for o in [0, 10, 45, 48, 200, 203]:
+            self.assertIsNone(tracker.update("a", "b", base_time + timedelta(seconds=o)))
+
+        tracker.update("c", "d", base_time + timedelta(seconds=203))
+        tracker.update("e", "f", base_time + timedelta(seconds=5000))
+        self.assertEqual(list(tracker.flows.keys()), [("e", "f")])
+
+    def test_streaming_detector(self):
+        detector = engine.StreamingDetector()
+        base_time = datetime(2024, 1, 1)
+        types = []
+        for i in range(6):
+            log = {"src_ip": "10.0.0.5", "dst_ip": "198.51.100.55", "timestamp": base_time + timedelta(seconds=300 * i)}
+            types.extend(a['type'] for a in detector.process(log))
+        self.assertEqual(types, ["Beaconing Detected"])
+
+class TestSignatureMatcher(unittest.TestCase):
+
+    def _types(self, content):
+        return [a['type'] for a in KEYWORD_MATCHER.alerts(content)]
+
+    def test_keyword_signatures(self):
+        self.assertEqual(self._types("GET /index.html 200"), [])
+        self.assertEqual(self._types("q=1 UNION\n  SELECT pass"), ["SQL Injection Attempt"])
+        self.assertEqual(self._types("<img src=x onerror=alert(1)>"), ["Cross-Site Scripting (XSS)"])
+        self.assertEqual(self._types("GET /../../etc/passwd"), ["Directory Traversal"])
+        # Traversal stays case-sensitive like the original substring check
+        self.assertEqual(self._types("GET /ETC/PASSWD"), [])
+        self.assertEqual(self._types("x=%3Cscript%3E; drop  table users; ..\\win.ini"),
+                         ["SQL Injection Attempt", "Cross-Site Scripting (XSS)", "Directory Traversal"])
+
+    def test_rules_matching_at_the_same_offset(self):
+        matcher = SignatureMatcher([{"alert": {"type": "drop"}, "patterns": [r"drop"]},
+                                    {"alert": {"type": "drop table"}, "patterns": [r"drop\s+table"]}])
+        self.assertEqual([a["type"] for a in matcher.alerts("x; DROP TABLE users")], ["drop", "drop table"])
+
+class TestSigmaRules(unittest.TestCase):
+
+    def test_aho_corasick_overlapping(self):
+        ac = AhoCorasick()
+        for word in ["he", "she", "his", "hers"]:
+            ac.add(word, word)
+        ac.build()
+        self.assertEqual(ac.search("ushers"), {"he", "she", "hers"})
+        self.assertEqual(ac.search("nothing"), set())
+
+    def test_rule_compilation(self):
+        rs = SigmaRuleSet()
+        self.assertTrue(rs.add_rule({
+            "name": "UNION-Based SQL Injection", "severity": "critical", "tags": ["attack.t1190"],
+            "detection": {"selection": {"request_uri|contains": ["UNION SELECT", "union+select"]},
+                          "condition": "selection"}}))
+        self.assertTrue(rs.add_rule({
+            "title": "Smuggling", "level": "high",
+            "detection": {"selection": {"cs-method|contains": ["POST"], "url|contains": ["admin"]},
+                          "condition": "selection"}}))
+        # Aggregations can't be evaluated per log
+        self.assertFalse(rs.add_rule({
+            "name": "Flood", "detection": {"selection": {"url|contains": ["/"]},
+                                           "condition": "count(selection) > 10 within 5s"}}))
+        for m in rs.matchers.values():
+            m.build()
+
+        alerts = rs.alerts({"url": "/item?id=1 union select pass", "http_method": "GET"})
+        self.assertEqual([a['type'] for a in alerts], ["UNION-Based SQL Injection"])
+        self.assertEqual(alerts[0]['mitre_technique'], "T1190")
+        # Both selection fields must match
+        self.assertEqual(rs.alerts({"url": "/admin", "http_method": "GET"}), [])
+        self.assertEqual([a['type'] for a in rs.alerts({"url": "/admin", "http_method": "POST"})], ["Smuggling"])
+
+    def test_pattern_tree_loads(self):
+        rs = SigmaRuleSet.load()
+        self.assertGreater(len(rs.rules), 20)
+        self.assertIn("url", rs.matchers)
+
+class TestDetectionConfigCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+        self.tmp.close()
+        self._write(3.7)
+        self.orig_path = engine.CONFIG_PATH
+        engine.CONFIG_PATH = self.tmp.name
+        engine.reload_detection_config()
+
+    def tearDown(self):
+        engine.CONFIG_PATH = self.orig_path
+        engine.reload_detection_config()
+        os.unlink(self.tmp.name)
+
+    def _write(self, threshold, mtime_ns=None):
+        with open(self.tmp.name, 'w') as f:
+            json.dump({"detection_rules": {"dns": {"entropy_threshold": threshold}}}, f)
+        if mtime_ns is not None:
+            os.utime(self.tmp.name, ns=(mtime_ns, mtime_ns))
+
+    def test_cached_until_mtime_changes(self):
+        self.assertEqual(engine.load_detection_config()['dns']['entropy_threshold'], 3.7)
+        st = os.stat(self.tmp.name)
+
+        # Same mtime: cache is kept even after the check interval
+        self._write(9.9, mtime_ns=st.st_mtime_ns)
+        engine._config_cache["checked_at"] = None
+        self.assertEqual(engine.load_detection_config()['dns']['entropy_threshold'], 3.7)
+
+        # New mtime: hot reload
+        self._write(4.2, mtime_ns=st.st_mtime_ns + 10**10)
+        engine._config_cache["checked_at"] = None
+        self.assertEqual(engine.load_detection_config()['dns']['entropy_threshold'], 4.2)
+
+    def test_explicit_reload(self):
+        st = os.stat(self.tmp.name)
+        self._write(5.0, mtime_ns=st.st_mtime_ns)
+        self.assertEqual(engine.reload_detection_config()['dns']['entropy_threshold'], 5.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import ingest_logs
+from ingest_logs import iter_processed
+from tests.fake_mysql import Crash, FakeDB
+
+class TestCheckpointedIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "logs.jsonl")
+        with open(self.path, 'w') as f:
+            for i in range(30):
+                f.write(json.dumps({"timestamp_iso": "2024-01-01T00:00:00", "srcip": f"10.0.0.{i}",
+                                    "dstip": "10.0.1.1", "service": "HTTP"}) + "\n")
+        self.db = FakeDB()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _ingest(self):
+        with mock.patch.object(ingest_logs, "get_db_connection", self.db.connect):
+            ingest_logs.ingest_direct(self.path, chunk_size=5, checkpoint_every=10)
+
+    def test_crash_then_resume_is_idempotent(self):
+        self.db.crash_at = 23
+        with self.assertRaises(Crash):
+            self._ingest()
+        # Only the rows covered by the last checkpoint were committed
+        self.assertEqual(len(self.db.logs), 20)
+
+        self.db.crash_at = None
+        self._ingest()
+        self._ingest()
+        src_ips = [row["src_ip"] for row in self.db.logs.values()]
+        self.assertEqual(src_ips, [f"10.0.0.{i}" for i in range(30)])
+        self.assertEqual(list(self.db.checkpoints.values())[0][3], 30)
+
+    def test_changed_file_starts_over(self):
+        self._ingest()
+        with open(self.path, 'r+') as f:
+            f.write('{"timestamp_iso": "2024-01-02T00:00:00"')
+        self._ingest()
+        self.assertEqual(len(self.db.logs), 60)
+
+class TestParallelProcessing(unittest.TestCase):
+
+    def _raw(self):
+        logs = []
+        for i in range(40):
+            logs.append({"timestamp_iso": f"2024-01-01T00:00:{i % 60:02d}", "srcip": f"10.0.0.{i}",
+                         "dstip": "8.8.8.8", "protocol": "17", "service": "DNS",
+                         "qname": ("x" * 60 + ".evil.cc") if i % 3 == 0 else "google.com"})
+        return logs
+
+    def test_workers_preserve_order_and_results(self):
+        serial = list(iter_processed(self._raw(), workers=1, chunk_size=4))
+        parallel = list(iter_processed(self._raw(), workers=3, chunk_size=4))
+        self.assertEqual([l['src_ip'] for l, _ in parallel], [f"10.0.0.{i}" for i in range(40)])
+        self.assertEqual(serial, parallel)
+        self.assertEqual(sum(1 for _, d in parallel if d), 14)
+
+    def test_worker_timestamp_counts_reach_the_parent(self):
+        before = ingest_logs._ingestor.timestamps.counts["isoformat"]
+        list(iter_processed(self._raw(), workers=2, chunk_size=4))
+        self.assertEqual(ingest_logs._ingestor.timestamps.counts["isoformat"] - before, 40)
+
+class TestFollowMode(unittest.TestCase):
+
+    def test_appended_lines_committed_within_a_second(self):
+        db = FakeDB()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "fw.log")
+            open(path, 'w').close()
+            done = threading.Event()
+            with mock.patch.object(ingest_logs, "get_db_connection", db.connect):
+                follower = threading.Thread(target=ingest_logs.ingest_follow, args=(path,),
+                                            kwargs={"batch_size": 1000, "flush_interval": 0.2, "stop": done.is_set})
+                follower.start()
+                try:
+                    with open(path, 'a') as f:
+                        f.write('date=2026-01-06 time=10:44:26 srcip=10.0.0.1 dstip=10.0.1.1 service=HTTP\n')
+                        f.write(json.dumps({"timestamp_iso": "2026-01-06T10:44:27", "srcip": "10.0.0.2"}) + "\n")
+                    written = time.monotonic()
+                    while len(db.logs) < 2 and time.monotonic() - written < 5:
+                        time.sleep(0.01)
+                    latency = time.monotonic() - written
+                finally:
+                    done.set()
+                    follower.join()
+        self.assertEqual(len(db.logs), 2)
+        self.assertLess(latency, 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+from unittest import mock
+from datetime import datetime
+import ingest_writer
+from ingest_writer import AlertRollup, BatchLogWriter, PreparedStatements, build_log_insert, log_columns, store_log
+from tests.fake_mysql import FakeDB
+
+class TestBatchLogWriter(unittest.TestCase):
+
+    def _logs(self):
+        return [
+            ({"timestamp": "t1", "src_ip": "1.1.1.1", "dst_ip": "2.2.2.2"}, []),
+            ({"timestamp": "t2", "src_ip": "1.1.1.2", "dst_ip": "2.2.2.2", "qname": "x.evil.cc"},
+             [{"type": "DNS Tunneling", "severity": "High"}]),
+            ({"timestamp": "t3", "src_ip": "1.1.1.3", "dst_ip": "2.2.2.2"},
+             [{"type": "SSH Abuse", "severity": "Medium"}]),
+        ]
+
+    def test_per_row_links_alerts(self):
+        conn = FakeDB().connect()
+        cursor = conn.cursor()
+        for log, detections in self._logs():
+            store_log(cursor, log, detections)
+        self.assertEqual([(a["detection_type"], a["raw_log_reference"]) for a in conn.alerts],
+                         [("DNS Tunneling", 2), ("SSH Abuse", 3)])
+
+    def test_alerts_link_to_batched_log_ids(self):
+        conn = FakeDB().connect()
+        writer = BatchLogWriter(conn.cursor(), batch_size=10)
+        for log, detections in self._logs():
+            writer.add(log, detections)
+        writer.flush()
+
+        # Each alert must reference the logs row that carries its own src_ip
+        self.assertEqual(len(conn.alerts), 2)
+        for alert in conn.alerts:
+            self.assertEqual(conn.logs[alert["raw_log_reference"]]["src_ip"], alert["src_ip"])
+        self.assertEqual(writer.logs_written, 3)
+        self.assertEqual(writer.alerts_written, 2)
+        # Two column signatures -> two multi-row log INSERTs
+        self.assertEqual(len([s for s in conn.statements if s.startswith("INSERT INTO logs")]), 2)
+
+    def test_group_flushes_at_batch_size(self):
+        writer = BatchLogWriter(FakeDB().connect().cursor(), batch_size=2)
+        for i in range(5):
+            writer.add({"timestamp": f"t{i}", "src_ip": "1.1.1.1", "dst_ip": "2.2.2.2"}, [])
+        self.assertEqual(writer.logs_written, 4)
+        writer.flush()
+        self.assertEqual(writer.logs_written, 5)
+
+class TestStatementCache(unittest.TestCase):
+
+    def test_column_and_sql_caches(self):
+        log = {"timestamp": "t", "src_ip": "1.1.1.1", "not_a_column": 1, "dst_ip": "2.2.2.2"}
+        self.assertEqual(log_columns(log), ("timestamp", "src_ip", "dst_ip"))
+        self.assertIs(log_columns(dict(log)), log_columns(log))
+        cols = log_columns(log)
+        self.assertIs(build_log_insert(cols, 3), build_log_insert(cols, 3))
+
+    def test_one_prepare_per_signature(self):
+        conn = FakeDB().connect()
+        statements = PreparedStatements(conn)
+        for i in range(10):
+            store_log(None, {"timestamp": f"t{i}", "src_ip": "1.1.1.1"}, [], statements=statements)
+            store_log(None, {"timestamp": f"t{i}", "src_ip": "1.1.1.1", "qname": "a.b"}, [], statements=statements)
+        self.assertEqual(conn.prepares, 2)
+        self.assertEqual(len(conn.logs), 20)
+
+    def test_lru_eviction_closes_cursor(self):
+        conn = FakeDB().connect()
+        statements = PreparedStatements(conn, max_statements=1)
+        store_log(None, {"timestamp": "t", "src_ip": "1.1.1.1"}, [], statements=statements)
+        store_log(None, {"timestamp": "t", "dst_ip": "1.1.1.1"}, [], statements=statements)
+        self.assertTrue(conn.cursors[0].closed)
+        self.assertEqual(len(statements.cursors), 1)
+
+    def test_prepared_batches_respect_placeholder_limit(self):
+        conn = FakeDB().connect()
+        writer = BatchLogWriter(conn.cursor(), batch_size=10, statements=PreparedStatements(conn))
+        with mock.patch.object(ingest_writer, "MAX_PREPARED_PARAMS", 9):
+            for i in range(10):
+                writer.add({"timestamp": f"t{i}", "src_ip": f"10.0.0.{i}", "dst_ip": "2.2.2.2"},
+                           [{"type": "SSH Abuse", "severity": "medium"}])
+        # 3 placeholders per row, 9 per statement -> 3 rows per INSERT
+        inserts = [s for s in conn.statements if s.startswith("INSERT INTO logs")]
+        self.assertEqual([s.count("(%s") for s in inserts], [3, 3, 3, 1])
+        self.assertEqual(writer.logs_written, 10)
+        for alert in conn.alerts:
+            self.assertEqual(conn.logs[alert["raw_log_reference"]]["src_ip"], alert["src_ip"])
+
+class TestAlertRollup(unittest.TestCase):
+
+    def test_repeats_merge_within_bucket(self):
+        conn = FakeDB().connect()
+        writer = BatchLogWriter(conn.cursor(), batch_size=100, rollup=AlertRollup(bucket_seconds=60))
+        ssh = [{"type": "SSH Abuse", "severity": "medium"}]
+        base = datetime(2024, 1, 1, 12, 0).timestamp()
+        for second in (5, 20, 50, 70):
+            log = {"timestamp": datetime.fromtimestamp(base + second), "src_ip": "10.0.0.5", "dst_ip": "10.0.0.1"}
+            writer.add(log, ssh)
+        writer.flush()
+
+        rows = sorted(conn.alerts, key=lambda r: r["bucket_start"])
+        self.assertEqual(len(rows), 2)
+        first, second = rows
+        self.assertEqual(first["event_count"], 3)
+        self.assertEqual((first["first_seen"].second, first["last_seen"].second), (5, 50))
+        self.assertEqual(first["raw_log_reference"], 1)  # first log of the bucket
+        self.assertEqual(second["event_count"], 1)
+        # Rows upserted, not raw detections
+        self.assertEqual(writer.alerts_written, 2)
+        self.assertTrue(all("ON DUPLICATE KEY UPDATE" in s for s in conn.statements if s.startswith("INSERT INTO alerts")))
+
+    def test_distinct_sources_stay_separate(self):
+        conn = FakeDB().connect()
+        cursor = conn.cursor()
+        rollup = AlertRollup(bucket_seconds=300)
+        ts = datetime(2024, 1, 1, 12, 0)
+        for ip in ("10.0.0.5", "10.0.0.6", "10.0.0.5"):
+            _, written = store_log(cursor, {"timestamp": ts, "src_ip": ip},
+                                   [{"type": "DNS Tunneling", "severity": "high"}], rollup)
+            self.assertEqual(written, 0)
+        self.assertEqual(conn.alerts, [])
+        self.assertEqual(rollup.flush(cursor), 2)
+        self.assertEqual(sorted(r["event_count"] for r in conn.alerts), [1, 2])
+        self.assertEqual(rollup.pending, {})
+
+if __name__ == '__main__':
+    unittest.main()
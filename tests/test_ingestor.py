@@ -0,0 +1,109 @@
+import os
+import json
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from ingestor import LogIngestor, TimestampDecoder
+from fortigate_formatter import FortiLogBuilder
+
+class TestStreamingReader(unittest.TestCase):
+
+    def setUp(self):
+        self.records = [{"srcip": f"10.0.0.{i}", "msg": "a, b ] {c}", "n": i} for i in range(50)]
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, name, text):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_json_array_across_chunks(self):
+        path = self._write("logs.json", json.dumps(self.records, indent=2))
+        # Tiny chunks force records to straddle read boundaries
+        got = list(LogIngestor().iter_raw_logs(path, chunk_size=7))
+        self.assertEqual(got, self.records)
+
+    def test_jsonl(self):
+        text = "\n".join(json.dumps(r) for r in self.records) + "\n\n"
+        path = self._write("logs.jsonl", text)
+        got = list(LogIngestor().iter_raw_logs(path, chunk_size=13))
+        self.assertEqual(got, self.records)
+
+    def test_iter_normalized_matches_parse_log_file(self):
+        path = self._write("logs.json", json.dumps(self.records))
+        ingestor = LogIngestor()
+        streamed = list(ingestor.iter_normalized(path))
+        self.assertEqual(len(streamed), len(self.records))
+        self.assertEqual(streamed[3]['src_ip'], "10.0.0.3")
+        self.assertEqual([l['n'] for l in ingestor.parse_log_file(path)], list(range(50)))
+
+    def test_resume_from_offsets(self):
+        records = [dict(r, msg="caf\u00e9 \u2603 " + r["msg"]) for r in self.records]
+        ingestor = LogIngestor()
+        for name, text in (("logs.json", json.dumps(records, indent=1, ensure_ascii=False)),
+                           ("logs.jsonl", "\n".join(json.dumps(r, ensure_ascii=False) for r in records) + "\n")):
+            path = self._write(name, text)
+            pairs = list(ingestor.iter_raw_with_offsets(path, chunk_size=11))
+            self.assertEqual([r for r, _ in pairs], records)
+            # Resuming after record i yields exactly the records after it
+            for i in (0, 17, 48):
+                resumed = [r for r, _ in ingestor.iter_raw_with_offsets(path, pairs[i][1], chunk_size=11)]
+                self.assertEqual(resumed, records[i + 1:])
+            self.assertEqual(list(ingestor.iter_raw_with_offsets(path, pairs[-1][1])), [])
+
+    def test_parse_line_kv_and_json(self):
+        ingestor = LogIngestor()
+        line = 'date=2026-01-06 time=10:44:26 srcip=10.1.1.1 dstport=80 msg="Blocked: not allowed" action=deny'
+        raw = ingestor.parse_line(line.encode())
+        self.assertEqual(raw['msg'], "Blocked: not allowed")
+        self.assertEqual(raw['raw_log'], line)
+        log = ingestor.normalize_log(raw)
+        self.assertEqual((log['src_ip'], log['dst_port'], log['timestamp'].minute), ("10.1.1.1", 80, 44))
+        self.assertEqual(ingestor.parse_line('{"srcip": "10.0.0.1"}'), {"srcip": "10.0.0.1"})
+        self.assertIsNone(ingestor.parse_line("   "))
+
+    def test_kv_round_trip(self):
+        builder = FortiLogBuilder()
+        entry = {"date": "2026-01-06", "time": "10:44:26", "devname": "FGT-60F", "srcip": "10.1.1.1",
+                 "srcport": 53138, "dstip": "192.168.1.200", "dstport": 80, "proto": 6, "service": "HTTP",
+                 "action": "deny", "sentbyte": 581, "user": "user-victim",
+                 "msg": 'Clickjacking Attempt Blocked: Referer "http://free-money.com" not allowed',
+                 "url": "http://internal-site.com/login?a=b", "alert_name": "Clickjacking"}
+        raw = LogIngestor().parse_kv_line(builder.format_kv_string(entry))
+        self.assertEqual({k: v for k, v in raw.items() if k != 'raw_log'}, entry)
+
+        escaped = LogIngestor().parse_kv_line('msg="say \\"hi\\" now" level=notice')
+        self.assertEqual(escaped['msg'], 'say "hi" now')
+        self.assertEqual(escaped['level'], 'notice')
+
+    def test_kv_file_input(self):
+        builder = FortiLogBuilder()
+        lines = [builder.format_kv_string({"date": "2026-01-06", "time": f"10:44:{i:02d}", "srcip": f"10.0.0.{i}",
+                                           "dstport": 443, "msg": "Connection accepted"}) for i in range(20)]
+        path = self._write("fw.log", "\n".join(lines) + "\n")
+        logs = list(LogIngestor().iter_normalized(path))
+        self.assertEqual([l['src_ip'] for l in logs], [f"10.0.0.{i}" for i in range(20)])
+        self.assertEqual(logs[5]['timestamp'].second, 5)
+        self.assertEqual(logs[0]['msg'], "Connection accepted")
+
+    def test_timestamp_tiers(self):
+        decoder = TimestampDecoder()
+        self.assertEqual(decoder.parse("2026-01-06T10:44:26.123456"), datetime(2026, 1, 6, 10, 44, 26, 123456))
+        self.assertEqual(decoder.parse("2026-01-06T10:44:26+00:00"),
+                         datetime(2026, 1, 6, 10, 44, 26, tzinfo=timezone.utc))
+        self.assertEqual(decoder.parse("2026-1-6 9:04:26"), datetime(2026, 1, 6, 9, 4, 26))
+        self.assertEqual(decoder.parse("Jan 6 2026 10:44:26"), datetime(2026, 1, 6, 10, 44, 26))
+        self.assertIsNone(decoder.parse("None None"))
+        self.assertEqual(decoder.counts, {"isoformat": 2, "fortigate": 1, "dateutil": 1, "failed": 1})
+
+    def test_truncated_array_stops_cleanly(self):
+        path = self._write("bad.json", json.dumps(self.records)[:-40])
+        got = list(LogIngestor().iter_normalized(path))
+        self.assertLess(len(got), len(self.records))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import os
+import json
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+import ingest_logs
+from api import db
+from api.sqlite_backend import translate
+from auth_manager import AuthManager
+from config import Config
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+with open(os.path.join(REPO, "simulated_fortigate_logs.json")) as _f:
+    SAMPLE_LOGS = len(json.load(_f))
+
+class TestSQLiteBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "edge.db")
+        self.log_path = os.path.join(self.tmpdir.name, "logs.json")
+        shutil.copy(os.path.join(REPO, "simulated_fortigate_logs.json"), self.log_path)
+        self.config = mock.patch.multiple(Config, DB_BACKEND="sqlite", SQLITE_PATH=self.db_path)
+        self.config.start()
+        db.reset_pool()
+
+    def tearDown(self):
+        db.reset_pool()
+        self.config.stop()
+        self.tmpdir.cleanup()
+
+    def _query(self, sql):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+
+    def _linked_alerts(self):
+        return self._query("SELECT a.detection_type, a.src_ip, l.src_ip, l.timestamp FROM alerts a "
+                           "JOIN logs l ON l.id = a.raw_log_reference ORDER BY a.alert_id")
+
+    def test_tuned_connection(self):
+        with db.db_cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA synchronous")
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+        indexes = {row[0] for row in self._query("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertTrue({"uq_alert_rollup", "ix_logs_timestamp", "ix_alerts_time"} <= indexes)
+
+    def test_translation(self):
+        self.assertEqual(translate("INSERT INTO t (a, b) VALUES (%s, %s) ON DUPLICATE KEY UPDATE "
+                                   "a = LEAST(a, VALUES(a)), b = GREATEST(b, VALUES(b))"),
+                         "INSERT INTO t (a, b) VALUES (?, ?) ON CONFLICT DO UPDATE SET "
+                         "a = MIN(a, excluded.a), b = MAX(b, excluded.b)")
+        # Quoted literals are left alone, %% is an escaped %, and VALUES() only maps inside an upsert
+        self.assertEqual(translate("SELECT * FROM logs WHERE msg LIKE '%ssh%' AND src_ip = %s"),
+                         "SELECT * FROM logs WHERE msg LIKE '%ssh%' AND src_ip = ?")
+        self.assertEqual(translate("SELECT 'it''s %s', \"LEAST(\" FROM t WHERE a LIKE 'x%%' AND b = %s%%"),
+                         "SELECT 'it''s %s', \"LEAST(\" FROM t WHERE a LIKE 'x%%' AND b = ?%")
+        self.assertEqual(translate("INSERT INTO t (a) VALUES(1)"), "INSERT INTO t (a) VALUES(1)")
+        self.assertEqual(translate("INSERT INTO t (a) VALUES(%s) ON DUPLICATE KEY UPDATE a = 'VALUES(a)'"),
+                         "INSERT INTO t (a) VALUES(?) ON CONFLICT DO UPDATE SET a = 'VALUES(a)'")
+
+    def test_batched_ingest_links_alerts_like_per_row(self):
+        ingest_logs.ingest_direct(self.log_path, batch_size=0)
+        per_row = self._linked_alerts()
+        self.assertEqual(self._query("SELECT COUNT(*) FROM logs")[0][0], SAMPLE_LOGS)
+        self.assertTrue(per_row)
+
+        db.reset_pool()
+        os.remove(self.db_path)
+        ingest_logs.ingest_direct(self.log_path, batch_size=64)
+        self.assertEqual(self._query("SELECT COUNT(*) FROM logs")[0][0], SAMPLE_LOGS)
+        self.assertEqual(self._linked_alerts(), per_row)
+        for _, alert_src, log_src, _ in per_row:
+            self.assertEqual(alert_src, log_src)
+
+    def test_rollup_and_checkpoint_resume(self):
+        path = os.path.join(self.tmpdir.name, "dns.jsonl")
+        with open(path, "w") as f:
+            for i in range(60):
+                f.write(json.dumps({"timestamp_iso": f"2024-01-01T00:0{i % 4}:{i % 60:02d}",
+                                    "srcip": f"10.0.0.{i % 3}", "dstip": "8.8.8.8", "protocol": "17",
+                                    "service": "DNS", "qname": "x" * 60 + ".evil.cc"}) + "\n")
+        ingest_logs.ingest_direct(path, batch_size=16)
+        alerts = self._query("SELECT COUNT(*) FROM alerts")[0][0]
+        self.assertGreaterEqual(alerts, 60)
+
+        db.reset_pool()
+        os.remove(self.db_path)
+        for _ in range(2):
+            ingest_logs.ingest_direct(path, batch_size=16, rollup_seconds=300, checkpoint_every=25)
+        self.assertEqual(self._query("SELECT COUNT(*) FROM logs")[0][0], 60)
+        rolled, events = self._query("SELECT COUNT(*), SUM(event_count) FROM alerts")[0]
+        self.assertEqual(events, alerts)
+        self.assertEqual(rolled, alerts // 20)  # per detection type and source, all in one bucket
+        self.assertEqual(self._query("SELECT records FROM ingest_checkpoints")[0][0], 60)
+
+    def test_upgrades_shipped_database(self):
+        shutil.copy(os.path.join(REPO, "network_logs.db"), self.db_path)
+        ingest_logs.ingest_direct(self.log_path, batch_size=100, rollup_seconds=60)
+        columns = {row[1] for row in self._query("PRAGMA table_info(logs)")}
+        self.assertTrue({"log_type", "msg", "dst_port"} <= columns)
+        self.assertGreater(self._query("SELECT COUNT(*) FROM alerts WHERE bucket_start IS NOT NULL")[0][0], 0)
+
+    def test_auth_manager(self):
+        self.assertTrue(AuthManager.create_user("edge", "s3cret", "admin"))
+        self.assertFalse(AuthManager.create_user("edge", "other"))
+        user = AuthManager.login(" edge ", "s3cret")
+        self.assertEqual((user["username"], user["role"]), ("edge", "admin"))
+        self.assertIsNone(AuthManager.login("edge", "wrong"))
+        self.assertEqual(AuthManager.get_user_id("edge"), user["id"])
+
+if __name__ == '__main__':
+    unittest.main()
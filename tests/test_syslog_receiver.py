@@ -0,0 +1,76 @@
+import time
+import socket
+import asyncio
+import unittest
+from fortigate_formatter import FortiLogBuilder
+from syslog_receiver import SyslogReceiver, strip_syslog_header
+
+def kv_line(i):
+    return FortiLogBuilder().format_kv_string({
+        "date": "2026-01-06", "time": "10:44:26", "srcip": f"10.0.0.{i % 250}", "dstip": "10.0.1.1",
+        "dstport": 80, "service": "HTTP", "action": "accept", "msg": f"request {i}"})
+
+class TestSyslogHeader(unittest.TestCase):
+
+    def test_strips_rfc3164_and_rfc5424_headers(self):
+        line = kv_line(1).encode()
+        self.assertEqual(strip_syslog_header(b"<189>" + line), line)
+        self.assertEqual(strip_syslog_header(b"<189>Jan  6 10:44:26 fgt01 " + line), line)
+        self.assertEqual(strip_syslog_header(b"<189>1 2026-01-06T10:44:26Z fgt01 - - - - " + line + b"\n"), line)
+        self.assertEqual(strip_syslog_header(b"<189>no pairs here"), b"")
+
+class TestSyslogReceiver(unittest.TestCase):
+
+    def _run(self, receiver, send):
+        async def main():
+            await receiver.start()
+            await asyncio.get_running_loop().run_in_executor(None, send, receiver)
+            await asyncio.sleep(0.2)
+            await receiver.stop()
+        asyncio.run(main())
+
+    def test_udp_and_tcp_messages_reach_the_sink(self):
+        received = []
+        receiver = SyslogReceiver(received.extend, host="127.0.0.1", udp_port=0, tcp_port=0,
+                                  batch_size=50, flush_interval=0.05)
+
+        def send(r):
+            udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            for i in range(100):
+                udp.sendto(b"<189>" + kv_line(i).encode(), ("127.0.0.1", r.udp_port))
+            udp.close()
+            with socket.create_connection(("127.0.0.1", r.tcp_port)) as tcp:
+                for i in range(100, 150):
+                    tcp.sendall(b"<189>" + kv_line(i).encode() + b"\n")
+                # Octet-counted framing
+                for i in range(150, 160):
+                    msg = b"<189>" + kv_line(i).encode()
+                    tcp.sendall(str(len(msg)).encode() + b" " + msg)
+                tcp.sendall(b"<189>garbage\n")
+
+        self._run(receiver, send)
+        self.assertEqual(receiver.stats["received"], 161)
+        self.assertEqual(receiver.stats["malformed"], 1)
+        self.assertEqual(receiver.stats["processed"], 160)
+        messages = sorted(int(log["msg"].split()[1]) for log, _ in received)
+        self.assertEqual(messages, list(range(160)))
+        self.assertEqual(received[0][0]["src_ip"], "10.0.0.0")
+
+    def test_full_queue_drops_udp_and_counts(self):
+        def slow_sink(results):
+            time.sleep(0.05)
+        receiver = SyslogReceiver(slow_sink, host="127.0.0.1", udp_port=0, tcp_port=None,
+                                  batch_size=5, flush_interval=0.01, queue_size=10)
+
+        def send(r):
+            udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            for i in range(300):
+                udp.sendto(kv_line(i).encode(), ("127.0.0.1", r.udp_port))
+            udp.close()
+
+        self._run(receiver, send)
+        self.assertGreater(receiver.stats["dropped"], 0)
+        self.assertEqual(receiver.stats["received"], receiver.stats["processed"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+from tailer import FileTailer
+
+class TestFileTailer(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "fw.log")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _append(self, text, path=None):
+        with open(path or self.path, 'ab') as f:
+            f.write(text.encode())
+
+    def test_waits_for_file_and_partial_lines(self):
+        tailer = FileTailer(self.path, read_size=4)
+        self.assertEqual(tailer.poll(), [])
+        self._append("a=1\nb=")
+        self.assertEqual(tailer.poll(), [b"a=1"])
+        self.assertEqual(tailer.offset, 4)
+        self._append("2\n\nc=3\n")
+        self.assertEqual(tailer.poll(), [b"b=2", b"c=3"])
+        self.assertEqual(tailer.offset, os.path.getsize(self.path))
+        tailer.close()
+
+    def test_truncation_rewinds(self):
+        self._append("a=1\nb=2\n")
+        tailer = FileTailer(self.path)
+        tailer.poll()
+        with open(self.path, 'wb') as f:
+            f.write(b"c=3\n")
+        self.assertEqual(tailer.poll(), [b"c=3"])
+        self.assertEqual(tailer.truncations, 1)
+        tailer.close()
+
+    def test_rotation_drains_old_file(self):
+        self._append("a=1\n")
+        tailer = FileTailer(self.path)
+        self.assertEqual(tailer.poll(), [b"a=1"])
+        # Late write to the old file, then logrotate-style rename + new file
+        self._append("b=2\n")
+        os.rename(self.path, self.path + ".1")
+        self._append("c=3\n")
+        self.assertEqual(tailer.poll(), [b"b=2", b"c=3"])
+        self.assertEqual(tailer.rotations, 1)
+        self._append("d=4\n")
+        self.assertEqual(tailer.poll(), [b"d=4"])
+        tailer.close()
+
+    def test_resume_offset(self):
+        self._append("a=1\nb=2\n")
+        tailer = FileTailer(self.path, start_offset=4)
+        self.assertEqual(tailer.poll(), [b"b=2"])
+        tailer.close()
+
+if __name__ == '__main__':
+    unittest.main()
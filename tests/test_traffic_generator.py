@@ -0,0 +1,175 @@
+import os
+import csv
+import gzip
+import json
+import random
+import tempfile
+import unittest
+from collections import Counter
+from datetime import datetime, timedelta
+from fortigate_formatter import FortiLogBuilder, LogWriter, LogStreamWriter
+from log_schema import SIMULATED_TRAFFIC_SCHEMA, LogSchemaValidationException
+from traffic_generator import TrafficGenerator
+
+CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "config.json")
+
+class TestStreamingGeneration(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        with open(CONFIG) as f:
+            config = json.load(f)
+        config["dataset"]["enabled"] = False
+        self.config_path = os.path.join(self.tmpdir.name, "config.json")
+        with open(self.config_path, "w") as f:
+            json.dump(config, f)
+        os.chdir(self.tmpdir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmpdir.cleanup()
+
+    def _read_outputs(self):
+        with open("simulated_fortigate_logs.json") as f:
+            logs = json.load(f)
+        with open("simulated_fortigate_logs.csv", newline='') as f:
+            rows = list(csv.DictReader(f))
+        with open("simulated_fortigate_logs.log") as f:
+            lines = f.read().splitlines()
+        return logs, rows, lines
+
+    def test_stream_writer_matches_log_writer(self):
+        builder = FortiLogBuilder()
+        start = datetime(2026, 1, 6, 10, 0, 0)
+        entries = [builder.build_log_entry({"timestamp": start + timedelta(seconds=i), "srcip": f"10.0.0.{i}",
+                                            "msg": "two words", **({"qname": "x.evil.cc"} if i % 2 else {})})
+                   for i in range(5)]
+        writer = LogWriter("batch")
+        writer.write_csv(entries)
+        writer.write_json(entries, "batch")
+        writer.write_raw(entries, builder)
+        with LogStreamWriter("stream", builder) as out:
+            out.write_all(entries)
+        for ext in ("csv", "json", "log"):
+            with open(f"batch.{ext}", "rb") as a, open(f"stream.{ext}", "rb") as b:
+                self.assertEqual(a.read(), b.read(), ext)
+
+    def test_stream_writer_jsonl_and_csv_options(self):
+        builder = FortiLogBuilder()
+        start = datetime(2026, 1, 6, 10, 0, 0)
+        entries = [builder.build_log_entry({"timestamp": start + timedelta(seconds=i), "srcip": f"10.0.0.{i}",
+                                            **({"qname": "x.evil.cc"} if i == 3 else {})})
+                   for i in range(5)]
+
+        with LogStreamWriter("s", builder, formats=("csv", "jsonl"), compression="gzip",
+                             csv_schema=SIMULATED_TRAFFIC_SCHEMA) as out:
+            out.write_all(entries)
+        with gzip.open("s.jsonl.gz", "rt") as f:
+            logs = [json.loads(line) for line in f]
+        self.assertEqual([log["srcip"] for log in logs], [f"10.0.0.{i}" for i in range(5)])
+        self.assertEqual(logs[3]["qname"], "x.evil.cc")
+        with gzip.open("s.csv.gz", "rt", newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(set(rows[0]), set(SIMULATED_TRAFFIC_SCHEMA.fields) - {"timestamp"})
+        self.assertEqual((rows[3]["qname"], rows[0]["qname"]), ("x.evil.cc", ""))
+        self.assertFalse(os.path.exists("s.log"))
+
+        # Fields first seen after the look-ahead go to the "extra" column
+        with LogStreamWriter("l", builder, formats=("csv",), csv_lookahead=2) as out:
+            out.write_all(entries)
+        with open("l.csv", newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertNotIn("qname", rows[0])
+        self.assertEqual(json.loads(rows[3]["extra"]), {"qname": "x.evil.cc"})
+        self.assertEqual(rows[4]["extra"], "")
+
+        with self.assertRaises(LogSchemaValidationException):
+            with LogStreamWriter("bad", builder, formats=("csv",), csv_schema=SIMULATED_TRAFFIC_SCHEMA) as out:
+                out.write({**entries[0], "bogus": 1})
+
+    def test_streamed_run_is_merged_in_time_order(self):
+        random.seed(3)
+        TrafficGenerator(self.config_path).run(stream=True)
+        logs, rows, lines = self._read_outputs()
+        stamps = [log["timestamp_iso"] for log in logs]
+        self.assertEqual(stamps, sorted(stamps))
+        self.assertEqual(len(rows), len(logs))
+        self.assertEqual(len(lines), len(logs))
+        alerts = Counter(log.get("alert_name") for log in logs)
+        self.assertEqual(alerts["SSH Brute Force"], 500)
+        self.assertEqual(alerts["DNS Tunneling"], 3600)
+        self.assertGreater(alerts[None], 9000)
+
+        random.seed(3)
+        TrafficGenerator(self.config_path).run(stream=False)
+        batch_logs, _, _ = self._read_outputs()
+        self.assertEqual(Counter(log.get("alert_name") for log in batch_logs)["DNS Tunneling"], 3600)
+
+    def test_streamed_granular_counts(self):
+        counts = {"baseline": 300, "ssh": 7, "dns": 5, "beacon": 3, "api_abuse": 4, "clickjacking": 0}
+        TrafficGenerator(self.config_path).run(counts, stream=True)
+        logs, rows, _ = self._read_outputs()
+        stamps = [log["timestamp_iso"] for log in logs]
+        self.assertEqual(stamps, sorted(stamps))
+        alerts = Counter(log.get("alert_name") for log in logs)
+        self.assertEqual((alerts[None], alerts["SSH Brute Force"], alerts["DNS Tunneling"],
+                          alerts["C2 Beaconing"], alerts["API Abuse"]), (300, 7, 5, 3, 4))
+        self.assertEqual(len(rows), 319)
+
+    def test_seeded_run_is_identical_for_any_worker_count(self):
+        with open(self.config_path) as f:
+            config = json.load(f)
+        config["simulation"]["duration_hours"] = 3
+        with open(self.config_path, "w") as f:
+            json.dump(config, f)
+        end = datetime(2026, 1, 6, 12, 0, 0)
+
+        outputs = []
+        for workers in (1, 3):
+            TrafficGenerator(self.config_path).run(workers=workers, seed=42, end_time=end)
+            outputs.append({ext: open(f"simulated_fortigate_logs.{ext}", "rb").read()
+                            for ext in ("csv", "json", "log")})
+        self.assertEqual(outputs[0], outputs[1])
+
+        logs, rows, _ = self._read_outputs()
+        stamps = [log["timestamp_iso"] for log in logs]
+        self.assertEqual(stamps, sorted(stamps))
+        self.assertEqual(stamps[0][:13], "2026-01-06T09")
+        alerts = Counter(log.get("alert_name") for log in logs)
+        self.assertEqual(alerts["SSH Brute Force"], 500)
+        self.assertEqual(alerts["DNS Tunneling"], 3 * 3600)
+
+        TrafficGenerator(self.config_path).run(workers=1, seed=43, end_time=end)
+        self.assertNotEqual(open("simulated_fortigate_logs.log", "rb").read(), outputs[0]["log"])
+
+    def test_sharded_campaigns_keep_one_source_and_beacon_schedule(self):
+        with open(self.config_path) as f:
+            config = json.load(f)
+        config["simulation"]["duration_hours"] = 4
+        config["dataset"] = {"enabled": True, "path": os.path.join(os.path.dirname(CONFIG), "dataset"),
+                             "use_real_ips_as_source": True}
+        with open(self.config_path, "w") as f:
+            json.dump(config, f)
+
+        TrafficGenerator(self.config_path).run(workers=1, seed=1, end_time=datetime(2026, 1, 6, 12, 0, 0))
+        logs, _, _ = self._read_outputs()
+        for name in ("DNS Tunneling", "C2 Beaconing"):
+            self.assertEqual(len({log["srcip"] for log in logs if log.get("alert_name") == name}), 1, name)
+
+        beacons = [datetime.fromisoformat(log["timestamp_iso"]) for log in logs
+                   if log.get("alert_name") == "C2 Beaconing"]
+        self.assertGreater(len(beacons), 40)
+        gaps = [(b - a).total_seconds() for a, b in zip(beacons, beacons[1:])]
+        self.assertTrue(all(200 < gap < 400 for gap in gaps), gaps)
+
+    def test_seeded_granular_counts(self):
+        counts = {"baseline": 300, "ssh": 7, "dns": 5, "beacon": 3, "api_abuse": 4, "clickjacking": 0}
+        TrafficGenerator(self.config_path).run(counts, workers=2, seed=7)
+        logs, _, _ = self._read_outputs()
+        alerts = Counter(log.get("alert_name") for log in logs)
+        self.assertEqual((alerts[None], alerts["SSH Brute Force"], alerts["DNS Tunneling"],
+                          alerts["C2 Beaconing"], alerts["API Abuse"]), (300, 7, 5, 3, 4))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,15 +1,89 @@
 import json
+import math
+import heapq
+import bisect
 import random
 import argparse
 import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from operator import itemgetter
 from datetime import datetime, timedelta, date
 import ipaddress
 from typing import List, Dict, Any
 
-from fortigate_formatter import FortiLogBuilder, LogWriter
+import numpy as np
+
+from fortigate_formatter import FortiLogBuilder, LogWriter, LogStreamWriter, COMPRESSION_SUFFIXES
+from log_schema import SIMULATED_TRAFFIC_SCHEMA
+from baseline_generator import BaselineBatch, VectorBaseline
 from attack_profiles import AttackSimulator
 from pattern_manager import PatternManager
 
+# Length of the time shards of a seeded / multi-process run. Fixed, so the shards
+# (and their seeds) don't depend on the worker count.
+SHARD_HOURS = 1
+
+def _generate_shard(task) -> List[Dict[str, Any]]:
+    """
+    Generates one time shard in its own process: its profiles are drawn from a
+    random.Random and a NumPy Generator seeded from (seed, shard index) alone, and
+    returned merged into time order as built log entries. Each profile is a
+    (kind, start, hours, count, src_ip) tuple.
+    """
+    config, seed, index, profiles, device_categories = task
+    py_seq, np_seq = np.random.SeedSequence(seed, spawn_key=(index,)).spawn(2)
+    rng = random.Random(int(py_seq.generate_state(1, np.uint64)[0]))
+    baseline = VectorBaseline(config, np.random.default_rng(np_seq))
+    attacker = AttackSimulator(config, rng)
+
+    sources = []
+    for kind, start, hours, count, src_ip in profiles:
+        if kind == "baseline":
+            if count is None:
+                sources.append(baseline.iter_bursts(start, hours, device_categories))
+            else:
+                sources.append(baseline.iter_uniform(start, count, hours, device_categories))
+        else:
+            sources.append(getattr(attacker, f"iter_{kind}")(start, hours, src_ip, count=count))
+
+    formatter = FortiLogBuilder()
+    return [formatter.build_log_entry(log) for log in heapq.merge(*sources, key=itemgetter("timestamp"))]
+
+def iter_shards(tasks, workers=1):
+    """
+    Yields _generate_shard(task) for each task, in task order. With workers > 1 the
+    shards are generated by a process pool, at most 2 per worker in flight.
+    """
+    if workers <= 1:
+        for task in tasks:
+            yield _generate_shard(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = deque()
+        for task in tasks:
+            in_flight.append(pool.submit(_generate_shard, task))
+            if len(in_flight) >= workers * 2:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+
+def merge_shards(shards, starts):
+    """
+    Merges time-sorted shard outputs into one time-ordered stream. A shard never has
+    events before its own start, but may spill past the next one's (a burst or a
+    campaign that runs on), so events from the next start on are carried over and
+    merged with the following shard.
+    """
+    key = itemgetter("timestamp")
+    carry = []
+    for events, next_start in zip(shards, starts[1:] + [None]):
+        merged = list(heapq.merge(carry, events, key=key))
+        cut = len(merged) if next_start is None else bisect.bisect_left(merged, next_start, key=key)
+        yield from merged[:cut]
+        carry = merged[cut:]
+
 class TrafficGenerator:
     def __init__(self, config_path: str):
         with open(config_path, 'r') as f:
@@ -18,6 +92,8 @@ class TrafficGenerator:
         self.formatter = FortiLogBuilder()
         self.writer = LogWriter("simulated_fortigate_logs")
         self.attacker = AttackSimulator(self.config)
+        # Seeded from `random`, so random.seed() also fixes the vectorized baseline
+        self.baseline = VectorBaseline(self.config, np.random.default_rng(random.getrandbits(64)))
         
         # Cache network objects
         self.internal_nets = [ipaddress.IPv4Network(cidr) for cidr in self.config["network"]["internal_cidrs"]]
@@ -35,180 +111,176 @@ class TrafficGenerator:
         max_hosts = subnet.num_addresses - 1
         return str(ipaddress.IPv4Address(network_int + random.randint(1, max_hosts)))
         
-    def generate_baseline(self, start_time: datetime, duration_hours: int) -> List[Dict[str, Any]]:
+    def generate_baseline(self, start_time: datetime, duration_hours: int) -> BaselineBatch:
+        """
+        Bursty baseline traffic over the whole window (1-5 events every 0.1-2s), drawn
+        column-wise with NumPy; the per-event dicts are built when the batch is iterated.
+        """
         print("[-] Generating baseline traffic...")
-        logs = []
-        end_time = start_time + timedelta(hours=duration_hours)
-        current_time = start_time
-        
-        # Pre-calculate services weights
-        services = self.config["baseline"]["services"]
-        service_choices = [s for s in services]
-        service_weights = [s["weight"] for s in services]
-        
-        # Simulation loop
-        # Instead of second-by-second, we'll jump by small random intervals
-        while current_time < end_time:
-            # Time increment: Random between 0.1s and 2s for "busty" feel
-            dt = random.uniform(0.1, 2.0)
-            current_time += timedelta(seconds=dt)
-            
-            if current_time > end_time:
-                break
-                
-            # Randomly decide how many events in this burst (1 to 5)
-            burst_size = random.randint(1, 5)
-            
-            for _ in range(burst_size):
-                svc = random.choices(service_choices, weights=service_weights, k=1)[0]
-                
-                # Device Type Selection
-                if hasattr(self, 'device_categories') and self.device_categories:
-                    dev_type = random.choice(self.device_categories)
-                else:
-                    dev_type = "workstation"
-
-                src_ip = self._get_random_internal_ip()
-                dst_ip = self._get_random_external_ip()
-                
-                # NAT/Port logic simulated loosely
-                src_port = random.randint(10000, 65000)
-                
-                # Protocol
-                proto = svc["proto"]
-                dst_port = svc["port"]
-                
-                # Bytes
-                sent = random.randint(100, 5000)
-                rcvd = random.randint(100, 50000)
-                
-                log = {
-                    "timestamp": current_time,
-                    "srcip": src_ip,
-                    "dstip": dst_ip,
-                    "srcport": src_port,
-                    "dstport": dst_port,
-                    "proto": proto,
-                    "service": svc["name"],
-                    "action": "accept",
-                    "policyid": 1,
-                    "sentbyte": sent,
-                    "rcvdbyte": rcvd,
-                    "duration": random.randint(1, 60),
-                    "user": f"user-{random.randint(1, 50)}",
-                    "device_type": dev_type,
-                    "level": "notice",
-                    "logid": "0000000013",
-                    "src_country": "Reserved",
-                    "dst_country": "United States"
-                }
-                logs.append(log)
-                
+        logs = self.baseline.bursts(start_time, duration_hours, getattr(self, 'device_categories', None))
         print(f"[-] Generated {len(logs)} baseline events.")
         return logs
 
-    def run(self, counts=None, device_categories=None):
+    def _sources(self, counts, start_time, duration, stream):
+        """
+        One iterable of raw events per active profile (baseline and attacks). With
+        stream, each is a lazy, time-ordered iterator; otherwise lists / batches.
+        """
+        sources = []
+        attacker = self.attacker
+        if counts:
+            # GRANULAR MODE
+            if counts.get('baseline', 0) > 0:
+                print(f"[-] Generating {counts['baseline']} baseline events...")
+                if stream:
+                    sources.append(self.baseline.iter_uniform(start_time, counts['baseline'], duration,
+                                                              self.device_categories))
+                else:
+                    sources.append(self.baseline.uniform(start_time, counts['baseline'], duration,
+                                                         self.device_categories))
+
+            for key, label, generate in (('ssh', 'SSH', attacker.iter_iot_bruteforce),
+                                         ('dns', 'DNS', attacker.iter_dns_tunneling),
+                                         ('beacon', 'Beaconing', attacker.iter_beaconing),
+                                         ('api_abuse', 'API Abuse', attacker.iter_api_abuse),
+                                         ('clickjacking', 'Clickjacking', attacker.iter_clickjacking)):
+                if counts.get(key, 0) > 0:
+                    print(f"[-] Injecting {counts[key]} {label} events...")
+                    # Exactly N events spread over the window, generated in O(N)
+                    sources.append(generate(start_time, duration, count=counts[key]))
+        else:
+            # BULK MODE (Default)
+            if stream:
+                print("[-] Streaming baseline traffic...")
+                sources.append(self.baseline.iter_bursts(start_time, duration, self.device_categories))
+            else:
+                sources.append(self.generate_baseline(start_time, duration))
+            print("[-] Injecting attacks...")
+            for generate in (attacker.iter_iot_bruteforce, attacker.iter_dns_tunneling, attacker.iter_beaconing,
+                             attacker.iter_api_abuse, attacker.iter_clickjacking):
+                sources.append(generate(start_time, duration))
+        return sources
+
+    def _campaign_sources(self, plan):
+        """
+        One source IP per campaign that runs across shards, so every shard continues
+        the same one: a dataset device picked with `plan`, or the profile's default.
+        """
+        devices = self.attacker.loader.get_devices() if self.attacker.use_dataset else []
+        return {kind: devices[int(plan.integers(len(devices)))] if devices else None
+                for kind in ("dns_tunneling", "beaconing")}
+
+    def _beacon_profiles(self, start_time, offsets, hours, phase, src_ip):
+        """
+        Splits one beacon schedule (start_time + phase + j * interval, j >= 1) over the
+        shards: each gets exactly the beacons that fall in it (jitter included), started
+        one interval before the first, so the timing carries on across shard boundaries.
+        """
+        beacon = self.config["attacks"]["beaconing"]
+        interval = beacon["interval_seconds"]
+        jitter = interval * beacon["jitter_percent"]
+        bounds = [offset * 3600 for offset in offsets] + [(offsets[-1] + hours[-1]) * 3600]
+        first = [max(1, math.ceil((bound + jitter - phase) / interval)) for bound in bounds]
+        profiles = []
+        for j, j_next in zip(first, first[1:]):
+            n = j_next - j
+            anchor = start_time + timedelta(seconds=phase + (j - 1) * interval)
+            profiles.append([("beaconing", anchor, n * interval / 3600, n, src_ip)] if n > 0 else [])
+        return profiles
+
+    def _shard_tasks(self, counts, start_time, duration, seed):
+        """
+        Splits the window into SHARD_HOURS shards and assigns the profiles to them:
+        rate-driven profiles and bulk baseline run in every shard, a granular baseline
+        count is split over the shards multinomially, and single campaigns (the SSH
+        burst, clickjacking, granular attack counts) go to one shard. Campaign sources
+        and the beacon phase are picked once per run. Returns the _generate_shard tasks
+        and the shard start times.
+        """
+        plan = np.random.default_rng(np.random.SeedSequence(seed))
+        offsets = list(range(0, math.ceil(duration), SHARD_HOURS))
+        hours = [min(SHARD_HOURS, duration - offset) for offset in offsets]
+        starts = [start_time + timedelta(hours=offset) for offset in offsets]
+        profiles = [[] for _ in offsets]
+        sources = self._campaign_sources(plan)
+
+        if counts:
+            if counts.get('baseline', 0) > 0:
+                per_shard = plan.multinomial(counts['baseline'], np.array(hours) / duration)
+                for shard, start, h, n in zip(profiles, starts, hours, per_shard.tolist()):
+                    if n:
+                        shard.append(("baseline", start, h, n, None))
+            # Granular attacks are spread over the whole window (the SSH burst lands anywhere in it)
+            for key, kind in (('ssh', 'iot_bruteforce'), ('dns', 'dns_tunneling'), ('beacon', 'beaconing'),
+                              ('api_abuse', 'api_abuse'), ('clickjacking', 'clickjacking')):
+                if counts.get(key, 0) > 0:
+                    profiles[0].append((kind, start_time, duration, counts[key], sources.get(kind)))
+        else:
+            phase = float(plan.uniform(0, self.config["attacks"]["beaconing"]["interval_seconds"]))
+            beacons = self._beacon_profiles(start_time, offsets, hours, phase, sources["beaconing"])
+            for shard, start, h, beacon in zip(profiles, starts, hours, beacons):
+                shard.extend([("baseline", start, h, None, None),
+                              ("dns_tunneling", start, h, None, sources["dns_tunneling"]),
+                              ("api_abuse", start, h, None, None)] + beacon)
+            iot_shard = int(plan.integers(len(offsets)))
+            profiles[iot_shard].append(("iot_bruteforce", starts[iot_shard], hours[iot_shard], None, None))
+            profiles[0].append(("clickjacking", start_time, duration, None, None))
+
+        tasks = [(self.config, seed, index, shard, self.device_categories)
+                 for index, shard in enumerate(profiles)]
+        return tasks, starts
+
+    def _write_stream(self, entries, formats, compression, csv_lookahead):
+        schema = SIMULATED_TRAFFIC_SCHEMA if csv_lookahead is None else None
+        with LogStreamWriter("simulated_fortigate_logs", self.formatter, formats, compression,
+                             csv_schema=schema, csv_lookahead=csv_lookahead) as out:
+            total = out.write_all(entries)
+        print(f"[-] Total logs generated: {total}")
+        print("[+] Simulation complete.")
+
+    def run(self, counts=None, device_categories=None, stream=False, formats=("csv", "json", "log"),
+            compression=None, csv_lookahead=None, workers=1, seed=None, end_time=None):
         """
         Runs the simulation. 
         'counts' can be a dict specifying exactly how many of each to generate.
         'device_categories' is a list of allowed device types.
+        'stream' merges the time-ordered profile streams lazily (k-way heap merge) and
+        writes entries as they come, so memory stays flat however many events are made.
+        'formats', 'compression' and 'csv_lookahead' configure the streamed output (see
+        LogStreamWriter); its CSV columns default to SIMULATED_TRAFFIC_SCHEMA.
+        'workers' > 1 or a 'seed' generate the window in SHARD_HOURS time shards, each
+        seeded from (seed, shard) and spread over 'workers' processes, and stream the
+        merged result. With the same seed and 'end_time' the output is byte-identical
+        whatever the worker count.
+        'end_time' is where the window ends (default: now).
         """
-        now = datetime.now()
         # We align the simulation to END at 'now'
+        now = end_time if end_time is not None else datetime.now()
         duration = self.config["simulation"]["duration_hours"]
         start_time = now - timedelta(hours=duration)
         
-        all_logs = []
-        
         if device_categories:
             self.device_categories = device_categories
         else:
             self.device_categories = []
-            
-        if counts:
-            # GRANULAR MODE
-            if counts.get('baseline', 0) > 0:
-                # We reuse generate_baseline but limit it or modify it
-                # For simplicity, we generate a small batch based on the requested count
-                print(f"[-] Generating {counts['baseline']} baseline events...")
-                services = self.config["baseline"]["services"]
-                service_choices = [s for s in services]
-                service_weights = [s["weight"] for s in services]
-                
-                for _ in range(counts['baseline']):
-                    svc = random.choices(service_choices, weights=service_weights, k=1)[0]
-                    dt = random.uniform(0, duration * 3600)
-                    ts = start_time + timedelta(seconds=dt)
-                    log = {
-                        "timestamp": ts,
-                        "srcip": self._get_random_internal_ip(),
-                        "dstip": self._get_random_external_ip(),
-                        "srcport": random.randint(10000, 65000),
-                        "dstport": svc["port"],
-                        "proto": svc["proto"],
-                        "service": svc["name"],
-                        "action": "accept",
-                        "policyid": 1,
-                        "sentbyte": random.randint(100, 5000),
-                        "rcvdbyte": random.randint(100, 50000),
-                        "duration": random.randint(1, 60),
-                        "user": f"user-{random.randint(1, 50)}",
-                        "device_type": random.choice(self.device_categories) if self.device_categories else "workstation",
-                        "level": "notice",
-                        "logid": "0000000013"
-                    }
-                    all_logs.append(log)
 
-            if counts.get('ssh', 0) > 0:
-                print(f"[-] Injecting {counts['ssh']} SSH events...")
-                # Temporarily override config for the generator
-                orig_ssh = self.config["attacks"]["iot_bruteforce"]["attempts_per_run"]
-                self.config["attacks"]["iot_bruteforce"]["attempts_per_run"] = counts['ssh']
-                all_logs.extend(self.attacker.generate_iot_bruteforce(start_time, duration))
-                self.config["attacks"]["iot_bruteforce"]["attempts_per_run"] = orig_ssh
+        if workers > 1 or seed is not None:
+            if seed is None:
+                seed = random.getrandbits(64)
+            tasks, starts = self._shard_tasks(counts, start_time, duration, seed)
+            print(f"[-] Generating {len(tasks)} shard(s) on {workers} worker(s), seed {seed}...")
+            self._write_stream(merge_shards(iter_shards(tasks, workers), starts), formats, compression,
+                               csv_lookahead)
+            return
 
-            if counts.get('dns', 0) > 0:
-                print(f"[-] Injecting {counts['dns']} DNS events...")
-                # We need to modify AttackSimulator or just generate here. 
-                # For now, we take a fraction of the standard rate to match the requested count roughly
-                dns_logs = self.attacker.generate_dns_tunneling(start_time, duration)
-                if len(dns_logs) > counts['dns']:
-                    all_logs.extend(dns_logs[:counts['dns']])
-                else:
-                    all_logs.extend(dns_logs)
-
-            if counts.get('beacon', 0) > 0:
-                print(f"[-] Injecting {counts['beacon']} Beaconing events...")
-                beacon_logs = self.attacker.generate_beaconing(start_time, duration)
-                if len(beacon_logs) > counts['beacon']:
-                    all_logs.extend(beacon_logs[:counts['beacon']])
-                else:
-                    all_logs.extend(beacon_logs)
+        sources = self._sources(counts, start_time, duration, stream)
 
-            if counts.get('api_abuse', 0) > 0:
-                print(f"[-] Injecting {counts['api_abuse']} API Abuse events...")
-                api_logs = self.attacker.generate_api_abuse(start_time, duration)
-                if len(api_logs) > counts['api_abuse']:
-                    all_logs.extend(api_logs[:counts['api_abuse']])
-                else:
-                    all_logs.extend(api_logs)
+        if stream:
+            merged = heapq.merge(*sources, key=itemgetter("timestamp"))
+            self._write_stream(map(self.formatter.build_log_entry, merged), formats, compression, csv_lookahead)
+            return
 
-            if counts.get('clickjacking', 0) > 0:
-                print(f"[-] Injecting {counts['clickjacking']} Clickjacking events...")
-                cj_logs = self.attacker.generate_clickjacking(start_time, duration)
-                if len(cj_logs) > counts['clickjacking']:
-                    all_logs.extend(cj_logs[:counts['clickjacking']])
-                else:
-                    all_logs.extend(cj_logs)
-        else:
-            # BULK MODE (Default)
-            all_logs.extend(self.generate_baseline(start_time, duration))
-            print("[-] Injecting attacks...")
-            all_logs.extend(self.attacker.generate_iot_bruteforce(start_time, duration))
-            all_logs.extend(self.attacker.generate_dns_tunneling(start_time, duration))
-            all_logs.extend(self.attacker.generate_beaconing(start_time, duration))
-            all_logs.extend(self.attacker.generate_api_abuse(start_time, duration))
-            all_logs.extend(self.attacker.generate_clickjacking(start_time, duration))
+        all_logs = [log for source in sources for log in source]
         
         # 3. Sort by timestamp
         all_logs.sort(key=lambda x: x["timestamp"])
@@ -235,8 +307,26 @@ if __name__ == "__main__":
     parser.add_argument("--domain", type=str, help="Specific Log Style Domain (e.g., Auth, Endpoint)")
     parser.add_argument("--patterns", type=str, help="Comma separated list of pattern names")
     parser.add_argument("--pattern_count", type=int, default=5, help="Number of logs per pattern")
+    parser.add_argument("--stream", action="store_true",
+                        help="Merge and write logs incrementally (flat memory for very large runs)")
+    parser.add_argument("--format", nargs="+", choices=list(LogStreamWriter.FORMATS), dest="formats",
+                        default=["csv", "json", "log"],
+                        help="Output files of a --stream run; jsonl is the fast, appendable JSON form")
+    parser.add_argument("--compress", choices=list(COMPRESSION_SUFFIXES),
+                        help="Compress --stream output (zstd needs the zstandard package)")
+    parser.add_argument("--csv-lookahead", type=int,
+                        help="Take the --stream CSV header from the first N logs instead of the declared schema")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Generate hour-long time shards in N processes (implies --stream)")
+    parser.add_argument("--seed", type=int,
+                        help="Seed of a reproducible sharded run: same seed and --end-time, same bytes for any --workers")
+    parser.add_argument("--end-time", type=datetime.fromisoformat,
+                        help="End of the simulated window, ISO format (default: now)")
     
     args = parser.parse_args()
+    # The output options only apply to the streaming writer
+    if args.formats != ["csv", "json", "log"] or args.compress or args.csv_lookahead:
+        args.stream = True
     
     gen = TrafficGenerator(args.config)
 
@@ -338,6 +428,10 @@ if __name__ == "__main__":
             "api_abuse": args.api_abuse,
             "clickjacking": args.clickjacking
         }
-        gen.run(granular_counts, device_categories=args.categories)
+        gen.run(granular_counts, device_categories=args.categories, stream=args.stream, formats=args.formats,
+                compression=args.compress, csv_lookahead=args.csv_lookahead,
+                workers=args.workers, seed=args.seed, end_time=args.end_time)
     else:
-        gen.run(device_categories=args.categories)
+        gen.run(device_categories=args.categories, stream=args.stream, formats=args.formats,
+                compression=args.compress, csv_lookahead=args.csv_lookahead,
+                workers=args.workers, seed=args.seed, end_time=args.end_time)
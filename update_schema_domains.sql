@@ -67,3 +67,10 @@ ALTER TABLE logs ADD COLUMN IF NOT EXISTS client_ip VARCHAR(45);
 ALTER TABLE logs ADD COLUMN IF NOT EXISTS src_country VARCHAR(100);
 ALTER TABLE logs ADD COLUMN IF NOT EXISTS dst_country VARCHAR(100);
 ALTER TABLE logs ADD COLUMN IF NOT EXISTS msg TEXT;
+
+-- Alert rollups (ingest_logs.py --rollup-seconds)
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS first_seen DATETIME;
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS last_seen DATETIME;
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS event_count INT DEFAULT 1;
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS bucket_start DATETIME;
+ALTER TABLE alerts ADD UNIQUE KEY IF NOT EXISTS uq_alert_rollup (detection_type, src_ip, device, bucket_start);